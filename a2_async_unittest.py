@@ -0,0 +1,164 @@
+"""
+Unittests for selecting attacks in the background in A2.
+"""
+import threading
+import time
+import unittest
+
+import a2_game
+from a2_game import CHARACTER_CLASSES, PLAYSTYLE_CLASSES
+from a2_playstyle import Playstyle
+from a2_battle_queue import BattleQueue
+RecursiveMinimax = PLAYSTYLE_CLASSES['mr']
+IterativeMinimax = PLAYSTYLE_CLASSES['mi']
+
+
+class FailingPlaystyle(Playstyle):
+    """
+    A Playstyle whose select_attack always raises a ValueError.
+    """
+    def select_attack(self, parameter=None):
+        """
+        Raise a ValueError.
+        """
+        raise ValueError("No attack.")
+
+    def copy(self, new_battle_queue):
+        """
+        Return a copy of this FailingPlaystyle which uses the BattleQueue
+        new_battle_queue.
+        """
+        return FailingPlaystyle(new_battle_queue)
+
+
+class BlockingPlaystyle(Playstyle):
+    """
+    A Playstyle whose select_attack waits until it is released, then picks a
+    normal attack.
+
+    started - set once select_attack has been called.
+    release - set to let select_attack return.
+    finished - set once select_attack has stopped waiting.
+    """
+    def __init__(self, battle_queue):
+        """
+        Initialize this BlockingPlaystyle, not yet released.
+        """
+        super().__init__(battle_queue)
+        self.is_manual = False
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.finished = threading.Event()
+
+    def select_attack(self, parameter=None):
+        """
+        Wait until release is set, then return 'A'.
+        """
+        self.started.set()
+        self.release.wait()
+        self.finished.set()
+        return 'A'
+
+    def copy(self, new_battle_queue):
+        """
+        Return a copy of this BlockingPlaystyle which uses the BattleQueue
+        new_battle_queue.
+        """
+        return BlockingPlaystyle(new_battle_queue)
+
+
+class AsyncSelectAttackUnitTests(unittest.TestCase):
+    def setUp(self):
+        """
+        Sets up a Battle Queue containing a Rogue and a Vampire, both played by
+        a RecursiveMinimax, as the game in a2_game.
+        """
+        self.battle_queue = BattleQueue()
+        self.p1 = CHARACTER_CLASSES['r'](
+            "R", self.battle_queue, RecursiveMinimax(self.battle_queue))
+        self.p2 = CHARACTER_CLASSES['v'](
+            "V", self.battle_queue, RecursiveMinimax(self.battle_queue))
+        self.p1.enemy = self.p2
+        self.p2.enemy = self.p1
+        self.battle_queue.add(self.p1)
+        self.battle_queue.add(self.p2)
+        self.p1.set_sp(30)
+        self.p2.set_sp(30)
+
+        a2_game.BATTLE_QUEUE = self.battle_queue
+        a2_game.P1 = self.p1
+        a2_game.P2 = self.p2
+        a2_game.GAME_IS_OVER = False
+        a2_game.GAME_WINNER = None
+        a2_game.PENDING_ATTACK = None
+
+    def tearDown(self):
+        """
+        Stop waiting for any attack started by a test.
+        """
+        a2_game.cancel_attack()
+
+    def test_future_matches_select_attack(self):
+        """
+        Test to make sure the Future holds the attack select_attack returns.
+        """
+        for constructor in [RecursiveMinimax, IterativeMinimax]:
+            playstyle = constructor(self.battle_queue)
+            expected = constructor(self.battle_queue).select_attack()
+            future = playstyle.select_attack_async()
+
+            self.assertEqual(expected, future.result(timeout=60))
+
+    def test_future_holds_error(self):
+        """
+        Test to make sure an error raised by select_attack is held by the
+        Future instead of being lost in the background thread.
+        """
+        future = FailingPlaystyle(self.battle_queue).select_attack_async()
+
+        self.assertIsInstance(future.exception(timeout=60), ValueError)
+
+    def test_poll_attack_plays_game(self):
+        """
+        Test to make sure polling plays a whole game, one attack at a time.
+        """
+        deadline = time.perf_counter() + 60
+        while not a2_game.GAME_IS_OVER:
+            before = repr(self.battle_queue)
+            if not a2_game.poll_attack():
+                self.assertIsNotNone(a2_game.PENDING_ATTACK)
+                self.assertEqual(before, repr(self.battle_queue))
+                time.sleep(0.001)
+            self.assertLess(time.perf_counter(), deadline)
+
+        self.assertIsNone(a2_game.PENDING_ATTACK)
+        self.assertTrue(self.battle_queue.is_over())
+
+    def test_cancel_attack(self):
+        """
+        Test to make sure an attack cancelled while it is being selected is
+        never performed, even once its search finishes.
+        """
+        playstyle = BlockingPlaystyle(self.battle_queue)
+        self.p1.playstyle = playstyle
+        self.assertFalse(a2_game.poll_attack())
+        future = a2_game.PENDING_ATTACK
+        self.assertTrue(playstyle.started.wait(60))
+
+        a2_game.cancel_attack()
+        playstyle.release.set()
+        self.assertTrue(playstyle.finished.wait(60))
+        playstyle.release.clear()
+
+        self.assertTrue(future.cancelled())
+        self.assertFalse(a2_game.poll_attack())
+        self.assertIsNot(future, a2_game.PENDING_ATTACK)
+        self.assertEqual(100, self.p2.get_hp())
+        self.assertEqual(30, self.p1.get_sp())
+
+        a2_game.cancel_attack()
+        playstyle.release.set()
+
+
+if __name__ == "__main__":
+    unittest.main(exit=False)
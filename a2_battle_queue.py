@@ -8,7 +8,11 @@ BattleQueue has been completed for you, and the class header for
 RestrictedBattleQueue has been provided. You must implement
 RestrictedBattleQueue and document it accordingly.
 """
-from typing import Union
+from typing import List, Union
+from collections import deque
+
+from a2_zobrist import zobrist_key, rotate, MASK, ORDER_BASE, \
+    ORDER_BASE_INVERSE
 
 
 class BattleQueue:
@@ -24,9 +28,105 @@ class BattleQueue:
         >>> bq.is_empty()
         True
         """
-        self._content = []
+        self._content = deque()
         self._p1 = None
         self._p2 = None
+        self._journal = None
+        self._order_hash = 0
+        self._power = 1
+
+    def _append(self, character: 'Character') -> None:
+        """
+        Put character at the back of this BattleQueue.
+
+        Every change to the order of this BattleQueue goes through _append and
+        _pop_front, so that make_move can record it.
+        """
+        self._content.append(character)
+        self._hash_push(self._entry_key(character), False)
+        self._log(None)
+
+    def _pop_front(self) -> 'Character':
+        """
+        Remove and return the character at the front of this BattleQueue,
+        without skipping characters that have no actions available.
+        """
+        character = self._content.popleft()
+        self._hash_pop(self._entry_key(character), True)
+        self._log(character)
+        return character
+
+    def _entry_key(self, character: 'Character', can_add: bool = None) -> int:
+        """
+        Return the Zobrist key of an entry for character in this BattleQueue,
+        which is able to add if can_add is True. can_add is None for queues
+        without add rules.
+        """
+        player = 0 if self._p1 is None or character is self._p1 else 1
+        return zobrist_key('entry', player, can_add)
+
+    def _hash_push(self, key: int, front: bool) -> None:
+        """
+        Update the hash of the order of this BattleQueue for an entry with the
+        Zobrist key key put at its front (if front is True) or back.
+
+        The order is hashed as the sum of the key of the i-th entry times
+        ORDER_BASE ** i, so entries can be put at or taken from either end in
+        constant time.
+        """
+        if front:
+            self._order_hash = (self._order_hash * ORDER_BASE + key) & MASK
+        else:
+            self._order_hash = (self._order_hash + key * self._power) & MASK
+        self._power = (self._power * ORDER_BASE) & MASK
+
+    def _hash_pop(self, key: int, front: bool) -> None:
+        """
+        Update the hash of the order of this BattleQueue for an entry with the
+        Zobrist key key taken from its front (if front is True) or back.
+        """
+        self._power = (self._power * ORDER_BASE_INVERSE) & MASK
+        if front:
+            self._order_hash = ((self._order_hash - key) *
+                                ORDER_BASE_INVERSE) & MASK
+        else:
+            self._order_hash = (self._order_hash - key * self._power) & MASK
+
+    def _log(self, entry: object) -> None:
+        """
+        Record entry in the journal of the move being made, if any.
+
+        An entry of None stands for an _append and any other entry for a
+        _pop_front; _revert undoes either one.
+        """
+        if self._journal is not None:
+            self._journal.append(entry)
+
+    def _revert(self, entry: object) -> None:
+        """
+        Undo the _append or _pop_front that logged entry.
+        """
+        if entry is None:
+            self._hash_pop(self._entry_key(self._content.pop()), False)
+        else:
+            self._content.appendleft(entry)
+            self._hash_push(self._entry_key(entry), True)
+
+    def _front(self) -> Union['Character', None]:
+        """
+        Return the character at the front of this BattleQueue, or None if it
+        is empty, without skipping characters that have no actions available.
+        """
+        if self._content:
+            return self._content[0]
+
+        return None
+
+    def _characters(self) -> List['Character']:
+        """
+        Return the characters in this BattleQueue, front first.
+        """
+        return list(self._content)
 
     def _clean_queue(self) -> None:
         """
@@ -45,8 +145,10 @@ class BattleQueue:
         >>> bq.is_empty()
         False
         """
-        while self._content and self._content[0].get_available_actions() == []:
-            self._content.pop(0)
+        front = self._front()
+        while front is not None and front.get_available_actions() == []:
+            self._pop_front()
+            front = self._front()
 
     def add(self, character: 'Character') -> None:
         """
@@ -63,7 +165,7 @@ class BattleQueue:
         >>> bq.is_empty()
         False
         """
-        self._content.append(character)
+        self._append(character)
 
         if not self._p1:
             self._p1 = character
@@ -88,7 +190,7 @@ class BattleQueue:
         """
         self._clean_queue()
 
-        return self._content.pop(0)
+        return self._pop_front()
 
     def is_empty(self) -> bool:
         """
@@ -101,7 +203,7 @@ class BattleQueue:
         """
         self._clean_queue()
 
-        return self._content == []
+        return self._front() is None
 
     def peek(self) -> 'Character':
         """
@@ -126,8 +228,9 @@ class BattleQueue:
         """
         self._clean_queue()
 
-        if self._content:
-            return self._content[0]
+        front = self._front()
+        if front is not None:
+            return front
 
         return self._p1
 
@@ -211,25 +314,149 @@ class BattleQueue:
         >>> bq
         r (Rogue): 100/100 -> r2 (Rogue): 100/100
         """
-        new_battle_queue = BattleQueue()
+        return self._copy_into(BattleQueue())
 
+    def _copy_into(self, new_battle_queue: 'BattleQueue') -> 'BattleQueue':
+        """
+        Fill the empty new_battle_queue with copies of the characters in this
+        BattleQueue, in the same order, and return it.
+        """
         p1_copy = self._p1.copy(new_battle_queue)
         p2_copy = self._p2.copy(new_battle_queue)
         p1_copy.enemy = p2_copy
         p2_copy.enemy = p1_copy
+        new_battle_queue._p1 = p1_copy
+        new_battle_queue._p2 = p2_copy
 
-        new_battle_queue.add(p1_copy)
-        if not new_battle_queue.is_empty():
-            new_battle_queue.remove()
-
-        for character in self._content:
-            if character == self._p1:
+        for character in self._characters():
+            if character is self._p1:
                 new_battle_queue.add(p1_copy)
             else:
                 new_battle_queue.add(p2_copy)
 
         return new_battle_queue
 
+    def make_move(self, action: str) -> tuple:
+        """
+        Make the next character in this BattleQueue perform action ('A' or
+        'S') the same way a2_game.perform_attack does, and return a record
+        that unmake_move can use to take the move back.
+
+        The record holds both characters' HP and SP before the move and every
+        change the move made to the order of this BattleQueue, so making and
+        unmaking a move costs as much as the move itself and no copying.
+
+        >>> bq = BattleQueue()
+        >>> from a2_characters import Rogue
+        >>> from a2_playstyle import ManualPlaystyle
+        >>> c = Rogue("r", bq, ManualPlaystyle(bq))
+        >>> c2 = Rogue("r2", bq, ManualPlaystyle(bq))
+        >>> c.enemy = c2
+        >>> c2.enemy = c
+        >>> bq.add(c)
+        >>> bq.add(c2)
+        >>> record = bq.make_move('S')
+        >>> bq
+        r2 (Rogue): 90/100 -> r (Rogue): 100/90 -> r (Rogue): 100/90
+        >>> bq.unmake_move(record)
+        >>> bq
+        r (Rogue): 100/100 -> r2 (Rogue): 100/100
+        """
+        current = self.peek()
+        record = (self._p1.get_hp(), self._p1.get_sp(), self._p2.get_hp(),
+                  self._p2.get_sp(), [])
+        self._journal = record[4]
+
+        if action == 'A':
+            current.attack()
+        else:
+            current.special_attack()
+
+        if current.get_available_actions() != []:
+            self.remove()
+        self._clean_queue()
+
+        self._journal = None
+        return record
+
+    def unmake_move(self, record: tuple) -> None:
+        """
+        Take back the move that make_move returned record for. Moves must be
+        taken back in the reverse order they were made.
+        """
+        for entry in reversed(record[4]):
+            self._revert(entry)
+
+        self._p1.set_hp(record[0])
+        self._p1.set_sp(record[1])
+        self._p2.set_hp(record[2])
+        self._p2.set_sp(record[3])
+
+    def get_state_key(self) -> tuple:
+        """
+        Return a hashable key describing the position of the game in this
+        BattleQueue: the class, HP and SP of both characters, and the order in
+        which they act (0 for the first player, 1 for the second). The first
+        entry of that order is whose turn it is.
+
+        >>> bq = BattleQueue()
+        >>> from a2_characters import Rogue, Mage
+        >>> from a2_playstyle import ManualPlaystyle
+        >>> c = Rogue("r", bq, ManualPlaystyle(bq))
+        >>> c2 = Mage("m", bq, ManualPlaystyle(bq))
+        >>> c.enemy = c2
+        >>> c2.enemy = c
+        >>> bq.add(c)
+        >>> bq.add(c2)
+        >>> bq.add(c)
+        >>> bq.get_state_key()
+        ('BattleQueue', ('Rogue', 100, 100), ('Mage', 100, 100), (0, 1, 0))
+        """
+        self._clean_queue()
+
+        return (type(self).__name__,
+                (type(self._p1).__name__, self._p1.get_hp(),
+                 self._p1.get_sp()),
+                (type(self._p2).__name__, self._p2.get_hp(),
+                 self._p2.get_sp()),
+                tuple(0 if character is self._p1 else 1
+                      for character in self._characters()))
+
+    def state_hash(self) -> int:
+        """
+        Return a 64-bit Zobrist hash of the position of the game in this
+        BattleQueue, which is equal for positions with equal get_state_key.
+
+        The hash is kept up to date as characters are added and removed and
+        as their HP and SP change, so this takes constant time.
+
+        >>> bq = BattleQueue()
+        >>> from a2_characters import Rogue, Mage
+        >>> from a2_playstyle import ManualPlaystyle
+        >>> c = Rogue("r", bq, ManualPlaystyle(bq))
+        >>> c2 = Mage("m", bq, ManualPlaystyle(bq))
+        >>> c.enemy = c2
+        >>> c2.enemy = c
+        >>> bq.add(c)
+        >>> bq.add(c2)
+        >>> h = bq.state_hash()
+        >>> record = bq.make_move('A')
+        >>> h == bq.state_hash()
+        False
+        >>> bq.unmake_move(record)
+        >>> h == bq.state_hash()
+        True
+        >>> h == bq.copy().state_hash()
+        True
+        """
+        self._clean_queue()
+
+        if self._p1 is None:
+            return self._order_hash
+
+        return (self._order_hash ^ self._p1.state_hash() ^
+                rotate(self._p2.state_hash(), 32))
+
     def __repr__(self) -> str:
         """
         Return a representation of this BattleQueue.
@@ -246,7 +473,8 @@ class BattleQueue:
         >>> bq
         r (Rogue): 100/100 -> r2 (Rogue): 100/100
         """
-        return " -> ".join([repr(character) for character in self._content])
+        return " -> ".join([repr(character)
+                            for character in self._characters()])
 
 
 class RestrictedBattleQueue(BattleQueue):
@@ -294,30 +522,81 @@ class RestrictedBattleQueue(BattleQueue):
         True
         """
         super().__init__()
-        self.adability = []
+        self._can_add = deque()
+        self._copies = [0, 0]
+        self._addable = [0, 0]
 
-    def remove(self) -> 'Character':
-        """ Removers from RestrictedBattleQueue
+    @property
+    def adability(self) -> List[str]:
+        """
+        Return whether each character in this RestrictedBattleQueue is able to
+        add, front first, as 'P1 Y', 'P1 N', 'P2 Y' or 'P2 N'.
+        """
+        return ['P{} {}'.format(self._get_player(character) + 1,
+                                'Y' if can_add else 'N')
+                for character, can_add in zip(self._content, self._can_add)]
 
-        >>> bq = RestrictedBattleQueue()
-        >>> from a2_characters import Rogue
-        >>> from a2_playstyle import ManualPlaystyle
-        >>> c = Rogue("Sophia", bq, ManualPlaystyle(bq))
-        >>> c2 = Rogue("Sophia", bq, ManualPlaystyle(bq))
-        >>> c.enemy = c2
-        >>> c2.enemy = c
-        >>> bq.add(c)
-        >>> bq.remove()
-        Sophia (Rogue): 100/100
-        >>> bq.is_empty()
-        True
+    def _get_player(self, character: 'Character') -> int:
         """
-        self._clean_queue()
-        self.adability.pop(0)
-        return self._content.pop(0)
+        Return 0 if character is the first player of this
+        RestrictedBattleQueue and 1 if it is the second.
+        """
+        if character is self._p1:
+            return 0
+
+        return 1
+
+    def add_with_flag(self, character: 'Character', can_add: bool) -> None:
+        """
+        Put character at the back of this RestrictedBattleQueue, able to add if
+        can_add is True, without applying the rules of add. Used to rebuild a
+        RestrictedBattleQueue as it was.
+        """
+        player = self._get_player(character)
+        self._content.append(character)
+        self._can_add.append(can_add)
+        self._copies[player] += 1
+        self._addable[player] += can_add
+        self._hash_push(self._entry_key(character, can_add), False)
+        self._log(None)
+
+    def _pop_front(self) -> 'Character':
+        """
+        Remove and return the character at the front of this
+        RestrictedBattleQueue together with its add flag, without skipping
+        characters that have no actions available.
+        """
+        character = self._content.popleft()
+        can_add = self._can_add.popleft()
+        player = self._get_player(character)
+        self._copies[player] -= 1
+        self._addable[player] -= can_add
+        self._hash_pop(self._entry_key(character, can_add), True)
+        self._log((character, can_add))
+        return character
+
+    def _revert(self, entry: object) -> None:
+        """
+        Undo the add_with_flag or _pop_front that logged entry.
+        """
+        if entry is None:
+            character = self._content.pop()
+            can_add = self._can_add.pop()
+            player = self._get_player(character)
+            self._copies[player] -= 1
+            self._addable[player] -= can_add
+            self._hash_pop(self._entry_key(character, can_add), False)
+        else:
+            self._content.appendleft(entry[0])
+            self._can_add.appendleft(entry[1])
+            player = self._get_player(entry[0])
+            self._copies[player] += 1
+            self._addable[player] += entry[1]
+            self._hash_push(self._entry_key(entry[0], entry[1]), True)
 
     def copy(self) -> 'RestrictedBattleQueue':
-        """ Copy of RestrictedBattleQueue
+        """ Copy of RestrictedBattleQueue, including which characters in it are
+        able to add.
 
         >>> bq = RestrictedBattleQueue()
         >>> from a2_characters import Rogue
@@ -343,19 +622,43 @@ class RestrictedBattleQueue(BattleQueue):
         p2_c = self._p2.copy(new_bq)
         p1_c.enemy = p2_c
         p2_c.enemy = p1_c
+        new_bq._p1 = p1_c
+        new_bq._p2 = p2_c
 
-        for item in self._content:
-            if item == self._p1:
-                new_bq.add(p1_c)
+        for item, can_add in zip(self._content, self._can_add):
+            if item is self._p1:
+                new_bq.add_with_flag(p1_c, can_add)
             else:
-                new_bq.add(p2_c)
+                new_bq.add_with_flag(p2_c, can_add)
 
         return new_bq
 
+    def get_state_key(self) -> tuple:
+        """
+        Return a hashable key describing the position of the game in this
+        RestrictedBattleQueue. Unlike a BattleQueue, this also includes whether
+        each character in the queue is able to add.
+
+        >>> bq = RestrictedBattleQueue()
+        >>> from a2_characters import Rogue
+        >>> from a2_playstyle import ManualPlaystyle
+        >>> c = Rogue("r", bq, ManualPlaystyle(bq))
+        >>> c2 = Rogue("r2", bq, ManualPlaystyle(bq))
+        >>> c.enemy = c2
+        >>> c2.enemy = c
+        >>> bq.add(c)
+        >>> bq.get_state_key()[-1]
+        (True,)
+        """
+        return super().get_state_key() + (tuple(self._can_add),)
 
     def add(self, character: 'Character') -> None:
         """ Adds to RestrictedBattleQueue
 
+        The number of copies of each player in the queue, and how many of them
+        are able to add, are kept up to date as characters are added and
+        removed, so adding never has to look through the queue.
+
         >>> bq = RestrictedBattleQueue()
         >>> from a2_characters import Rogue
         >>> from a2_playstyle import ManualPlaystyle
@@ -368,49 +671,199 @@ class RestrictedBattleQueue(BattleQueue):
         >>> bq.add(c)
         >>> bq.is_empty()
         False
+        >>> bq.add(c2)
+        >>> bq.add(c2)
+        >>> bq.adability
+        ['P1 Y', 'P2 Y', 'P2 N']
         """
 
         if self._p1 is None:
             self._p1 = character
             self._p2 = character.enemy
 
-        if character not in self._content:
-            self._content += [character]
+        player = self._get_player(character)
+
+        if self._copies[player] == 0:
+            self.add_with_flag(character, True)
+
+        elif self._can_add[0]:
+
+            if self.peek() is character:
+                self.add_with_flag(character, self._addable[player] <= 1)
+
+            else:
+                self.add_with_flag(character, False)
+
+
+class PackedBattleQueue(BattleQueue):
+    """
+    A BattleQueue that stores its order as bits of an int instead of a list of
+    characters.
+
+    A BattleQueue only ever holds its two players, so bit i of the order is 0
+    if the i-th character from the front is the first player and 1 if it is
+    the second. Adding, removing, peeking and copying are int operations, and
+    the order and its length are a ready-made hash key for the queue.
+
+    A PackedBattleQueue behaves exactly like a BattleQueue.
+    """
+
+    def __init__(self) -> None:
+        """
+        Initialize this PackedBattleQueue.
+
+        >>> bq = PackedBattleQueue()
+        >>> bq.is_empty()
+        True
+        """
+        super().__init__()
+        self._content = None
+        self._order = 0
+        self._length = 0
+
+    def _append(self, character: 'Character') -> None:
+        """
+        Put character at the back of this PackedBattleQueue.
+        """
+        if self._p1 is not None and character is not self._p1:
+            self._order |= 1 << self._length
+        self._length += 1
+        self._hash_push(self._entry_key(character), False)
+        self._log(None)
+
+    def _pop_front(self) -> 'Character':
+        """
+        Remove and return the character at the front of this
+        PackedBattleQueue, without skipping characters that have no actions
+        available.
+        """
+        if self._length == 0:
+            raise IndexError("pop from an empty PackedBattleQueue")
+
+        bit = self._order & 1
+        self._order >>= 1
+        self._length -= 1
+        self._hash_pop(zobrist_key('entry', bit, None), True)
+        self._log(bit)
+        return self._p2 if bit else self._p1
+
+    def _revert(self, entry: object) -> None:
+        """
+        Undo the _append or _pop_front that logged entry.
+        """
+        if entry is None:
+            self._length -= 1
+            bit = (self._order >> self._length) & 1
+            self._order &= (1 << self._length) - 1
+            self._hash_pop(zobrist_key('entry', bit, None), False)
+        else:
+            self._order = (self._order << 1) | entry
+            self._length += 1
+            self._hash_push(zobrist_key('entry', entry, None), True)
+
+    def _front(self) -> Union['Character', None]:
+        """
+        Return the character at the front of this PackedBattleQueue, or None
+        if it is empty.
+        """
+        if self._length == 0:
+            return None
+
+        return self._p2 if self._order & 1 else self._p1
+
+    def _characters(self) -> List['Character']:
+        """
+        Return the characters in this PackedBattleQueue, front first.
+        """
+        return [self._p2 if (self._order >> i) & 1 else self._p1
+                for i in range(self._length)]
+
+    def copy(self) -> 'PackedBattleQueue':
+        """
+        Return a copy of this PackedBattleQueue, which contains copies of the
+        characters inside it. Only the two characters are copied; the order is
+        a single int.
+
+        >>> bq = PackedBattleQueue()
+        >>> from a2_characters import Rogue
+        >>> from a2_playstyle import ManualPlaystyle
+        >>> c = Rogue("r", bq, ManualPlaystyle(bq))
+        >>> c2 = Rogue("r2", bq, ManualPlaystyle(bq))
+        >>> c.enemy = c2
+        >>> c2.enemy = c
+        >>> bq.add(c)
+        >>> bq.add(c2)
+        >>> new_bq = bq.copy()
+        >>> new_bq.peek().attack()
+        >>> new_bq
+        r (Rogue): 100/97 -> r2 (Rogue): 95/100 -> r (Rogue): 100/97
+        >>> bq
+        r (Rogue): 100/100 -> r2 (Rogue): 100/100
+        """
+        new_bq = PackedBattleQueue()
 
-            if character == self._p1:
-                self.adability += ['P1 Y']
+        p1_copy = self._p1.copy(new_bq)
+        p2_copy = self._p2.copy(new_bq)
+        p1_copy.enemy = p2_copy
+        p2_copy.enemy = p1_copy
+        new_bq._p1 = p1_copy
+        new_bq._p2 = p2_copy
+        new_bq._order = self._order
+        new_bq._length = self._length
+        new_bq._order_hash = self._order_hash
+        new_bq._power = self._power
 
-            elif character == self._p2:
-                self.adability += ['P2 Y']
+        return new_bq
 
-        elif character in self._content:
+    def get_order_key(self) -> tuple:
+        """
+        Return the order of this PackedBattleQueue as an (order, length) pair,
+        which is equal for two queues exactly when their orders are.
 
-            if self.adability[0][-1] == 'N':
-                pass
+        >>> bq = PackedBattleQueue()
+        >>> from a2_characters import Rogue
+        >>> from a2_playstyle import ManualPlaystyle
+        >>> c = Rogue("r", bq, ManualPlaystyle(bq))
+        >>> c2 = Rogue("r2", bq, ManualPlaystyle(bq))
+        >>> c.enemy = c2
+        >>> c2.enemy = c
+        >>> bq.add(c)
+        >>> bq.add(c2)
+        >>> bq.add(c2)
+        >>> bq.get_order_key()
+        (6, 3)
+        """
+        self._clean_queue()
 
-            if self.adability[0][-1] == 'Y' and self.peek() == character:
-                if character == self._p1:
-                    if self.adability.count('P1 Y') <= 1:
-                        self.adability += ['P1 Y']
-                        self._content += [character]
-                    else:
-                        self.adability += ['P1 N']
-                        self._content += [character]
+        return self._order, self._length
 
-                else:
-                    if self.adability.count('P2 Y') <= 1:
-                        self.adability += ['P2 Y']
-                        self._content += [character]
-                    else:
-                        self.adability += ['P2 N']
-                        self._content += [character]
 
-            elif self.adability[0][-1] == 'Y' and self.peek() != character:
-                self._content += [character]
-                if character == self._p1:
-                    self.adability += ['P1 N']
+def pack(battle_queue: BattleQueue) -> BattleQueue:
+    """
+    Return a copy of battle_queue that stores its order packed into an int.
+
+    A RestrictedBattleQueue also has to track which characters are able to
+    add, so it is copied as it is.
+
+    >>> bq = BattleQueue()
+    >>> from a2_characters import Rogue
+    >>> from a2_playstyle import ManualPlaystyle
+    >>> c = Rogue("r", bq, ManualPlaystyle(bq))
+    >>> c2 = Rogue("r2", bq, ManualPlaystyle(bq))
+    >>> c.enemy = c2
+    >>> c2.enemy = c
+    >>> bq.add(c)
+    >>> bq.add(c2)
+    >>> packed = pack(bq)
+    >>> type(packed).__name__
+    'PackedBattleQueue'
+    >>> packed
+    r (Rogue): 100/100 -> r2 (Rogue): 100/100
+    """
+    if isinstance(battle_queue, (PackedBattleQueue, RestrictedBattleQueue)):
+        return battle_queue.copy()
 
-                self.adability += ['P2 N']
+    return battle_queue._copy_into(PackedBattleQueue())
 
 
 if __name__ == '__main__':
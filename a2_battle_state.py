@@ -0,0 +1,517 @@
+"""
+The BattleState class for A2.
+
+A BattleState is a compact, immutable snapshot of a game in a BattleQueue:
+the class, HP and SP of both characters and the order in which they act.
+step() plays a move on a BattleState the same way the skills in a2_skills
+play it on a real BattleQueue, so search code can explore the game without
+creating or copying any Characters, Playstyles or BattleQueues.
+
+Players are numbered 0 (the first character added to the BattleQueue) and
+1 (their enemy). Classes are identified by the same letters as
+a2_game.CHARACTER_CLASSES.
+
+Sorcerers are not supported: their attack depends on a SkillDecisionTree,
+which can't be part of a BattleState.
+"""
+from typing import List, NamedTuple, Tuple, Union
+
+from a2_battle_queue import BattleQueue, RestrictedBattleQueue
+from a2_characters import Mage, Rogue, Vampire
+from a2_skills import MageAttack, MageSpecial, RogueAttack, RogueSpecial, \
+    VampireAttack, VampireSpecial
+
+CLASS_IDS = {'Mage': 'm', 'Rogue': 'r', 'Vampire': 'v'}
+CHARACTER_CONSTRUCTORS = {'m': Mage, 'r': Rogue, 'v': Vampire}
+
+
+class SkillRule(NamedTuple):
+    """
+    How a Skill changes the game.
+
+    cost - the SP the caster pays.
+    damage - the damage dealt to the target, before its defense.
+    adds - who the caster adds to the BattleQueue, in order ('C' for the
+           caster and 'T' for the target).
+    drains - whether the caster heals by the HP the target lost.
+    """
+    cost: int
+    damage: int
+    adds: str
+    drains: bool
+
+
+def _make_rule(skill: 'Skill', adds: str, drains: bool = False) -> SkillRule:
+    """
+    Return the SkillRule of skill, which adds adds to the BattleQueue.
+    """
+    return SkillRule(skill.get_sp_cost(), skill.get_damage(), adds, drains)
+
+
+# The queue changes below mirror the use() method of each Skill.
+SKILL_RULES = {'m': {'A': _make_rule(MageAttack(), 'C'),
+                     'S': _make_rule(MageSpecial(), 'TC')},
+               'r': {'A': _make_rule(RogueAttack(), 'C'),
+                     'S': _make_rule(RogueSpecial(), 'CC')},
+               'v': {'A': _make_rule(VampireAttack(), 'C', True),
+                     'S': _make_rule(VampireSpecial(), 'CCT', True)}
+              }
+
+DEFENSES = {class_id: constructor('', None, None).get_defense()
+            for class_id, constructor in CHARACTER_CONSTRUCTORS.items()}
+
+MIN_COSTS = {class_id: min(rule.cost for rule in rules.values())
+             for class_id, rules in SKILL_RULES.items()}
+
+
+class BattleState(NamedTuple):
+    """
+    An immutable, hashable snapshot of a game in a BattleQueue.
+
+    classes - the class ids of players 0 and 1.
+    hp - the HP of players 0 and 1.
+    sp - the SP of players 0 and 1.
+    queue - the players in the BattleQueue, front first. Characters with no
+            actions available have already been removed from its front.
+    flags - for a RestrictedBattleQueue, whether each entry of queue is able
+            to add. None for a BattleQueue.
+    """
+    classes: Tuple[str, str]
+    hp: Tuple[int, int]
+    sp: Tuple[int, int]
+    queue: Tuple[int, ...]
+    flags: Union[Tuple[bool, ...], None]
+
+
+def from_battle_queue(battle_queue: 'BattleQueue') -> BattleState:
+    """
+    Return the BattleState of the game in battle_queue.
+
+    Raise a ValueError if battle_queue holds a character whose class a
+    BattleState can't represent.
+
+    >>> from a2_playstyle import ManualPlaystyle
+    >>> bq = BattleQueue()
+    >>> r = Rogue("r", bq, ManualPlaystyle(bq))
+    >>> m = Mage("m", bq, ManualPlaystyle(bq))
+    >>> r.enemy = m
+    >>> m.enemy = r
+    >>> bq.add(r)
+    >>> bq.add(m)
+    >>> from_battle_queue(bq)
+    BattleState(classes=('r', 'm'), hp=(100, 100), sp=(100, 100), \
+queue=(0, 1), flags=None)
+    """
+    key = battle_queue.get_state_key()
+    p1, p2 = key[1], key[2]
+
+    if p1[0] not in CLASS_IDS or p2[0] not in CLASS_IDS:
+        raise ValueError("A BattleState can't hold a {} and a {}.".format(
+            p1[0], p2[0]))
+
+    if isinstance(battle_queue, RestrictedBattleQueue):
+        flags = key[4]
+    else:
+        flags = None
+
+    return BattleState((CLASS_IDS[p1[0]], CLASS_IDS[p2[0]]), (p1[1], p2[1]),
+                       (p1[2], p2[2]), key[3], flags)
+
+
+def is_supported(battle_queue: 'BattleQueue') -> bool:
+    """
+    Return whether the game in battle_queue can be turned into a BattleState.
+    """
+    key = battle_queue.get_state_key()
+    return key[1][0] in CLASS_IDS and key[2][0] in CLASS_IDS
+
+
+def to_battle_queue(state: BattleState,
+                    names: Tuple[str, str] = ('P1', 'P2')) -> 'BattleQueue':
+    """
+    Return a new BattleQueue holding the game in state, with characters named
+    names that use ManualPlaystyles.
+
+    >>> state = BattleState(('r', 'm'), (40, 70), (90, 100), (1, 0, 0), None)
+    >>> to_battle_queue(state)
+    P2 (Mage): 70/100 -> P1 (Rogue): 40/90 -> P1 (Rogue): 40/90
+    >>> from_battle_queue(to_battle_queue(state)) == state
+    True
+    """
+    from a2_playstyle import ManualPlaystyle
+
+    if state.flags is None:
+        bq = BattleQueue()
+    else:
+        bq = RestrictedBattleQueue()
+
+    players = []
+    for player in [0, 1]:
+        constructor = CHARACTER_CONSTRUCTORS[state.classes[player]]
+        players.append(constructor(names[player], bq, ManualPlaystyle(bq)))
+        players[player].set_hp(state.hp[player])
+        players[player].set_sp(state.sp[player])
+    players[0].enemy = players[1]
+    players[1].enemy = players[0]
+
+    # Adding player 0 first makes them the first player of bq.
+    bq.add(players[0])
+    if not bq.is_empty():
+        bq.remove()
+
+    for i, player in enumerate(state.queue):
+        if state.flags is None:
+            bq.add(players[player])
+        else:
+            bq.add_with_flag(players[player], state.flags[i])
+
+    return bq
+
+
+def can_act(state: BattleState, player: int) -> bool:
+    """
+    Return whether player has any actions available in state.
+    """
+    return state.sp[player] >= MIN_COSTS[state.classes[player]]
+
+
+def get_available_actions(state: BattleState) -> List[str]:
+    """
+    Return the actions available to the next player in state.
+
+    >>> get_available_actions(BattleState(('r', 'm'), (40, 70), (9, 100),
+    ...                                   (0, 1), None))
+    ['A']
+    """
+    player = get_next_player(state)
+    sp = state.sp[player]
+    rules = SKILL_RULES[state.classes[player]]
+
+    return [action for action in ['A', 'S'] if rules[action].cost <= sp]
+
+
+def get_next_player(state: BattleState) -> int:
+    """
+    Return the player who acts next in state. Like BattleQueue.peek, this is
+    player 0 if the queue is empty.
+    """
+    if state.queue:
+        return state.queue[0]
+
+    return 0
+
+
+def is_over(state: BattleState) -> bool:
+    """
+    Return whether the game in state is over.
+    """
+    return not state.queue or state.hp[0] == 0 or state.hp[1] == 0
+
+
+def get_winner(state: BattleState) -> Union[int, None]:
+    """
+    Return the player who won the game in state, or None if the game isn't
+    over or ended in a tie.
+    """
+    if not is_over(state):
+        return None
+    if state.hp[0] == 0:
+        return 1
+    elif state.hp[1] == 0:
+        return 0
+
+    return None
+
+
+def get_terminal_score(state: BattleState) -> int:
+    """
+    Return the score of the finished game in state for the next player, as
+    defined by a2_playstyle.get_state_score.
+
+    >>> get_terminal_score(BattleState(('r', 'm'), (40, 0), (9, 100),
+    ...                                (1,), None))
+    -40
+    """
+    winner = get_winner(state)
+
+    if winner is None:
+        return 0
+    elif winner == get_next_player(state):
+        return state.hp[winner]
+
+    return state.hp[winner] * -1
+
+
+def can_reach(state: BattleState, other: BattleState) -> bool:
+    """
+    Return whether the game in state might lead to the game in other.
+
+    Nothing restores SP, and only a character who drains can gain HP, so
+    other can't be reached if either player has more SP in other, or more HP
+    without draining. A True result doesn't mean other is reachable.
+
+    >>> state = BattleState(('r', 'm'), (40, 70), (9, 100), (0, 1), None)
+    >>> can_reach(state, state._replace(hp=(40, 58), sp=(9, 90)))
+    True
+    >>> can_reach(state, state._replace(sp=(12, 90)))
+    False
+    """
+    if state.classes != other.classes or \
+            (state.flags is None) != (other.flags is None):
+        return False
+
+    for player in [0, 1]:
+        if other.sp[player] > state.sp[player]:
+            return False
+        if other.hp[player] > state.hp[player] and not any(
+                rule.drains
+                for rule in SKILL_RULES[state.classes[player]].values()):
+            return False
+
+    return True
+
+
+def mirror(state: BattleState) -> BattleState:
+    """
+    Return state with players 0 and 1 swapped.
+
+    >>> mirror(BattleState(('r', 'm'), (40, 70), (9, 100), (0, 1, 1), None))
+    BattleState(classes=('m', 'r'), hp=(70, 40), sp=(100, 9), \
+queue=(1, 0, 0), flags=None)
+    """
+    return BattleState((state.classes[1], state.classes[0]),
+                       (state.hp[1], state.hp[0]), (state.sp[1], state.sp[0]),
+                       tuple(1 - player for player in state.queue),
+                       state.flags)
+
+
+def get_canonical(state: BattleState) -> BattleState:
+    """
+    Return the position search caches store state under.
+
+    When both players have the same class, state and its mirror have the same
+    score and best action for their next player, so both are stored under
+    whichever of the two is smaller. Other positions are their own canonical
+    position, and so are positions with an empty queue: player 0 is the next
+    player of both a position and its mirror then, so their scores have
+    opposite signs.
+
+    >>> state = BattleState(('r', 'r'), (40, 70), (9, 100), (1, 0), None)
+    >>> get_canonical(state) == get_canonical(mirror(state))
+    True
+    >>> state = BattleState(('r', 'm'), (40, 70), (9, 100), (1, 0), None)
+    >>> get_canonical(state) is state
+    True
+    >>> state = BattleState(('r', 'r'), (3, 0), (1, 0), (), None)
+    >>> get_canonical(mirror(state)) == get_canonical(state)
+    False
+    """
+    if state.classes[0] != state.classes[1] or not state.queue:
+        return state
+
+    mirrored = mirror(state)
+    if mirrored < state:
+        return mirrored
+
+    return state
+
+
+def _clean(queue: list, flags: Union[list, None], sp: list,
+           classes: Tuple[str, str]) -> None:
+    """
+    Remove every player with no actions available from the front of queue
+    (and flags), like BattleQueue._clean_queue.
+    """
+    while queue and sp[queue[0]] < MIN_COSTS[classes[queue[0]]]:
+        queue.pop(0)
+        if flags is not None:
+            flags.pop(0)
+
+
+def _add(queue: list, flags: Union[list, None], sp: list,
+         classes: Tuple[str, str], player: int) -> None:
+    """
+    Add player to the back of queue (and flags) following the rules of
+    BattleQueue.add, or RestrictedBattleQueue.add if flags isn't None.
+    """
+    if flags is None:
+        queue.append(player)
+
+    elif player not in queue:
+        queue.append(player)
+        flags.append(True)
+
+    elif flags[0]:
+        # RestrictedBattleQueue.add peeks, which removes players who can't
+        # act from the front before the adding player is checked.
+        _clean(queue, flags, sp, classes)
+        front = queue[0] if queue else 0
+        queue.append(player)
+
+        if front == player:
+            flags.append(sum(1 for i, flag in enumerate(flags)
+                             if flag and queue[i] == player) <= 1)
+        else:
+            flags.append(False)
+
+
+def step(state: BattleState, action: str) -> BattleState:
+    """
+    Return the BattleState reached when the next player in state performs
+    action, the same way BattleQueue.make_move and a2_game.perform_attack do.
+
+    action must be one of get_available_actions(state).
+
+    >>> state = BattleState(('r', 'm'), (100, 100), (100, 100), (0, 1), None)
+    >>> step(state, 'S')
+    BattleState(classes=('r', 'm'), hp=(100, 88), sp=(90, 100), \
+queue=(1, 0, 0), flags=None)
+    >>> step(step(state, 'S'), 'S')
+    BattleState(classes=('r', 'm'), hp=(70, 88), sp=(90, 70), \
+queue=(0, 0, 0, 1), flags=None)
+    """
+    classes = state.classes
+    caster = get_next_player(state)
+    target = 1 - caster
+    rule = SKILL_RULES[classes[caster]][action]
+
+    hp = list(state.hp)
+    sp = list(state.sp)
+    queue = list(state.queue)
+    flags = None if state.flags is None else list(state.flags)
+
+    sp[caster] -= rule.cost
+    hp[target] = max(hp[target] - (rule.damage - DEFENSES[classes[target]]),
+                     0)
+
+    for adder in rule.adds:
+        _add(queue, flags, sp, classes, caster if adder == 'C' else target)
+
+    if rule.drains:
+        hp[caster] += state.hp[target] - hp[target]
+
+    _clean(queue, flags, sp, classes)
+    if sp[caster] >= MIN_COSTS[classes[caster]]:
+        queue.pop(0)
+        if flags is not None:
+            flags.pop(0)
+        _clean(queue, flags, sp, classes)
+
+    return BattleState(classes, (hp[0], hp[1]), (sp[0], sp[1]), tuple(queue),
+                       None if flags is None else tuple(flags))
+
+
+
+def is_forced(state: BattleState) -> bool:
+    """
+    Return whether neither player in state has a choice of action left: each
+    can only attack, or can't act at all. SP is never restored, so the rest
+    of the game is fixed.
+
+    >>> is_forced(BattleState(('r', 'm'), (40, 70), (9, 29), (0, 1), None))
+    True
+    >>> is_forced(BattleState(('r', 'm'), (40, 70), (9, 30), (0, 1), None))
+    False
+    """
+    return all(state.sp[player] < SKILL_RULES[state.classes[player]]['S'].cost
+               for player in [0, 1])
+
+
+def fast_forward(state: BattleState) -> BattleState:
+    """
+    Return the first position reached from state, state included, whose game
+    is over or whose next player has more than one action available.
+
+    Only 'A' can be played on the way, so every position skipped has exactly
+    the score of the one after it for its next player (negated if the next
+    player changes), and searches need not visit it.
+
+    >>> state = BattleState(('r', 'm'), (40, 70), (9, 100), (0, 1), None)
+    >>> fast_forward(state)
+    BattleState(classes=('r', 'm'), hp=(40, 63), sp=(6, 100), \
+queue=(1, 0), flags=None)
+    """
+    while not is_over(state) and \
+            state.sp[state.queue[0]] < \
+            SKILL_RULES[state.classes[state.queue[0]]]['S'].cost:
+        state = step(state, 'A')
+
+    return state
+
+
+def _get_attack_time(positions: List[int], length: int, attack: int) -> int:
+    """
+    Return the move on which a player whose entries are at positions of a
+    queue of length length makes their attack-th attack (counting from 0),
+    while only 'A' is played.
+    """
+    return (attack // len(positions)) * length + \
+        positions[attack % len(positions)]
+
+
+def get_forced_score(state: BattleState) -> int:
+    """
+    Return the score of state for its next player, as defined by
+    a2_playstyle.get_state_score, when is_forced(state) is True.
+
+    Each 'A' adds its caster back to the end of the BattleQueue, so the queue
+    just rotates until a player runs out of SP, and the moves on which each
+    player attacks, how many attacks they can afford and how many they need
+    to knock out their enemy follow from the queue, SP, damage and defense.
+    The winner is whoever lands their last needed attack first. Games with a
+    RestrictedBattleQueue or a player who drains are played out with
+    fast_forward instead.
+
+    >>> get_forced_score(BattleState(('r', 'm'), (40, 12), (9, 29), (0, 1),
+    ...                              None))
+    30
+    >>> get_forced_score(BattleState(('r', 'm'), (40, 12), (5, 29), (1, 0),
+    ...                              None))
+    5
+    """
+    if is_over(state):
+        return get_terminal_score(state)
+
+    rules = [SKILL_RULES[state.classes[player]]['A'] for player in [0, 1]]
+    damages = [rules[player].damage - DEFENSES[state.classes[1 - player]]
+               for player in [0, 1]]
+
+    if state.flags is not None or any(rule.drains for rule in rules) or \
+            min(damages) <= 0:
+        end = fast_forward(state)
+        if get_next_player(end) != get_next_player(state):
+            return get_terminal_score(end) * -1
+        return get_terminal_score(end)
+
+    length = len(state.queue)
+    positions = [[i for i, player in enumerate(state.queue) if player == p]
+                 for p in [0, 1]]
+    attacks = [state.sp[p] // rules[p].cost if positions[p] else 0
+               for p in [0, 1]]
+    needed = [-(-state.hp[1 - p] // damages[p]) for p in [0, 1]]
+    knockouts = [_get_attack_time(positions[p], length, needed[p] - 1)
+                 if needed[p] <= attacks[p] else None for p in [0, 1]]
+
+    if knockouts[0] is None and knockouts[1] is None:
+        return 0
+
+    if knockouts[1] is None or \
+            (knockouts[0] is not None and knockouts[0] < knockouts[1]):
+        winner = 0
+    else:
+        winner = 1
+
+    loser = 1 - winner
+    time = knockouts[winner]
+    hits = (time // length) * len(positions[loser]) + \
+        sum(1 for i in positions[loser] if i < time % length)
+    hp = state.hp[winner] - min(hits, attacks[loser]) * damages[loser]
+
+    if winner == get_next_player(state):
+        return hp
+    return hp * -1
+
+
+if __name__ == '__main__':
+    import python_ta
+    python_ta.check_all(config='a2_pyta.txt')
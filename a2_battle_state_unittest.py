@@ -0,0 +1,86 @@
+"""
+Unittests for the BattleState and step() of A2.
+"""
+import random
+import unittest
+
+from a2_game import BATTLE_QUEUE_CLASSES, PLAYSTYLE_CLASSES
+from a2_playstyle import get_state_score
+from a2_battle_state import BattleState, from_battle_queue, \
+    to_battle_queue, step, is_over, get_available_actions, get_winner
+from a2_test_helpers import make_battle_queue
+
+
+class BattleStateUnitTests(unittest.TestCase):
+    def test_step_matches_battle_queue(self):
+        """
+        Test to make sure step() changes a BattleState the same way the
+        skills change a real BattleQueue, for both kinds of BattleQueue.
+        """
+        rng = random.Random(148)
+        for _ in range(200):
+            bq_class = BATTLE_QUEUE_CLASSES[rng.choice('nr')]
+            bq = make_battle_queue(rng.choice('mrv'), rng.choice('mrv'),
+                                   (rng.randint(1, 100), rng.randint(0, 100),
+                                    rng.randint(1, 100), rng.randint(0, 100)),
+                                   bq_class)
+            state = from_battle_queue(bq)
+
+            while not bq.is_over():
+                self.assertFalse(is_over(state))
+                actions = bq.peek().get_available_actions()
+                self.assertEqual(actions, get_available_actions(state))
+
+                action = rng.choice(actions)
+                bq.make_move(action)
+                state = step(state, action)
+                self.assertEqual(from_battle_queue(bq), state,
+                                 "Mismatch after {} in {}".format(action,
+                                                                  repr(bq)))
+
+            self.assertTrue(is_over(state))
+            winner = bq.get_winner()
+            if winner is None:
+                self.assertIsNone(get_winner(state))
+            else:
+                self.assertEqual(winner.get_name(),
+                                 "P{}".format(get_winner(state) + 1))
+
+    def test_round_trip(self):
+        """
+        Test to make sure a BattleState turned into a BattleQueue and back is
+        unchanged.
+        """
+        states = [BattleState(('r', 'm'), (40, 70), (90, 100), (1, 0, 0),
+                              None),
+                  BattleState(('v', 'v'), (112, 3), (40, 0), (0, 0),
+                              (True, False)),
+                  BattleState(('m', 'r'), (10, 20), (1, 2), (), None)]
+
+        for state in states:
+            self.assertEqual(state, from_battle_queue(to_battle_queue(state)))
+
+    def test_states_are_hashable(self):
+        """
+        Test to make sure equal BattleStates can share a dictionary entry.
+        """
+        bq = make_battle_queue('r', 'm')
+        states = {from_battle_queue(bq): 1}
+
+        self.assertIn(from_battle_queue(bq.copy()), states)
+
+    def test_sorcerer_is_not_supported(self):
+        """
+        Test to make sure a game with a Sorcerer can't become a BattleState,
+        but can still be searched by the minimax playstyles.
+        """
+        bq = make_battle_queue('s', 'r', (60, 60, 50, 40))
+
+        self.assertRaises(ValueError, from_battle_queue, bq)
+        self.assertEqual(-5, get_state_score(bq))
+        self.assertEqual('S', PLAYSTYLE_CLASSES['mr'](bq).select_attack())
+        self.assertEqual('S', PLAYSTYLE_CLASSES['mi'](bq).select_attack())
+
+
+if __name__ == "__main__":
+    unittest.main(exit=False)
@@ -0,0 +1,247 @@
+"""
+Benchmarks for A2.
+
+Run this module to print how long the BattleQueue operations take, and how
+much faster the minimax playstyles search with more worker processes.
+
+The queue benchmark fills a queue with n characters and then removes all of
+them, for a BattleQueue backed by a list (as it used to be), a BattleQueue
+(backed by a deque) and a PackedBattleQueue.
+
+The search benchmark times select_attack on one Rogue vs Mage game with 1, 2,
+... worker processes, each time with an empty TranspositionTable.
+
+The memory benchmark measures the peak memory IterativeMinimax's search
+allocates with tracemalloc, on Rogue vs Mage games with more and more SP.
+Its TranspositionTable holds one position, so the table doesn't hide how
+much memory the search itself keeps.
+"""
+from typing import Callable, Dict, List, Tuple
+import os
+import time
+import tracemalloc
+
+from a2_battle_queue import BattleQueue, PackedBattleQueue
+from a2_characters import Rogue, Mage
+from a2_battle_state import BattleState
+from a2_playstyle import ManualPlaystyle, RecursiveMinimax, IterativeMinimax
+from a2_search import SearchBudget, search_battle_state
+from a2_transposition_table import TranspositionTable
+
+QUEUE_SIZES = (1000, 10000, 100000)
+
+# The HP and SP of the Rogue and the Mage in the search benchmark.
+SEARCH_STATS = (200, 200, 200, 200)
+
+# The SP of both characters in each game of the memory benchmark.
+MEMORY_SPS = (20, 30, 40, 50, 60)
+
+
+class ListBattleQueue(BattleQueue):
+    """
+    A BattleQueue backed by a list, which removes from the front with
+    list.pop(0). Only used as the baseline of the queue benchmark.
+    """
+
+    def __init__(self) -> None:
+        """
+        Initialize this ListBattleQueue.
+
+        >>> ListBattleQueue().is_empty()
+        True
+        """
+        super().__init__()
+        self._content = []
+
+    def _pop_front(self) -> 'Character':
+        """
+        Remove and return the character at the front of this ListBattleQueue.
+        """
+        character = self._content.pop(0)
+        self._log(character)
+        return character
+
+    def _revert(self, entry: object) -> None:
+        """
+        Undo the _append or _pop_front that logged entry.
+        """
+        if entry is None:
+            self._content.pop()
+        else:
+            self._content.insert(0, entry)
+
+
+QUEUE_CLASSES = {'list': ListBattleQueue,
+                 'deque': BattleQueue,
+                 'packed': PackedBattleQueue}
+
+
+def time_queue(queue_class: Callable[[], BattleQueue], size: int) -> float:
+    """
+    Return how many seconds it takes to add size characters to a new
+    queue_class and then remove all of them.
+
+    >>> time_queue(BattleQueue, 10) >= 0
+    True
+    """
+    bq = queue_class()
+    p1 = Rogue("P1", bq, ManualPlaystyle(bq))
+    p2 = Rogue("P2", bq, ManualPlaystyle(bq))
+    p1.enemy = p2
+    p2.enemy = p1
+
+    start = time.perf_counter()
+    for i in range(size):
+        bq.add(p1 if i % 2 == 0 else p2)
+    while not bq.is_empty():
+        bq.remove()
+
+    return time.perf_counter() - start
+
+
+def run_queue_benchmark(sizes: Tuple[int, ...] = QUEUE_SIZES,
+                        repeat: int = 3) -> Dict[str, List[float]]:
+    """
+    Return the best time of repeat runs of time_queue for every queue in
+    QUEUE_CLASSES and every size in sizes, keyed by the name of the queue.
+
+    >>> results = run_queue_benchmark((10, 20), 1)
+    >>> sorted(results)
+    ['deque', 'list', 'packed']
+    >>> len(results['deque'])
+    2
+    """
+    results = {}
+
+    for name, queue_class in QUEUE_CLASSES.items():
+        results[name] = [min(time_queue(queue_class, size)
+                             for _ in range(repeat))
+                         for size in sizes]
+
+    return results
+
+
+def print_queue_benchmark(sizes: Tuple[int, ...] = QUEUE_SIZES) -> None:
+    """
+    Print the results of run_queue_benchmark as a table of milliseconds.
+    """
+    results = run_queue_benchmark(sizes)
+
+    print("{:>8}".format("size") +
+          "".join("{:>12}".format(name) for name in results))
+    for i, size in enumerate(sizes):
+        print("{:>8}".format(size) +
+              "".join("{:>12.1f}".format(times[i] * 1000)
+                      for times in results.values()))
+
+
+SEARCH_CLASSES = {'recursive': RecursiveMinimax,
+                  'iterative': IterativeMinimax}
+
+
+def time_search(playstyle_class: Callable[..., 'Playstyle'], workers: int,
+                stats: Tuple[int, int, int, int] = SEARCH_STATS) -> float:
+    """
+    Return how many seconds select_attack of a new playstyle_class with
+    workers processes takes on a Rogue vs Mage game whose HP and SP are set
+    from stats (Rogue HP, Rogue SP, Mage HP, Mage SP).
+
+    >>> time_search(RecursiveMinimax, 1, (20, 20, 20, 20)) >= 0
+    True
+    """
+    bq = BattleQueue()
+    p1 = Rogue("P1", bq, ManualPlaystyle(bq))
+    p2 = Mage("P2", bq, ManualPlaystyle(bq))
+    p1.enemy = p2
+    p2.enemy = p1
+    bq.add(p1)
+    bq.add(p2)
+    p1.set_hp(stats[0])
+    p1.set_sp(stats[1])
+    p2.set_hp(stats[2])
+    p2.set_sp(stats[3])
+
+    playstyle = playstyle_class(bq, workers=workers)
+
+    start = time.perf_counter()
+    playstyle.select_attack()
+
+    return time.perf_counter() - start
+
+
+def run_search_benchmark(max_workers: int,
+                         stats: Tuple[int, int, int, int] = SEARCH_STATS) \
+        -> Dict[str, List[float]]:
+    """
+    Return the speedup over one worker of time_search with 1, 2, ...
+    max_workers workers for every playstyle in SEARCH_CLASSES, keyed by the
+    name of the playstyle.
+    """
+    results = {}
+
+    for name, playstyle_class in SEARCH_CLASSES.items():
+        times = [time_search(playstyle_class, workers, stats)
+                 for workers in range(1, max_workers + 1)]
+        results[name] = [times[0] / seconds for seconds in times]
+
+    return results
+
+
+def print_search_benchmark(max_workers: int = None) -> None:
+    """
+    Print the results of run_search_benchmark as a table of speedups, using
+    up to max_workers workers, or one per CPU if max_workers is None.
+    """
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+
+    results = run_search_benchmark(max_workers)
+
+    print("{:>8}".format("workers") +
+          "".join("{:>12}".format(name) for name in results))
+    for i in range(max_workers):
+        print("{:>8}".format(i + 1) +
+              "".join("{:>12.2f}".format(speedups[i])
+                      for speedups in results.values()))
+
+
+def measure_search_memory(sp: int) -> Tuple[int, int]:
+    """
+    Return the number of positions search_battle_state visits on a Rogue vs
+    Mage game where both have 200 HP and sp SP, and the peak number of bytes
+    it allocates while doing so.
+
+    >>> nodes, peak = measure_search_memory(10)
+    >>> nodes > 0 and peak > 0
+    True
+    """
+    state = BattleState(('r', 'm'), (200, 200), (sp, sp), (0, 1), None)
+    budget = SearchBudget()
+
+    tracemalloc.start()
+    try:
+        search_battle_state(state, TranspositionTable(1), budget=budget)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return budget.nodes, peak
+
+
+def print_memory_benchmark(sps: Tuple[int, ...] = MEMORY_SPS) -> None:
+    """
+    Print the results of measure_search_memory for every SP in sps as a
+    table of positions visited and peak kilobytes.
+    """
+    print("{:>8}{:>12}{:>12}".format("sp", "positions", "peak KB"))
+    for sp in sps:
+        nodes, peak = measure_search_memory(sp)
+        print("{:>8}{:>12}{:>12.1f}".format(sp, nodes, peak / 1024))
+
+
+if __name__ == '__main__':
+    print_queue_benchmark()
+    print()
+    print_search_benchmark()
+    print()
+    print_memory_benchmark()
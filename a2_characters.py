@@ -16,6 +16,7 @@ from typing import List
 from a2_skills import MageAttack, MageSpecial, RogueAttack, RogueSpecial, \
     VampireAttack, VampireSpecial, SorcererAttack, SorcererSpecial
 from a2_skill_decision_tree import SkillDecisionTree
+from a2_zobrist import zobrist_key
 
 class Character:
     """
@@ -38,6 +39,8 @@ class Character:
         self.playstyle = ps
         self._hp = 100
         self._sp = 100
+        self._hash = (zobrist_key('class', type(self).__name__) ^
+                      zobrist_key('hp', 100) ^ zobrist_key('sp', 100))
         self._defense = 0
         self.enemy = None
 
@@ -67,6 +70,12 @@ class Character:
         """
         return self._sp
 
+    def get_defense(self) -> int:
+        """
+        Return the defense of this Character.
+        """
+        return self._defense
+
     def get_next_sprite(self) -> str:
         """
         Return the next sprite that needs to be drawn for this Character.
@@ -129,7 +138,7 @@ class Character:
         """
         Reduce this Character's SP by cost.
         """
-        self._sp -= cost
+        self.set_sp(self._sp - cost)
 
     def apply_damage(self, damage: int) -> None:
         """
@@ -137,20 +146,47 @@ class Character:
         defense.
         """
         damage -= self._defense
-        self._hp -= damage
-        self._hp = max(self._hp, 0)
+        self.set_hp(max(self._hp - damage, 0))
 
     def set_sp(self, new_sp: int) -> None:
         """
         Sets this Character's SP to new_sp.
         """
-        self._sp = new_sp
+        if new_sp != self._sp:
+            self._hash ^= (zobrist_key('sp', self._sp) ^
+                           zobrist_key('sp', new_sp))
+            self._sp = new_sp
 
     def set_hp(self, new_hp: int) -> None:
         """
         Sets this Character's HP to new_hp.
         """
-        self._hp = new_hp
+        if new_hp != self._hp:
+            self._hash ^= (zobrist_key('hp', self._hp) ^
+                           zobrist_key('hp', new_hp))
+            self._hp = new_hp
+
+    def state_hash(self) -> int:
+        """
+        Return a 64-bit hash of the class, HP and SP of this Character. It is
+        kept up to date as the HP and SP change, so this takes constant time.
+
+        >>> from a2_battle_queue import BattleQueue
+        >>> from a2_playstyle import ManualPlaystyle
+        >>> bq = BattleQueue()
+        >>> c = Rogue("r", bq, ManualPlaystyle(bq))
+        >>> c2 = Rogue("r2", bq, ManualPlaystyle(bq))
+        >>> h = c.state_hash()
+        >>> h == c2.state_hash()
+        True
+        >>> c.apply_damage(20)
+        >>> h == c.state_hash()
+        False
+        >>> c.set_hp(100)
+        >>> h == c.state_hash()
+        True
+        """
+        return self._hash
 
     def __repr__(self):
         """
@@ -397,6 +433,7 @@ class Sorcerer(Character):
         copy = Sorcerer(self._name, new_battle_queue,
                         self.playstyle.copy(new_battle_queue))
         self._set_copy_attributes(copy)
+        copy.set_skill_decision_tree(self.skill_decision_tree)
         return copy
 
     def set_skill_decision_tree(self, sdt: 'SkillDecisionTree') -> None:
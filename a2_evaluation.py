@@ -0,0 +1,87 @@
+"""
+Static evaluation of positions for A2.
+
+A depth-limited search can't always play a game to its end, so the positions
+where it stops are given an estimated score by an evaluator instead. An
+evaluator takes a BattleState whose game isn't over and returns an estimate
+of the score get_state_score would give it: positive if the next player is
+ahead, negative if they are behind.
+"""
+from typing import Callable
+
+from a2_battle_state import BattleState, get_next_player, SKILL_RULES, \
+    DEFENSES
+
+Evaluator = Callable[[BattleState], int]
+
+# How much one of the upcoming turns in the queue is worth, in HP.
+TEMPO_WEIGHT = 5
+
+
+def hp_difference(state: BattleState) -> int:
+    """
+    Return the HP of the next player in state minus the HP of their enemy.
+
+    >>> hp_difference(BattleState(('r', 'm'), (40, 70), (90, 100), (1, 0),
+    ...                           None))
+    30
+    """
+    player = get_next_player(state)
+
+    return state.hp[player] - state.hp[1 - player]
+
+
+def potential_damage(state: BattleState, player: int) -> int:
+    """
+    Return the damage player could deal to their enemy with the SP they have
+    left in state, if their enemy never got to act. Skills are paid for in
+    order of how much damage they deal per SP, using the costs and damage of
+    the skills in a2_skills.
+
+    >>> state = BattleState(('r', 'm'), (40, 70), (25, 100), (0, 1), None)
+    >>> potential_damage(state, 0)
+    56
+    >>> potential_damage(state, 1)
+    40
+    """
+    classes = state.classes
+    enemy = 1 - player
+    sp = state.sp[player]
+    damage = 0
+
+    rules = sorted(SKILL_RULES[classes[player]].values(),
+                   key=lambda rule: (rule.damage - DEFENSES[classes[enemy]]) /
+                   rule.cost, reverse=True)
+    for rule in rules:
+        uses = sp // rule.cost
+        sp -= uses * rule.cost
+        damage += uses * max(rule.damage - DEFENSES[classes[enemy]], 0)
+
+    return min(damage, state.hp[enemy])
+
+
+def evaluate(state: BattleState) -> int:
+    """
+    Return an estimate of the score of state for the next player, from the
+    difference in HP, half the difference in potential_damage and
+    TEMPO_WEIGHT for every turn in the queue the next player owns beyond
+    their enemy's. Halves are rounded towards zero, so a position is scored
+    the same for both players with the sign flipped.
+
+    >>> evaluate(BattleState(('r', 'm'), (40, 70), (25, 100), (0, 1, 0),
+    ...                      None))
+    -17
+    """
+    player = get_next_player(state)
+    enemy = 1 - player
+    tempo = state.queue.count(player) - state.queue.count(enemy)
+
+    return (state.hp[player] - state.hp[enemy] +
+            int((potential_damage(state, player) -
+                 potential_damage(state, enemy)) / 2) +
+            TEMPO_WEIGHT * tempo)
+
+
+if __name__ == '__main__':
+    import python_ta
+    python_ta.check_all(config='a2_pyta.txt')
@@ -0,0 +1,75 @@
+"""
+Unittests for the static evaluation and depth-limited search in A2.
+"""
+import random
+import unittest
+
+from a2_game import PLAYSTYLE_CLASSES
+from a2_playstyle import get_state_score
+from a2_battle_state import BattleState
+from a2_evaluation import evaluate, potential_damage
+from a2_test_helpers import make_battle_queue
+RecursiveMinimax = PLAYSTYLE_CLASSES['mr']
+IterativeMinimax = PLAYSTYLE_CLASSES['mi']
+
+
+class EvaluationUnitTests(unittest.TestCase):
+    def test_potential_damage_capped_by_hp(self):
+        """
+        Test to make sure potential_damage never exceeds the enemy's HP.
+        """
+        state = BattleState(('m', 'r'), (100, 3), (100, 0), (0, 1), None)
+        self.assertEqual(3, potential_damage(state, 0))
+        self.assertEqual(0, potential_damage(state, 1))
+
+    def test_evaluate_is_antisymmetric(self):
+        """
+        Test to make sure evaluate scores a position the same, with the sign
+        flipped, when the other player is next.
+        """
+        state = BattleState(('r', 'v'), (60, 45), (30, 80), (0, 1), None)
+        mirrored = BattleState(('r', 'v'), (60, 45), (30, 80), (1, 0), None)
+        self.assertEqual(evaluate(state), -evaluate(mirrored))
+
+
+class DepthLimitedSearchUnitTests(unittest.TestCase):
+    def test_deep_limit_matches_exhaustive(self):
+        """
+        Test to make sure a depth limit deeper than the game gives the
+        exhaustive score and attack.
+        """
+        rng = random.Random(148)
+        for _ in range(30):
+            bq = make_battle_queue(rng.choice('mrv'), rng.choice('mrv'),
+                                   (rng.randint(1, 60), rng.randint(0, 40),
+                                    rng.randint(1, 60), rng.randint(0, 40)))
+            if bq.is_over():
+                continue
+
+            self.assertEqual(get_state_score(bq),
+                             get_state_score(bq, max_depth=1000),
+                             "Mismatch for {}".format(repr(bq)))
+            expected = RecursiveMinimax(bq).select_attack()
+            self.assertEqual(expected,
+                             RecursiveMinimax(bq, max_depth=1000)
+                             .select_attack(),
+                             "Mismatch for {}".format(repr(bq)))
+            self.assertEqual(expected,
+                             IterativeMinimax(bq, max_depth=1000)
+                             .select_attack(),
+                             "Mismatch for {}".format(repr(bq)))
+
+    def test_shallow_limit_on_large_game(self):
+        """
+        Test to make sure both engines answer a game far too big to search
+        to the end when given a small depth limit.
+        """
+        bq = make_battle_queue('r', 'm', (1000, 1000, 1000, 1000))
+        recursive = RecursiveMinimax(bq, max_depth=6).select_attack()
+        iterative = IterativeMinimax(bq, max_depth=6).select_attack()
+        self.assertIn(recursive, ['A', 'S'])
+        self.assertEqual(recursive, iterative)
+
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
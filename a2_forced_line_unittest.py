@@ -0,0 +1,116 @@
+"""
+Unittests for playing forced moves without searching them in A2.
+"""
+import random
+import unittest
+
+from a2_battle_queue import pack
+from a2_battle_state import BattleState, SKILL_RULES, MIN_COSTS, step, \
+    get_available_actions, get_next_player, get_terminal_score, is_over, \
+    is_forced, fast_forward, get_forced_score, to_battle_queue
+from a2_search import get_battle_state_score, \
+    get_pruned_battle_state_score, get_iterative_score, \
+    get_depth_limited_score, search_battle_state, SearchBudget, \
+    get_queue_score
+from a2_transposition_table import TranspositionTable
+
+
+def forced_position(rng: random.Random) -> BattleState:
+    """
+    Return a random position where neither player can use their special
+    attack.
+    """
+    classes = (rng.choice('mrv'), rng.choice('mrv'))
+    sp = tuple(rng.randint(0, SKILL_RULES[class_id]['S'].cost - 1)
+               for class_id in classes)
+    queue = [rng.choice([0, 1]) for _ in range(rng.randint(1, 5))]
+    while queue and sp[queue[0]] < MIN_COSTS[classes[queue[0]]]:
+        queue.pop(0)
+
+    return BattleState(classes, (rng.randint(1, 100), rng.randint(1, 100)),
+                       sp, tuple(queue), None)
+
+
+def play_out(state: BattleState) -> int:
+    """
+    Return the score of state for its next player found by playing 'A' until
+    the game is over.
+    """
+    end = state
+    while not is_over(end):
+        end = step(end, 'A')
+
+    if get_next_player(end) != get_next_player(state):
+        return get_terminal_score(end) * -1
+    return get_terminal_score(end)
+
+
+class ForcedLineUnitTests(unittest.TestCase):
+    def test_forced_score_closed_form(self):
+        """
+        Test to make sure the closed form of get_forced_score agrees with
+        playing the game out, drains and all.
+        """
+        rng = random.Random(24)
+        for _ in range(2000):
+            state = forced_position(rng)
+            self.assertTrue(is_forced(state))
+            self.assertEqual(play_out(state), get_forced_score(state))
+
+    def test_fast_forward_stops_at_choice(self):
+        """
+        Test to make sure fast_forward plays only forced moves and stops at
+        the first position with a choice.
+        """
+        state = BattleState(('r', 'm'), (40, 70), (9, 100), (0, 0, 1), None)
+        end = fast_forward(state)
+
+        self.assertEqual(BattleState(('r', 'm'), (40, 56), (3, 100),
+                                     (1, 0, 0), None), end)
+        self.assertEqual(['A', 'S'], get_available_actions(end))
+        self.assertIs(end, fast_forward(end))
+
+    def test_engines_agree(self):
+        """
+        Test to make sure every BattleState engine gives the score of a
+        search on a real BattleQueue, which plays every forced move.
+        """
+        rng = random.Random(240)
+        for _ in range(15):
+            state = BattleState((rng.choice('mrv'), rng.choice('mrv')),
+                                (rng.randint(20, 60), rng.randint(20, 60)),
+                                (rng.randint(20, 50), rng.randint(20, 50)),
+                                (0, 1), None)
+            expected = get_queue_score(pack(to_battle_queue(state)), None)
+
+            self.assertEqual(expected, get_battle_state_score(state))
+            self.assertEqual(expected, get_pruned_battle_state_score(state))
+            self.assertEqual(expected, get_iterative_score(state))
+            self.assertEqual((expected, True),
+                             get_depth_limited_score(state, 50))
+
+    def test_forced_lines_not_searched(self):
+        """
+        Test to make sure a search visits no position where only 'A' is
+        available, and solves a forced game without visiting any.
+        """
+        state = BattleState(('m', 'r'), (100, 100), (50, 40), (0, 1), None)
+        table = TranspositionTable()
+        budget = SearchBudget()
+        search_battle_state(state, table, budget=budget)
+
+        self.assertTrue(all(len(get_available_actions(position)) > 1
+                            for position in table._entries
+                            if not is_over(position) and
+                            not is_forced(position)))
+
+        forced = state._replace(sp=(29, 9))
+        budget = SearchBudget()
+        root = search_battle_state(forced, TranspositionTable(),
+                                   budget=budget)
+        self.assertEqual(1, budget.nodes)
+        self.assertEqual(play_out(forced), root.score)
+
+
+if __name__ == "__main__":
+    unittest.main(exit=False)
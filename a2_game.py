@@ -10,7 +10,9 @@ We will not grade the documentation of this file.
 """
 # Import classes as needed
 from a2_battle_queue import BattleQueue, RestrictedBattleQueue
-from a2_playstyle import ManualPlaystyle, RandomPlaystyle, RecursiveMinimax, IterativeMinimax
+from a2_playstyle import ManualPlaystyle, RandomPlaystyle, RecursiveMinimax, IterativeMinimax, \
+    MCTSPlaystyle, RetrogradePlaystyle
+from a2_search import DEFAULT_PONDER_NODES
 from a2_characters import Mage, Rogue, Vampire, Sorcerer
 from a2_skill_decision_tree import create_default_tree
 
@@ -29,7 +31,16 @@ CHARACTER_CLASSES = {'m': Mage,
 PLAYSTYLE_CLASSES = {'m': ManualPlaystyle,
                      'r': RandomPlaystyle,
                      'mr': RecursiveMinimax,
-                     'mi': IterativeMinimax
+                     'mi': IterativeMinimax,
+                     'mc': MCTSPlaystyle,
+                     'rs': RetrogradePlaystyle
+                    }
+
+# The keyword arguments the game makes each playstyle with, if any. The
+# minimax playstyles ponder during their opponent's turn in a game, but not
+# when they are made anywhere else.
+PLAYSTYLE_OPTIONS = {'mr': {'ponder_nodes': DEFAULT_PONDER_NODES},
+                     'mi': {'ponder_nodes': DEFAULT_PONDER_NODES}
                     }
 
 BATTLE_QUEUE_CLASSES = {'n': BattleQueue,
@@ -47,12 +58,13 @@ P1 = None
 P2 = None
 GAME_IS_OVER = False
 GAME_WINNER = None
+PENDING_ATTACK = None
 
 def perform_attack():
     """
     Uses the next character's playstyle to decide on and perform an attack.
     """
-    global BATTLE_QUEUE, GAME_IS_OVER, GAME_WINNER, LAST_KEY_PRESSED
+    global BATTLE_QUEUE, LAST_KEY_PRESSED
 
     # Get the next character in the battle queue, but don't remove them.
     next_character = BATTLE_QUEUE.peek()
@@ -64,6 +76,47 @@ def perform_attack():
     else:
         move_to_make = playstyle.select_attack()
 
+    apply_attack(move_to_make)
+
+def poll_attack():
+    """
+    Starts the next character's playstyle selecting an attack in the
+    background, and performs the attack once it has been selected. Returns
+    whether an attack was performed, without ever waiting for one.
+    """
+    global BATTLE_QUEUE, PENDING_ATTACK
+
+    if PENDING_ATTACK is None:
+        playstyle = BATTLE_QUEUE.peek().playstyle
+        PENDING_ATTACK = playstyle.select_attack_async()
+
+    if not PENDING_ATTACK.done():
+        return False
+
+    move_to_make = PENDING_ATTACK.result()
+    PENDING_ATTACK = None
+    apply_attack(move_to_make)
+    return True
+
+def cancel_attack():
+    """
+    Stops waiting for the attack poll_attack is selecting, if any.
+    """
+    global PENDING_ATTACK
+
+    if PENDING_ATTACK is not None:
+        PENDING_ATTACK.cancel()
+        PENDING_ATTACK = None
+
+def apply_attack(move_to_make):
+    """
+    Performs move_to_make with the next character and updates the state of
+    the game.
+    """
+    global BATTLE_QUEUE, GAME_IS_OVER, GAME_WINNER
+
+    next_character = BATTLE_QUEUE.peek()
+
     # Check if the next_character can make that action ('A' represents
     # a normal attack, 'S' represents a special attack.)
     # If a move that is not 'A' or 'S' is passed in, this should return False.
@@ -86,6 +139,22 @@ def perform_attack():
     # should return None. Otherwise, it should return the character that won.
     GAME_WINNER = BATTLE_QUEUE.get_winner()
 
+def ponder():
+    """
+    Lets the playstyles of the characters who aren't next think while the
+    next character decides on an attack.
+    """
+    global BATTLE_QUEUE, P1, P2
+
+    if BATTLE_QUEUE.is_over():
+        return
+
+    next_character = BATTLE_QUEUE.peek()
+
+    for character in [P1, P2]:
+        if character.playstyle is not next_character.playstyle:
+            character.playstyle.ponder()
+
 def set_up_game():
     """
     Sets up the battle queue and characters for the game.
@@ -115,7 +184,9 @@ def set_up_game():
         player_1_playstyle = input("Select a playstyle for the first " +
                                    "character (m for Manual, r for Random, " +
                                    "mr for Minimax (Recursive), " +
-                                   "mi for Minimax (Iterative)): ")
+                                   "mi for Minimax (Iterative), " +
+                                   "mc for Monte Carlo, " +
+                                   "rs for Retrograde Solver): ")
         player_1_playstyle = player_1_playstyle.strip()
 
     # Get the parameters for the second character
@@ -133,14 +204,18 @@ def set_up_game():
         player_2_playstyle = input("Select a playstyle for the second " +
                                    "character (m for Manual, r for Random, " +
                                    "mr for Minimax (Recursive), " +
-                                   "mi for Minimax (Iterative)): ")
+                                   "mi for Minimax (Iterative), " +
+                                   "mc for Monte Carlo, " +
+                                   "rs for Retrograde Solver): ")
         player_2_playstyle = player_2_playstyle.strip()
 
     # Store the classes in other variable names for convenience
     P1_Character = CHARACTER_CLASSES[player_1]
     P2_Character = CHARACTER_CLASSES[player_2]
-    p1_playstyle = PLAYSTYLE_CLASSES[player_1_playstyle](BATTLE_QUEUE)
-    p2_playstyle = PLAYSTYLE_CLASSES[player_2_playstyle](BATTLE_QUEUE)
+    p1_playstyle = PLAYSTYLE_CLASSES[player_1_playstyle](
+        BATTLE_QUEUE, **PLAYSTYLE_OPTIONS.get(player_1_playstyle, {}))
+    p2_playstyle = PLAYSTYLE_CLASSES[player_2_playstyle](
+        BATTLE_QUEUE, **PLAYSTYLE_OPTIONS.get(player_2_playstyle, {}))
 
     # Call the corresponding __init__ for each player's character class
     # The parameters passed in are: their name, the battle queue and an
@@ -0,0 +1,76 @@
+"""
+Unittests for the iterative deepening mode of IterativeMinimax in A2.
+"""
+import random
+import time
+import unittest
+
+from a2_game import PLAYSTYLE_CLASSES
+from a2_search import SearchBudget
+from a2_test_helpers import make_battle_queue
+IterativeMinimax = PLAYSTYLE_CLASSES['mi']
+
+
+class IterativeDeepeningUnitTests(unittest.TestCase):
+    def test_matches_exhaustive_within_budget(self):
+        """
+        Test to make sure deepening picks the exhaustive search's attack when
+        the whole game tree fits in the budget.
+        """
+        rng = random.Random(148)
+        for _ in range(40):
+            bq = make_battle_queue(rng.choice('mrv'), rng.choice('mrv'),
+                                   (rng.randint(1, 100), rng.randint(0, 60),
+                                    rng.randint(1, 100), rng.randint(0, 60)))
+            if bq.is_over():
+                continue
+
+            deepening = IterativeMinimax(bq, time_limit=60)
+            self.assertEqual(IterativeMinimax(bq).select_attack(),
+                             deepening.select_attack(),
+                             "Mismatch for {}".format(repr(bq)))
+
+    def test_node_limit(self):
+        """
+        Test to make sure a node limit stops a search that is far too big to
+        finish, and that the result is still a valid attack.
+        """
+        bq = make_battle_queue('r', 'r', (1000, 1000, 1000, 1000))
+        playstyle = IterativeMinimax(bq, node_limit=2000)
+
+        self.assertIn(playstyle.select_attack(), ['A', 'S'])
+        self.assertLess(len(playstyle.table), 2000)
+
+    def test_time_limit(self):
+        """
+        Test to make sure a time limit bounds how long select_attack takes.
+        """
+        bq = make_battle_queue('r', 'v', (1000, 1000, 1000, 1000))
+        playstyle = IterativeMinimax(bq, time_limit=0.2)
+
+        start = time.perf_counter()
+        self.assertIn(playstyle.select_attack(), ['A', 'S'])
+        self.assertLess(time.perf_counter() - start, 2)
+
+    def test_budget(self):
+        """
+        Test to make sure a SearchBudget with a node limit is used up after
+        that many positions.
+        """
+        budget = SearchBudget(node_limit=10)
+
+        self.assertFalse(any(budget.spend() for _ in range(10)))
+        self.assertTrue(budget.spend())
+
+    def test_copy_keeps_limits(self):
+        """
+        Test to make sure copies of a deepening playstyle keep its limits.
+        """
+        bq = make_battle_queue('r', 'm', (100, 100, 100, 100))
+        copy = IterativeMinimax(bq, time_limit=1, node_limit=5).copy(bq)
+
+        self.assertEqual((1, 5), (copy.time_limit, copy.node_limit))
+
+
+if __name__ == "__main__":
+    unittest.main(exit=False)
@@ -0,0 +1,88 @@
+"""
+Unittests for BattleQueue.make_move and BattleQueue.unmake_move in A2.
+"""
+import random
+import unittest
+
+from a2_game import BATTLE_QUEUE_CLASSES
+from a2_test_helpers import make_battle_queue
+
+
+def perform(bq: 'BattleQueue', action: str) -> None:
+    """
+    Make the next character in bq perform action the way
+    a2_game.perform_attack does.
+    """
+    character = bq.peek()
+    if action == 'A':
+        character.attack()
+    else:
+        character.special_attack()
+    if character.get_available_actions() != []:
+        bq.remove()
+
+
+class MakeMoveUnitTests(unittest.TestCase):
+    def test_make_move_matches_perform_attack(self):
+        """
+        Test to make sure make_move changes a BattleQueue the same way
+        performing the attack does.
+        """
+        rng = random.Random(148)
+        for _ in range(50):
+            bq_class = BATTLE_QUEUE_CLASSES[rng.choice('nr')]
+            bq = make_battle_queue(rng.choice('mrv'), rng.choice('mrv'),
+                                   bq_class=bq_class)
+            expected = bq.copy()
+
+            while not bq.is_over():
+                action = rng.choice(bq.peek().get_available_actions())
+                bq.make_move(action)
+                perform(expected, action)
+
+                self.assertEqual(expected.get_state_key(),
+                                 bq.get_state_key())
+
+    def test_unmake_move_restores_every_position(self):
+        """
+        Test to make sure unmaking a game's moves in reverse order restores
+        every position the game went through.
+        """
+        rng = random.Random(2)
+        for _ in range(50):
+            bq_class = BATTLE_QUEUE_CLASSES[rng.choice('nr')]
+            bq = make_battle_queue(rng.choice('mrv'), rng.choice('mrv'),
+                                   bq_class=bq_class)
+            positions = []
+            records = []
+
+            while not bq.is_over():
+                positions.append((bq.get_state_key(), repr(bq)))
+                action = rng.choice(bq.peek().get_available_actions())
+                records.append(bq.make_move(action))
+
+            while records:
+                bq.unmake_move(records.pop())
+                self.assertEqual(positions.pop(),
+                                 (bq.get_state_key(), repr(bq)))
+
+    def test_restricted_copy_keeps_add_flags(self):
+        """
+        Test to make sure copying a RestrictedBattleQueue keeps which
+        characters are able to add, even if the queue is empty.
+        """
+        bq = make_battle_queue('r', 'm',
+                               bq_class=BATTLE_QUEUE_CLASSES['r'])
+        bq.add(bq.peek().enemy)
+
+        self.assertEqual(['P1 Y', 'P2 Y', 'P2 N'],
+                         list(bq.copy().adability))
+
+        while not bq.is_empty():
+            bq.remove()
+
+        self.assertTrue(bq.copy().is_over())
+
+
+if __name__ == "__main__":
+    unittest.main(exit=False)
@@ -0,0 +1,102 @@
+"""
+Unittests for the MCTSPlaystyle in A2.
+"""
+import random
+import time
+import unittest
+
+from a2_game import PLAYSTYLE_CLASSES
+from a2_playstyle import MCTSPlaystyle
+from a2_skill_decision_tree import create_default_tree
+from a2_test_helpers import make_battle_queue
+IterativeMinimax = PLAYSTYLE_CLASSES['mi']
+
+
+class MCTSUnitTests(unittest.TestCase):
+    def setUp(self):
+        """
+        Seed random so the rollouts are the same in every run.
+        """
+        random.seed(148)
+
+    def test_registered(self):
+        """
+        Test to make sure the MCTSPlaystyle can be picked in a2_game.
+        """
+        self.assertIs(MCTSPlaystyle, PLAYSTYLE_CLASSES['mc'])
+
+    def test_finds_winning_special(self):
+        """
+        Test to make sure MCTS picks the only attack that wins the game.
+        """
+        # The Rogue's special deals enough damage to win, its attack doesn't,
+        # and the Mage wins if it gets to act.
+        bq = make_battle_queue('r', 'm', (5, 20, 8, 100))
+        self.assertEqual('S', IterativeMinimax(bq).select_attack())
+        self.assertEqual('S', MCTSPlaystyle(bq, 500).select_attack())
+
+    def test_only_attack(self):
+        """
+        Test to make sure MCTS picks 'A' when it is the only action.
+        """
+        bq = make_battle_queue('r', 'm', (40, 5, 40, 40))
+        self.assertEqual('A', MCTSPlaystyle(bq).select_attack())
+
+    def test_time_limit_on_large_game(self):
+        """
+        Test to make sure a time limit stops MCTS on a game far too big to
+        solve.
+        """
+        bq = make_battle_queue('v', 'm', (1000, 1000, 1000, 1000))
+        playstyle = MCTSPlaystyle(bq, iterations=10 ** 9, time_limit=0.2,
+                                  batch_size=1)
+        start = time.perf_counter()
+        self.assertIn(playstyle.select_attack(), ['A', 'S'])
+        self.assertLess(time.perf_counter() - start, 5)
+
+    def test_time_limit_with_big_batches(self):
+        """
+        Test to make sure MCTS reads the clock after every iteration, so an
+        iteration playing many long rollouts doesn't overshoot the time
+        limit by dozens of iterations.
+        """
+        bq = make_battle_queue('v', 'm', (1000, 1000, 1000, 1000))
+        playstyle = MCTSPlaystyle(bq, iterations=10 ** 9, time_limit=0.1,
+                                  batch_size=64)
+        start = time.perf_counter()
+        self.assertIn(playstyle.select_attack(), ['A', 'S'])
+        self.assertLess(time.perf_counter() - start, 0.6)
+
+    def test_no_time_for_an_iteration(self):
+        """
+        Test to make sure MCTS still picks a valid attack when the time limit
+        runs out before the first iteration, and that it needs at least one
+        iteration.
+        """
+        bq = make_battle_queue('r', 'm', (40, 40, 40, 40))
+        playstyle = MCTSPlaystyle(bq, time_limit=0)
+        self.assertEqual('A', playstyle.select_attack())
+        self.assertRaises(ValueError, MCTSPlaystyle, bq, 0)
+
+    def test_sorcerer(self):
+        """
+        Test to make sure MCTS picks a valid attack in a game with a
+        Sorcerer.
+        """
+        bq = make_battle_queue('s', 'm', (40, 40, 40, 40))
+        bq.peek().set_skill_decision_tree(create_default_tree())
+        self.assertIn(MCTSPlaystyle(bq).select_attack(), ['A', 'S'])
+
+    def test_copy(self):
+        """
+        Test to make sure a copy keeps the settings of the original.
+        """
+        bq = make_battle_queue('r', 'm', (40, 40, 40, 40))
+        playstyle = MCTSPlaystyle(bq, 10, 1.5, 3, 0.5).copy(bq)
+        self.assertEqual((10, 1.5, 3, 0.5),
+                         (playstyle.iterations, playstyle.time_limit,
+                          playstyle.batch_size, playstyle.exploration))
+
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
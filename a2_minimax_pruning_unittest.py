@@ -0,0 +1,91 @@
+"""
+Unittests for the alpha-beta pruning search mode of RecursiveMinimax in A2.
+"""
+import random
+import unittest
+
+from a2_game import PLAYSTYLE_CLASSES
+from a2_playstyle import get_state_score, get_pruned_state_score
+from a2_transposition_table import TranspositionTable
+from a2_test_helpers import make_battle_queue
+Minimax = PLAYSTYLE_CLASSES['mr']
+
+
+class MinimaxPruningUnitTests(unittest.TestCase):
+    def test_pruned_score_matches_exhaustive(self):
+        """
+        Test to make sure get_pruned_state_score gives exactly the score of
+        get_state_score, with and without a table.
+        """
+        rng = random.Random(148)
+        for _ in range(40):
+            classes = (rng.choice('mrv'), rng.choice('mrv'))
+            stats = (rng.randint(1, 100), rng.randint(0, 40),
+                     rng.randint(1, 100), rng.randint(0, 40))
+            bq = make_battle_queue(classes[0], classes[1], stats)
+            expected = get_state_score(bq)
+
+            self.assertEqual(expected, get_pruned_state_score(bq),
+                             "Mismatch for {}".format(repr(bq)))
+            self.assertEqual(expected,
+                             get_pruned_state_score(
+                                 bq, table=TranspositionTable()),
+                             "Mismatch for {}".format(repr(bq)))
+
+    def test_pruned_score_respects_window(self):
+        """
+        Test to make sure a score outside the window is a valid bound.
+        """
+        bq = make_battle_queue('r', 'm', (60, 30, 50, 35))
+        expected = get_state_score(bq)
+        low = get_pruned_state_score(bq, expected + 5, expected + 10)
+        high = get_pruned_state_score(bq, expected - 10, expected - 5)
+
+        self.assertLessEqual(expected, low)
+        self.assertLessEqual(low, expected + 5)
+        self.assertGreaterEqual(expected, high)
+        self.assertGreaterEqual(high, expected - 5)
+
+    def test_pruned_select_attack_matches_exhaustive(self):
+        """
+        Test to make sure the pruning playstyle picks the same attack,
+        including when both attacks have the same score.
+        """
+        rng = random.Random(2)
+        for _ in range(40):
+            classes = (rng.choice('mrv'), rng.choice('mrv'))
+            stats = (rng.randint(1, 100), rng.randint(0, 40),
+                     rng.randint(1, 100), rng.randint(0, 40))
+            bq = make_battle_queue(classes[0], classes[1], stats)
+            if bq.is_over():
+                continue
+
+            self.assertEqual(Minimax(bq).select_attack(),
+                             Minimax(bq, pruning=True).select_attack(),
+                             "Mismatch for {}".format(repr(bq)))
+
+    def test_pruning_visits_fewer_positions(self):
+        """
+        Test to make sure pruning stores fewer positions than the exhaustive
+        search on a full Rogue vs Mage match.
+        """
+        bq = make_battle_queue('r', 'm', (100, 60, 100, 60))
+        exhaustive = TranspositionTable()
+        pruned = TranspositionTable()
+
+        self.assertEqual(get_state_score(bq, exhaustive),
+                         get_pruned_state_score(bq, table=pruned))
+        self.assertLess(len(pruned), len(exhaustive))
+
+    def test_copy_keeps_pruning(self):
+        """
+        Test to make sure copies of a pruning playstyle also prune.
+        """
+        bq = make_battle_queue('r', 'm', (100, 100, 100, 100))
+        playstyle = Minimax(bq, pruning=True)
+
+        self.assertTrue(playstyle.copy(bq).pruning)
+
+
+if __name__ == "__main__":
+    unittest.main(exit=False)
@@ -0,0 +1,126 @@
+"""
+Win/loss/draw solving for A2.
+
+Balance reports and matchmaking checks only need to know whether the next
+player wins, loses or ties, not the HP margin get_state_score finds. An
+outcome has only three values, so a search for it can stop at a position as
+soon as one of its moves is proven to win: no other move can do better.
+The exact score search has to finish every move to find the largest margin.
+
+Outcomes are stored in their own TranspositionTable, which is smaller than
+the score tables since a proven win cuts off most of the tree.
+"""
+from a2_battle_queue import BattleQueue
+from a2_battle_state import BattleState, from_battle_queue, is_supported, \
+    step, get_available_actions, get_next_player, is_over, \
+    get_terminal_score, get_canonical, is_forced, fast_forward, \
+    get_forced_score
+from a2_playstyle import get_state_score
+from a2_transposition_table import TranspositionTable
+
+# The outcomes of a game for its next player.
+WIN = 1
+DRAW = 0
+LOSS = -1
+
+# The number of outcomes an outcome table holds by default.
+DEFAULT_OUTCOME_TABLE_SIZE = 50000
+
+
+def _get_outcome(score: int) -> int:
+    """
+    Return the outcome of a game whose score for its next player is score.
+
+    >>> _get_outcome(-40)
+    -1
+    """
+    return (score > 0) - (score < 0)
+
+
+def solve_outcome(battle_queue: BattleQueue,
+                  table: TranspositionTable = None) -> int:
+    """
+    Return WIN, DRAW or LOSS: the best result the next player in
+    battle_queue can guarantee.
+
+    If table is given, the outcome of every position solved along the way is
+    stored in it, and positions already in it are not searched again. It
+    must only hold outcomes. Games that can't be turned into a BattleState
+    are scored exactly by get_state_score instead.
+
+    >>> from a2_characters import Rogue, Mage
+    >>> from a2_playstyle import ManualPlaystyle
+    >>> bq = BattleQueue()
+    >>> r = Rogue("r", bq, ManualPlaystyle(bq))
+    >>> m = Mage("m", bq, ManualPlaystyle(bq))
+    >>> r.enemy = m
+    >>> m.enemy = r
+    >>> bq.add(r)
+    >>> bq.add(m)
+    >>> m.set_hp(3)
+    >>> r.set_hp(40)
+    >>> solve_outcome(bq) == WIN
+    True
+    >>> bq.remove()
+    r (Rogue): 40/100
+    >>> bq.add(r)
+    >>> solve_outcome(bq) == LOSS
+    True
+    """
+    if not is_supported(battle_queue):
+        return _get_outcome(get_state_score(battle_queue))
+
+    if table is None:
+        table = TranspositionTable(DEFAULT_OUTCOME_TABLE_SIZE)
+
+    return get_battle_state_outcome(from_battle_queue(battle_queue), table)
+
+
+def get_battle_state_outcome(state: BattleState,
+                             table: TranspositionTable = None) -> int:
+    """
+    Return solve_outcome of the game in state, searching with step() so no
+    game objects are created. Positions are stored in table by their
+    canonical position.
+
+    Special attacks are tried first, since they are the moves most likely to
+    win quickly. Forced moves are skipped by fast_forward, and positions
+    where neither player has a choice left are scored by get_forced_score.
+    """
+    key = get_canonical(state)
+
+    if table is not None:
+        outcome = table.lookup(key)
+        if outcome is not None:
+            return outcome
+
+    if is_over(state):
+        outcome = _get_outcome(get_terminal_score(state))
+
+    elif is_forced(state):
+        outcome = _get_outcome(get_forced_score(state))
+
+    else:
+        player = get_next_player(state)
+        outcome = LOSS
+
+        for action in get_available_actions(state)[::-1]:
+            child = fast_forward(step(state, action))
+            if get_next_player(child) != player:
+                outcome = max(outcome,
+                              get_battle_state_outcome(child, table) * -1)
+            else:
+                outcome = max(outcome, get_battle_state_outcome(child, table))
+
+            if outcome == WIN:
+                break
+
+    if table is not None:
+        table.store(key, outcome)
+
+    return outcome
+
+
+if __name__ == '__main__':
+    import python_ta
+    python_ta.check_all(config='a2_pyta.txt')
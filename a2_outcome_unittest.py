@@ -0,0 +1,121 @@
+"""
+Unittests for win/loss/draw solving in A2.
+"""
+import random
+import unittest
+
+from a2_battle_queue import BattleQueue
+from a2_battle_state import BattleState, step, get_available_actions, \
+    is_over, mirror
+from a2_characters import Rogue, Vampire
+from a2_game import CHARACTER_CLASSES
+from a2_outcome import solve_outcome, get_battle_state_outcome, WIN, DRAW, \
+    LOSS
+from a2_playstyle import ManualPlaystyle, get_state_score
+from a2_search import get_battle_state_score
+from a2_retrograde import get_reachable_states
+from a2_skill_decision_tree import create_default_tree
+from a2_transposition_table import TranspositionTable
+
+
+def get_sign(score: int) -> int:
+    """
+    Return the outcome a game with score score has for its next player.
+    """
+    if score > 0:
+        return WIN
+    elif score < 0:
+        return LOSS
+    return DRAW
+
+
+class OutcomeUnitTests(unittest.TestCase):
+    def test_outcome_matches_score(self):
+        """
+        Test to make sure the outcome of a game is the sign of its exact
+        score.
+        """
+        rng = random.Random(25)
+        for _ in range(40):
+            state = BattleState((rng.choice('mrv'), rng.choice('mrv')),
+                                (rng.randint(1, 60), rng.randint(1, 60)),
+                                (rng.randint(20, 50), rng.randint(20, 50)),
+                                (0, 1), None)
+            for _ in range(rng.randint(0, 3)):
+                if not is_over(state):
+                    state = step(state,
+                                 rng.choice(get_available_actions(state)))
+
+            self.assertEqual(get_sign(get_battle_state_score(state)),
+                             get_battle_state_outcome(state))
+
+    def test_mirror_through_one_table(self):
+        """
+        Test to make sure every position of a same-class game and its mirror
+        get the outcome of their exact score from one table, including
+        finished games whose queue ran out.
+        """
+        for class_id in 'mrv':
+            state = BattleState((class_id, class_id), (13, 28), (23, 10),
+                                (0, 1), None)
+            table = TranspositionTable()
+            for position in get_reachable_states(state):
+                for searched in [position, mirror(position)]:
+                    self.assertEqual(
+                        get_sign(get_battle_state_score(searched)),
+                        get_battle_state_outcome(searched, table),
+                        "Mismatch for {}".format(searched))
+
+    def test_draw(self):
+        """
+        Test to make sure a game where nobody can knock the other out is a
+        draw.
+        """
+        state = BattleState(('m', 'm'), (100, 100), (5, 5), (0, 1), None)
+
+        self.assertEqual(DRAW, get_battle_state_outcome(state))
+
+    def test_cheaper_than_score(self):
+        """
+        Test to make sure proving the outcome stores fewer positions than
+        finding the exact score.
+        """
+        state = BattleState(('r', 'v'), (100, 100), (100, 100), (0, 1), None)
+        scores = TranspositionTable()
+        outcomes = TranspositionTable()
+
+        self.assertEqual(get_sign(get_battle_state_score(state, scores)),
+                         get_battle_state_outcome(state, outcomes))
+        self.assertLess(len(outcomes), len(scores))
+
+    def test_battle_queue(self):
+        """
+        Test to make sure solve_outcome scores a BattleQueue, and one with a
+        Sorcerer, for its next player.
+        """
+        bq = BattleQueue()
+        r = Rogue("r", bq, ManualPlaystyle(bq))
+        v = Vampire("v", bq, ManualPlaystyle(bq))
+        r.enemy = v
+        v.enemy = r
+        bq.add(r)
+        bq.add(v)
+        r.set_sp(20)
+        v.set_sp(20)
+
+        state = BattleState(('r', 'v'), (100, 100), (20, 20), (0, 1), None)
+        self.assertEqual(get_battle_state_outcome(state), solve_outcome(bq))
+
+        bq = BattleQueue()
+        s = CHARACTER_CLASSES['s']("s", bq, ManualPlaystyle(bq))
+        s.set_skill_decision_tree(create_default_tree())
+        s.enemy = r
+        r.enemy = s
+        bq.add(s)
+        bq.add(r)
+        s.set_sp(40)
+        self.assertEqual(get_sign(get_state_score(bq)), solve_outcome(bq))
+
+
+if __name__ == "__main__":
+    unittest.main(exit=False)
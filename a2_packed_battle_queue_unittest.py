@@ -0,0 +1,93 @@
+"""
+Unittests for the PackedBattleQueue of A2.
+"""
+import random
+import unittest
+
+from a2_playstyle import get_state_score
+from a2_battle_queue import PackedBattleQueue, pack
+from a2_test_helpers import make_battle_queue
+
+
+class PackedBattleQueueUnitTests(unittest.TestCase):
+    def test_matches_battle_queue(self):
+        """
+        Test to make sure a PackedBattleQueue plays every game exactly like a
+        BattleQueue, including games with a Sorcerer.
+        """
+        rng = random.Random(148)
+        for _ in range(100):
+            classes = (rng.choice('mrvs'), rng.choice('mrvs'))
+            bq = make_battle_queue(classes[0], classes[1])
+            packed = pack(bq)
+
+            while not bq.is_over():
+                self.assertEqual(repr(bq), repr(packed))
+                self.assertEqual(bq.get_state_key()[1:],
+                                 packed.get_state_key()[1:])
+
+                action = rng.choice(bq.peek().get_available_actions())
+                bq.make_move(action)
+                packed.make_move(action)
+
+            self.assertTrue(packed.is_over())
+            self.assertEqual(repr(bq.get_winner()),
+                             repr(packed.get_winner()))
+
+    def test_unmake_move_restores_every_position(self):
+        """
+        Test to make sure unmaking a game's moves in reverse order restores
+        every position of a PackedBattleQueue.
+        """
+        rng = random.Random(2)
+        for _ in range(50):
+            bq = make_battle_queue(rng.choice('mrv'), rng.choice('mrv'),
+                                   bq_class=PackedBattleQueue)
+            positions = []
+            records = []
+
+            while not bq.is_over():
+                positions.append((bq.get_order_key(), repr(bq)))
+                action = rng.choice(bq.peek().get_available_actions())
+                records.append(bq.make_move(action))
+
+            while records:
+                bq.unmake_move(records.pop())
+                self.assertEqual(positions.pop(),
+                                 (bq.get_order_key(), repr(bq)))
+
+    def test_copy_is_independent(self):
+        """
+        Test to make sure changing a copy of a PackedBattleQueue doesn't
+        change the original, even once the original is empty.
+        """
+        bq = make_battle_queue('r', 'm', bq_class=PackedBattleQueue)
+        copy = bq.copy()
+        copy.peek().special_attack()
+
+        self.assertEqual("P1 (Rogue): 100/100 -> P2 (Mage): 100/100",
+                         repr(bq))
+        self.assertEqual((2, 2), bq.get_order_key())
+
+        while not bq.is_empty():
+            bq.remove()
+
+        self.assertTrue(bq.copy().is_over())
+        self.assertEqual('P1', bq.copy().peek().get_name())
+
+    def test_search_agrees(self):
+        """
+        Test to make sure searching a PackedBattleQueue gives the same score
+        as searching a BattleQueue.
+        """
+        bq = make_battle_queue('s', 'r')
+        bq.peek().set_hp(60)
+        bq.peek().set_sp(60)
+        bq.peek().enemy.set_hp(50)
+        bq.peek().enemy.set_sp(40)
+
+        self.assertEqual(get_state_score(bq), get_state_score(pack(bq)))
+
+
+if __name__ == "__main__":
+    unittest.main(exit=False)
@@ -0,0 +1,274 @@
+"""
+Parallel search for A2.
+
+The game tree below a position is cut a few moves down into a frontier of
+positions, which become the tasks of a pool of worker processes. Tasks wait
+in one shared queue, biggest first, and every worker takes the next one as
+soon as it is free. A worker that takes a big task while the queue is empty
+splits it into the positions one move further down instead of solving it,
+so that idle workers can steal part of its subtree. The parent adds the
+scores back up through the moves above them, the same way
+get_battle_state_score would.
+
+Positions are sent to the workers as BattleStates, which are small tuples of
+ints and strings and pickle cheaply. The solver is sent by reference, so it
+must be a function defined at the top level of a module, like
+a2_search.get_battle_state_score. Every worker keeps its own
+TranspositionTable, backed by a SharedTable that all of the workers read and
+write, so the tasks every worker solves share their work.
+"""
+from multiprocessing import Process, Queue
+from typing import Callable, Dict, Iterable, List
+
+from a2_battle_state import BattleState, MIN_COSTS, step, \
+    get_available_actions, get_next_player, is_over, get_terminal_score, \
+    get_canonical
+from a2_transposition_table import TranspositionTable, DEFAULT_TABLE_SIZE
+from a2_score_cache import TieredTable
+from a2_shared_table import SharedTable
+
+Solver = Callable[..., int]
+
+# Games that can last fewer moves than this are searched serially: starting
+# the worker processes costs more than searching them. For the same reason,
+# workers don't split tasks smaller than this.
+MIN_PARALLEL_MOVES = 16
+
+
+def estimate_moves(state: BattleState) -> int:
+    """
+    Return the most moves the game in state can still last. Every skill
+    costs SP, so a player can't act more often than their SP pays for their
+    cheapest skill.
+
+    >>> estimate_moves(BattleState(('r', 'm'), (40, 70), (25, 100), (0, 1),
+    ...                            None))
+    28
+    """
+    return sum(state.sp[player] // MIN_COSTS[state.classes[player]]
+               for player in (0, 1))
+
+
+def get_split_depth(workers: int) -> int:
+    """
+    Return how many moves below the root the tree is cut so that workers
+    processes get a few frontier positions each.
+
+    >>> get_split_depth(1)
+    3
+    >>> get_split_depth(32)
+    8
+    """
+    return workers.bit_length() + 2
+
+
+def get_frontier(state: BattleState, depth: int) -> List[BattleState]:
+    """
+    Return the canonical position of every distinct position depth moves
+    below state whose game isn't over, in the order they are first reached.
+    Lines of play that end before depth moves don't reach the frontier.
+
+    >>> state = BattleState(('r', 'm'), (100, 100), (100, 100), (0, 1), None)
+    >>> len(get_frontier(state, 2))
+    4
+    """
+    frontier = {state: None}
+
+    for _ in range(depth):
+        below = {}
+        for position in frontier:
+            if is_over(position):
+                continue
+            for action in get_available_actions(position):
+                child = step(position, action)
+                if not is_over(child):
+                    below[get_canonical(child)] = None
+        frontier = below
+
+    return list(frontier)
+
+
+def _work(solver: Solver, tasks: Queue, results: Queue,
+          shared: SharedTable = None) -> None:
+    """
+    Take positions from tasks until a None is taken, and put a
+    (position, score, children) tuple in results for every one of them.
+
+    A position is either solved with solver, giving its score and None for
+    children, or split, giving None for its score and the list of its
+    children whose game isn't over. If solver raises an error, the error is
+    put in results as the score.
+
+    Positions missing from the worker's own TranspositionTable are looked up
+    in shared, if given, and every exact score found is stored in it.
+    """
+    if shared is None:
+        table = TranspositionTable(DEFAULT_TABLE_SIZE)
+    else:
+        table = TieredTable(shared, DEFAULT_TABLE_SIZE)
+    position = tasks.get()
+
+    while position is not None:
+        children = None
+        if tasks.empty() and estimate_moves(position) >= MIN_PARALLEL_MOVES:
+            children = get_frontier(position, 1) or None
+
+        if children is None:
+            try:
+                results.put((position, solver(position, table=table), None))
+            except Exception as error:  # pylint: disable=broad-except
+                results.put((position, error, None))
+        else:
+            results.put((position, None, children))
+
+        position = tasks.get()
+
+
+def _put_tasks(tasks: Queue, positions: Iterable[BattleState]) -> None:
+    """
+    Put positions in tasks, the ones that can last the longest first.
+    """
+    for position in sorted(positions, key=estimate_moves, reverse=True):
+        tasks.put(position)
+
+
+def solve_positions(positions: List[BattleState], solver: Solver,
+                    workers: int, shared: SharedTable = None) -> \
+        Dict[BattleState, int]:
+    """
+    Return the score solver gives every position in positions, or a
+    position below it, found by workers processes sharing one task queue
+    and, if given, the SharedTable shared.
+
+    Positions split by a worker don't get a score themselves. Their children
+    whose game isn't over do, or are split in turn. If solver raises an error
+    in a worker, the workers are stopped and the error is raised here.
+    """
+    tasks = Queue()
+    results = Queue()
+    processes = [Process(target=_work,
+                         args=(solver, tasks, results, shared), daemon=True)
+                 for _ in range(workers)]
+    for process in processes:
+        process.start()
+
+    scores = {}
+    pending = len(positions)
+    _put_tasks(tasks, positions)
+
+    try:
+        while pending > 0:
+            position, score, children = results.get()
+            if isinstance(score, Exception):
+                raise score
+            if children is None:
+                scores[position] = score
+                pending -= 1
+            else:
+                _put_tasks(tasks, children)
+                pending += len(children) - 1
+
+    except BaseException:
+        # The workers would go on solving every queued task, and could block
+        # putting their results on a queue nobody reads, so they are stopped
+        # instead of being waited for.
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.join()
+        tasks.cancel_join_thread()
+        raise
+
+    for _ in processes:
+        tasks.put(None)
+    for process in processes:
+        process.join()
+
+    return scores
+
+
+def _combine(state: BattleState, scores: Dict[BattleState, int]) -> int:
+    """
+    Return the score of state for its next player, where every line of play
+    from state reaches a position in scores or a position whose game is over.
+    """
+    if is_over(state):
+        return get_terminal_score(state)
+    if get_canonical(state) in scores:
+        return scores[get_canonical(state)]
+
+    player = get_next_player(state)
+    best = None
+
+    for action in get_available_actions(state):
+        child = step(state, action)
+        score = _combine(child, scores)
+        if get_next_player(child) != player:
+            score *= -1
+        if best is None or score > best:
+            best = score
+
+    return best
+
+
+def get_parallel_action_scores(state: BattleState, solver: Solver,
+                               workers: int, split_depth: int = None,
+                               table: TranspositionTable = None,
+                               shared: SharedTable = None) -> Dict[str, int]:
+    """
+    Return the score of every action available in state for the next player,
+    solving the positions split_depth moves below state with solver in
+    workers processes with solve_positions. split_depth must be at least 1,
+    and defaults to get_split_depth(workers).
+
+    solver(position, table=table) must return the exact score of position.
+    Frontier positions already in table aren't sent to the workers, and the
+    scores the workers find are stored in table.
+
+    The workers share the scores they solve through shared. If it isn't
+    given, a SharedTable is made for this search and freed at its end.
+    """
+    if split_depth is None:
+        split_depth = get_split_depth(workers)
+
+    frontier = get_frontier(state, split_depth)
+    scores = {}
+    unsolved = []
+
+    for position in frontier:
+        score = None if table is None else table.lookup(position)
+        if isinstance(score, int):
+            scores[position] = score
+        else:
+            unsolved.append(position)
+
+    if unsolved:
+        if shared is None:
+            own = SharedTable()
+            try:
+                solved = solve_positions(unsolved, solver, workers, own)
+            finally:
+                own.close()
+        else:
+            shared.new_search()
+            solved = solve_positions(unsolved, solver, workers, shared)
+        scores.update(solved)
+        if table is not None:
+            for position, score in solved.items():
+                table.store(position, score)
+
+    player = get_next_player(state)
+    action_scores = {}
+
+    for action in get_available_actions(state):
+        child = step(state, action)
+        action_scores[action] = _combine(child, scores)
+        if get_next_player(child) != player:
+            action_scores[action] *= -1
+
+    return action_scores
+
+
+if __name__ == '__main__':
+    import python_ta
+    python_ta.check_all(config='a2_pyta.txt')
@@ -0,0 +1,117 @@
+"""
+Unittests for the parallel modes of RecursiveMinimax and IterativeMinimax in
+A2.
+"""
+import multiprocessing
+import random
+import time
+import unittest
+
+from a2_game import PLAYSTYLE_CLASSES
+from a2_search import get_battle_state_score, get_iterative_score
+from a2_battle_state import BattleState, step, get_next_player
+from a2_parallel import get_parallel_action_scores, solve_positions
+from a2_test_helpers import make_battle_queue
+RecursiveMinimax = PLAYSTYLE_CLASSES['mr']
+IterativeMinimax = PLAYSTYLE_CLASSES['mi']
+
+
+def slow_or_failing_solver(state: BattleState, table=None) -> int:
+    """
+    Raise a ValueError for a position where the first character has 1 HP,
+    and take a while to score any other position.
+    """
+    if state.hp[0] == 1:
+        raise ValueError("Failed on {}".format(state))
+    time.sleep(0.5)
+    return get_battle_state_score(state, table)
+
+
+class ParallelUnitTests(unittest.TestCase):
+    def test_action_scores_match_serial(self):
+        """
+        Test to make sure the parallel score of each action is the serial
+        one, for every split depth.
+        """
+        state = BattleState(('r', 'v'), (60, 80), (60, 50), (0, 1), None)
+        player = get_next_player(state)
+        expected = {}
+        for action in ['A', 'S']:
+            child = step(state, action)
+            expected[action] = get_battle_state_score(child)
+            if get_next_player(child) != player:
+                expected[action] *= -1
+
+        for depth in range(1, 6):
+            self.assertEqual(expected,
+                             get_parallel_action_scores(
+                                 state, get_battle_state_score, 2, depth))
+
+    def test_matches_serial_attack(self):
+        """
+        Test to make sure the parallel mode picks the serial attack, with and
+        without pruning.
+        """
+        rng = random.Random(148)
+        for _ in range(4):
+            bq = make_battle_queue(rng.choice('mrv'), rng.choice('mrv'),
+                                   (rng.randint(20, 60), rng.randint(40, 60),
+                                    rng.randint(20, 60), rng.randint(40, 60)))
+            expected = RecursiveMinimax(bq).select_attack()
+            for pruning in [False, True]:
+                playstyle = RecursiveMinimax(bq, pruning=pruning, workers=2)
+                self.assertEqual(expected, playstyle.select_attack(),
+                                 "Mismatch for {}".format(repr(bq)))
+
+    def test_iterative_matches_serial_attack(self):
+        """
+        Test to make sure the parallel mode of IterativeMinimax picks the
+        serial attack, for a few split depths.
+        """
+        bq = make_battle_queue('v', 'r', (50, 60, 45, 50))
+        expected = IterativeMinimax(bq).select_attack()
+        for split_depth in [1, 3, None]:
+            playstyle = IterativeMinimax(bq, workers=3,
+                                         split_depth=split_depth)
+            self.assertEqual(expected, playstyle.select_attack())
+
+    def test_solve_positions_splits_for_idle_workers(self):
+        """
+        Test to make sure a single big task is split for the idle workers,
+        and that every position it is split into is solved exactly.
+        """
+        state = BattleState(('r', 'm'), (60, 60), (60, 60), (0, 1), None)
+        scores = solve_positions([state], get_iterative_score, 4)
+        self.assertNotIn(state, scores)
+        self.assertTrue(scores)
+        for position, score in scores.items():
+            self.assertEqual(get_battle_state_score(position), score)
+
+    def test_solve_positions_stops_on_error(self):
+        """
+        Test to make sure an error in a worker is raised without solving the
+        rest of the positions, and that no worker is left running.
+        """
+        positions = [BattleState(('r', 'm'), (hp, 10), (0, 0), (0, 1), None)
+                     for hp in range(1, 21)]
+        start = time.perf_counter()
+        with self.assertRaises(ValueError):
+            solve_positions(positions, slow_or_failing_solver, 2)
+
+        self.assertLess(time.perf_counter() - start, 2)
+        self.assertEqual([], multiprocessing.active_children())
+
+    def test_copy_keeps_workers(self):
+        """
+        Test to make sure a copy searches with the same number of workers
+        and split depth.
+        """
+        bq = make_battle_queue('r', 'm', (40, 40, 40, 40))
+        playstyle = RecursiveMinimax(bq, workers=3, split_depth=2).copy(bq)
+        self.assertEqual((3, 2), (playstyle.workers, playstyle.split_depth))
+        playstyle = IterativeMinimax(bq, workers=3, split_depth=2).copy(bq)
+        self.assertEqual((3, 2), (playstyle.workers, playstyle.split_depth))
+
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
@@ -5,9 +5,27 @@ Docstring examples are not required for Playstyles.
 You are responsible for implementing the get_state_score function, as well as
 creating classes for both Iterative Minimax and Recursive Minimax.
 """
-from typing import Any
+from concurrent.futures import Future
+from typing import Any, Dict, Union
+import math
 import random
-from stack_for_a2 import Stack
+import threading
+from a2_battle_queue import pack
+from a2_transposition_table import TranspositionTable, DEFAULT_TABLE_SIZE
+from a2_battle_state import BattleState, from_battle_queue, is_supported, \
+    step, get_next_player, is_over, get_canonical
+from a2_evaluation import Evaluator, evaluate
+from a2_search import get_queue_score, select_queue_attack, \
+    get_battle_state_score, get_depth_limited_score, \
+    get_pruned_battle_state_score, get_child_score, TREE_DEPTH, \
+    get_tree_score, reroot_tree, search_battle_state, get_iterative_score, \
+    SearchBudget, Ponderer, State, MCTSNode, rollout, get_rollout_reward
+from a2_parallel import MIN_PARALLEL_MOVES, estimate_moves, \
+    get_parallel_action_scores
+from a2_retrograde import solve, get_best_action
+from a2_tablebase import Tablebase
+from a2_score_cache import ScoreCache, TieredTable
+from a2_shared_table import SharedTable
 
 
 class Playstyle:
@@ -37,6 +55,49 @@ class Playstyle:
         """
         raise NotImplementedError
 
+    def select_attack_async(self, parameter: Any = None) -> Future:
+        """
+        Return a Future that will hold select_attack(parameter), found in a
+        background thread so the caller can keep running.
+
+        battle_queue must not change until the Future is done. The Future
+        can be cancelled until it is done: cancelling it before its thread
+        starts stops select_attack from being called, and a search that has
+        already started runs to the end but its attack is dropped. The thread
+        never keeps the program from exiting.
+        """
+        future = Future()
+
+        def run() -> None:
+            """
+            Store select_attack(parameter) in future, unless it was cancelled.
+            """
+            if future.cancelled():
+                return
+            # The Future stays pending during the search, so that it can still
+            # be cancelled.
+            try:
+                attack = self.select_attack(parameter)
+            except Exception as error:
+                if future.set_running_or_notify_cancel():
+                    future.set_exception(error)
+            else:
+                if future.set_running_or_notify_cancel():
+                    future.set_result(attack)
+
+        # A daemon thread instead of a ThreadPoolExecutor, whose threads are
+        # joined when the interpreter exits, so closing the game never waits
+        # for a deep search.
+        threading.Thread(target=run, daemon=True).start()
+        return future
+
+    def ponder(self) -> None:
+        """
+        Think about the game in battle_queue while another character decides
+        on their attack. Playstyles that can't use that time do nothing.
+        """
+        return None
+
     def copy(self, new_battle_queue: 'BattleQueue') -> 'Playstyle':
         """
         Return a copy of this Playstyle which uses the BattleQueue
@@ -106,7 +167,17 @@ class RandomPlaystyle(Playstyle):
         return RandomPlaystyle(new_battle_queue)
 
 
-def get_state_score(battle_queue: 'BattleQueue') -> int:
+# The defaults of MCTSPlaystyle: the number of iterations it runs, how many
+# rollouts each iteration plays, and the exploration constant of UCT.
+DEFAULT_ITERATIONS = 2000
+DEFAULT_BATCH_SIZE = 8
+DEFAULT_EXPLORATION = math.sqrt(2)
+
+
+def get_state_score(battle_queue: 'BattleQueue',
+                    table: TranspositionTable = None,
+                    max_depth: int = None,
+                    evaluator: Evaluator = evaluate) -> int:
     """
     Return an int corresponding to the highest score that the next player in
     battle_queue can guarantee.
@@ -117,6 +188,16 @@ def get_state_score(battle_queue: 'BattleQueue') -> int:
     HP of the character who still has HP. If there is no winner (i.e. there's
     a tie) then the score is 0.
 
+    If table is given, the score of every position solved along the way is
+    stored in it, and positions already in it are not searched again. Exact
+    scores are stored as ints; get_pruned_state_score may also store
+    (lower, upper) bounds, which get_state_score ignores.
+
+    If max_depth is given, the search looks at most max_depth moves ahead
+    and positions where it stops before the game is over are scored by
+    evaluator. Games that can't be turned into a BattleState are always
+    searched to the end.
+
     >>> from a2_battle_queue import BattleQueue
     >>> from a2_characters import Rogue, Mage
     >>> bq = BattleQueue()
@@ -138,224 +219,718 @@ def get_state_score(battle_queue: 'BattleQueue') -> int:
     >>> get_state_score(bq)
     -10
     """
-    bq = battle_queue.copy()
-    if bq.is_over():
-        if bq.get_winner() == bq.peek():
-            return bq.peek().get_hp()
-        elif bq.get_winner() == bq.peek().enemy:
-            return bq.peek().enemy.get_hp() * -1
-
-        return 0
+    if is_supported(battle_queue) and max_depth is not None:
+        return get_depth_limited_score(from_battle_queue(battle_queue),
+                                       max_depth, evaluator, table)[0]
+    elif is_supported(battle_queue):
+        return get_battle_state_score(from_battle_queue(battle_queue), table)
 
-    else:
-        bq_a = bq.copy()
-        bq_s = bq.copy()
-        bq_a_current = bq_a.peek()
-        bq_s_current = bq_s.peek()
+    return get_queue_score(pack(battle_queue), table)
 
-        a_score = []
-        s_score = []
 
-            # There's a player at this state (our current player)
-            # next_p!
-        if bq_a_current.is_valid_action('A'):
-            bq_a_current.attack()
-            if bq_a_current.get_available_actions() != []:
-                bq_a.remove()
+def get_pruned_state_score(battle_queue: 'BattleQueue',
+                           alpha: float = -math.inf, beta: float = math.inf,
+                           table: TranspositionTable = None) -> int:
+    """
+    Return the score get_state_score would give battle_queue, searching
+    with alpha-beta pruning inside the window (alpha, beta).
 
-            if bq_a_current != bq_a.peek():
-                a_score.append(get_state_score(bq_a) * -1)
-            elif bq_a_current == bq_a.peek():
-                a_score.append(get_state_score(bq_a))
+    A score strictly between alpha and beta is exact. A score <= alpha
+    only means the true score is at most that, and a score >= beta only means
+    the true score is at least that. With the default window the score is
+    always exact.
 
-        if bq_s_current.is_valid_action('S'):
-            bq_s_current.special_attack()
-            if bq_s_current.get_available_actions() != []:
-                bq_s.remove()
+    If table is given, exact scores are stored in it as ints and inexact ones
+    as (lower, upper) bounds. Games that can't be turned into a BattleState
+    are scored exactly by get_state_score instead.
 
-            if bq_s_current != bq_s.peek():
-                s_score.append(get_state_score(bq_s) * -1)
-            elif bq_s_current == bq_s.peek():
-                s_score.append(get_state_score(bq_s))
+    >>> from a2_battle_queue import BattleQueue
+    >>> from a2_characters import Rogue, Mage
+    >>> bq = BattleQueue()
+    >>> r = Rogue("r", bq, ManualPlaystyle(bq))
+    >>> m = Mage("m", bq, ManualPlaystyle(bq))
+    >>> r.enemy = m
+    >>> m.enemy = r
+    >>> bq.add(r)
+    >>> bq.add(m)
+    >>> m.set_hp(3)
+    >>> r.set_hp(40)
+    >>> get_pruned_state_score(bq)
+    40
+    >>> bq.remove()
+    r (Rogue): 40/100
+    >>> bq.add(r)
+    >>> get_pruned_state_score(bq)
+    -10
+    """
+    if not is_supported(battle_queue):
+        return get_state_score(battle_queue, table)
 
-        return max(a_score + s_score)
+    return get_pruned_battle_state_score(from_battle_queue(battle_queue),
+                                         alpha, beta, table)
 
 
 class RecursiveMinimax(Playstyle):
-    """ RecursiveMinimax"""
+    """
+    The RecursiveMinimax playstyle. Inherits from Playstyle.
+
+    Games that can't be turned into a BattleState (those with a Sorcerer)
+    are searched exhaustively on a copy of the BattleQueue.
+
+    table - the TranspositionTable holding the scores of every position this
+            playstyle (and its copies) has solved.
+    pruning - whether to search with alpha-beta pruning instead of
+              expanding every branch.
+    max_depth - the number of moves select_attack looks ahead, or None to
+                search to the end of the game.
+    evaluator - the Evaluator scoring positions max_depth moves ahead.
+    workers - the number of processes select_attack searches with.
+    split_depth - the number of moves below the root where the game tree is
+                  cut into tasks for the workers, or None to pick it from
+                  workers.
+    tree - the exact score of every position fewer than TREE_DEPTH moves
+           below a position select_attack searched, that the game can still
+           reach.
+    root - the position select_attack last searched, or None.
+    ponderer - the Ponderer searching ahead during the opponent's turn, or
+               None if this playstyle doesn't ponder.
+    shared - the SharedTable the workers of every parallel search share,
+             made by the first one, or None before it.
+    """
+    table: TranspositionTable
+    pruning: bool
+    max_depth: Union[int, None]
+    evaluator: Evaluator
+    workers: int
+    split_depth: Union[int, None]
+    tree: Dict[BattleState, int]
+    root: Union[BattleState, None]
+    ponderer: Union['Ponderer', None]
+    shared: Union[SharedTable, None]
+
+    def __init__(self, battle_queue: 'BattleQueue',
+                 table_size: int = DEFAULT_TABLE_SIZE,
+                 pruning: bool = False, max_depth: int = None,
+                 evaluator: Evaluator = evaluate, workers: int = 1,
+                 split_depth: int = None,
+                 ponder_nodes: int = None,
+                 cache: ScoreCache = None) -> None:
+        """
+        Initialize this RecursiveMinimax with BattleQueue as its battle queue
+        and a TranspositionTable holding at most table_size positions.
 
-    def __init__(self, battle_queue) -> None:
-        """ Initializes"""
-        self.battle_queue = battle_queue
-        self.is_manual = False
+        If pruning is True, select_attack uses alpha-beta pruning. It picks
+        the same attack as the exhaustive search while visiting fewer
+        positions.
 
-    def select_attack(self, parameter: Any = None):
-        """ Selects Attacks"""
+        If max_depth is given, select_attack looks at most max_depth moves
+        ahead, scoring the positions where it stops with evaluator, instead
+        of pruning.
 
-        bq_a = self.battle_queue.copy()
-        bq_s = self.battle_queue.copy()
-        bq_a_player = bq_a.peek()
-        bq_s_player = bq_s.peek()
+        If workers is more than 1, select_attack solves the positions
+        split_depth moves ahead in that many processes with a2_parallel.
+        Games too short to be worth it, and depth-limited searches, are
+        searched serially.
 
-        if bq_a_player.get_available_actions() == ['A']:
-            return 'A'
+        ponder searches at most ponder_nodes positions per opponent turn, in a
+        background thread. If ponder_nodes is None, the default, ponder does
+        nothing. a2_game turns pondering on with DEFAULT_PONDER_NODES.
 
+        If cache is given, the table is a TieredTable backed by it, so scores
+        solved by earlier runs or other processes are reused.
+        """
+        super().__init__(battle_queue)
+        self.is_manual = False
+        if cache is None:
+            self.table = TranspositionTable(table_size)
         else:
+            self.table = TieredTable(cache, table_size)
+        self.pruning = pruning
+        self.max_depth = max_depth
+        self.evaluator = evaluator
+        self.workers = workers
+        self.split_depth = split_depth
+        self.tree = {}
+        self.root = None
+        if ponder_nodes is None:
+            self.ponderer = None
+        else:
+            self.ponderer = Ponderer(self.table, ponder_nodes)
+        self.shared = None
 
-            bq_a.peek().attack()
-            if bq_a_player.get_available_actions() != []:
-                bq_a.remove()
+    def select_attack(self, parameter: Any = None) -> str:
+        """
+        Return the attack for the next character in this Playstyle's
+        battle_queue to perform.
+        """
+        self._stop_pondering()
 
-            bq_s.peek().special_attack()
-            if bq_s_player.get_available_actions() != []:
-                bq_s.remove()
+        if self.battle_queue.peek().get_available_actions() == ['A']:
+            return 'A'
 
+        if not is_supported(self.battle_queue):
+            return select_queue_attack(self.battle_queue, self.table)
 
-            if bq_a_player == bq_a.peek():
-                a_score = get_state_score(bq_a)
-            else:
-                a_score = get_state_score(bq_a) * -1
+        state = from_battle_queue(self.battle_queue)
+        self._reroot(state)
 
-            if bq_s_player == bq_s.peek():
-                s_score = get_state_score(bq_s)
-            else:
-                s_score = get_state_score(bq_s) * -1
+        if self.workers > 1 and self.max_depth is None and \
+                estimate_moves(state) >= MIN_PARALLEL_MOVES:
+            return self._select_parallel_attack(state)
 
-            max_score = max(a_score, s_score)
+        if self.pruning and self.max_depth is None:
+            return self._select_pruned_attack(state)
 
-            if max_score == a_score:
-                return 'A'
-            elif max_score == s_score:
-                return 'S'
+        player = get_next_player(state)
+        scores = {}
+
+        for action in ['A', 'S']:
+            child = step(state, action)
+            if self.max_depth is None:
+                scores[action] = get_tree_score(child, self.tree,
+                                                TREE_DEPTH - 1, self.table)
+            else:
+                scores[action] = get_depth_limited_score(
+                    child, self.max_depth - 1, self.evaluator, self.table)[0]
+            if player != get_next_player(child):
+                scores[action] *= -1
 
+        if scores['A'] >= scores['S']:
+            return 'A'
+
+        return 'S'
 
     def copy(self, new_battle_queue: 'BattleQueue') -> 'Playstyle':
         """
         Return a copy of this Playstyle which uses the BattleQueue
-        new_battle_queue.
+        new_battle_queue. The copy shares this playstyle's TranspositionTable,
+        Ponderer and SharedTable.
         """
-        return RecursiveMinimax(new_battle_queue)
+        copy = RecursiveMinimax(new_battle_queue, self.table.max_size,
+                                self.pruning, self.max_depth, self.evaluator,
+                                self.workers, self.split_depth, None)
+        copy.table = self.table
+        copy.ponderer = self.ponderer
+        copy.shared = self.shared
+        return copy
+
+    def ponder(self) -> None:
+        """
+        Start solving the positions the next character's attacks can leave
+        the game in, in the background. The search is stopped by the next
+        call to select_attack.
+        """
+        if self.ponderer is not None and not self.battle_queue.is_over() \
+                and is_supported(self.battle_queue):
+            self.ponderer.start(from_battle_queue(self.battle_queue))
 
+    def _stop_pondering(self) -> None:
+        """
+        Stop the search started by ponder, so its table can be used.
+        """
+        if self.ponderer is not None:
+            self.ponderer.stop()
 
-class IterativeMinimax(Playstyle):
-    """ IterativeMinimax Playstyle
+    def _reroot(self, state: BattleState) -> None:
+        """
+        Make state the root of this playstyle's search tree, keeping the
+        scores found by earlier calls to select_attack that state can still
+        reach and discarding the rest.
+        """
+        if state != self.root:
+            self.tree = reroot_tree(self.tree, state)
+            self.root = state
+
+    def _select_parallel_attack(self, state: BattleState) -> str:
+        """
+        Return the attack select_attack would return in state, found by
+        solving the positions split_depth moves ahead in self.workers
+        processes. Each of them is solved with alpha-beta pruning if
+        self.pruning is True.
+        """
+        if self.pruning:
+            solver = get_pruned_battle_state_score
+        else:
+            solver = get_battle_state_score
+
+        if self.shared is None:
+            self.shared = SharedTable()
+        scores = get_parallel_action_scores(state, solver, self.workers,
+                                            self.split_depth, self.table,
+                                            self.shared)
+
+        if scores['A'] >= scores['S']:
+            return 'A'
+
+        return 'S'
+
+    def _select_pruned_attack(self, state: BattleState) -> str:
+        """
+        Return the attack select_attack would return in state, found with
+        alpha-beta pruning.
+
+        Like the exhaustive search, 'A' is returned when both attacks have the
+        same score, so 'A' only has to be proven at least as good as 'S'.
+        """
+        s_score = get_child_score(state, 'S', -math.inf, math.inf,
+                                  self.table)
+        a_score = get_child_score(state, 'A', s_score - 1, math.inf,
+                                  self.table)
+
+        if a_score >= s_score:
+            return 'A'
 
+        return 'S'
+
+
+class IterativeMinimax(Playstyle):
     """
+    The IterativeMinimax playstyle. Inherits from Playstyle.
+
+    Games that can't be turned into a BattleState (those with a Sorcerer)
+    are searched exhaustively on a copy of the BattleQueue.
+
+    table - the TranspositionTable holding the scores of every position this
+            playstyle (and its copies) has solved.
+    time_limit - the number of seconds select_attack may search for, or None.
+    node_limit - the number of positions select_attack may visit, or None.
+    max_depth - the number of moves select_attack looks ahead, or None to
+                search to the end of the game.
+    evaluator - the Evaluator scoring positions where a search stops before
+                the game is over.
+    workers - the number of processes select_attack searches with.
+    split_depth - the number of moves below the root where the game tree is
+                  cut into tasks for the workers, or None to pick it from
+                  workers.
+    tree - the exact score of every position fewer than TREE_DEPTH moves
+           below a position select_attack searched, that the game can still
+           reach.
+    root - the position select_attack last searched, or None.
+    ponderer - the Ponderer searching ahead during the opponent's turn, or
+               None if this playstyle doesn't ponder.
+    shared - the SharedTable the workers of every parallel search share,
+             made by the first one, or None before it.
+    """
+    table: TranspositionTable
+    time_limit: Union[float, None]
+    node_limit: Union[int, None]
+    max_depth: Union[int, None]
+    evaluator: Evaluator
+    workers: int
+    split_depth: Union[int, None]
+    tree: Dict[BattleState, int]
+    root: Union[BattleState, None]
+    ponderer: Union['Ponderer', None]
+    shared: Union[SharedTable, None]
+
+    def __init__(self, battle_queue: 'BattleQueue',
+                 table_size: int = DEFAULT_TABLE_SIZE,
+                 time_limit: float = None, node_limit: int = None,
+                 max_depth: int = None, evaluator: Evaluator = evaluate,
+                 workers: int = 1, split_depth: int = None,
+                 ponder_nodes: int = None,
+                 cache: ScoreCache = None) -> None:
+        """
+        Initialize this IterativeMinimax with BattleQueue as its battle queue
+        and a TranspositionTable holding at most table_size positions.
 
-    def __init__(self, battle_queue) -> None:
-        """ Initializes the IterativeMinimax"""
+        If time_limit or node_limit is given, select_attack searches with
+        iterative deepening and stops once either limit is reached. If
+        max_depth is given, select_attack never looks more than max_depth
+        moves ahead.
 
-        self.battle_queue = battle_queue
+        If workers is more than 1, select_attack solves the positions
+        split_depth moves ahead in that many processes with a2_parallel.
+        Games too short to be worth it, and searches with a limit, are
+        searched serially.
+
+        ponder searches at most ponder_nodes positions per opponent turn, in a
+        background thread. If ponder_nodes is None, the default, ponder does
+        nothing. a2_game turns pondering on with DEFAULT_PONDER_NODES.
+
+        If cache is given, the table is a TieredTable backed by it, so scores
+        solved by earlier runs or other processes are reused.
+        """
+        super().__init__(battle_queue)
         self.is_manual = False
+        if cache is None:
+            self.table = TranspositionTable(table_size)
+        else:
+            self.table = TieredTable(cache, table_size)
+        self.time_limit = time_limit
+        self.node_limit = node_limit
+        self.max_depth = max_depth
+        self.evaluator = evaluator
+        self.workers = workers
+        self.split_depth = split_depth
+        self.tree = {}
+        self.root = None
+        if ponder_nodes is None:
+            self.ponderer = None
+        else:
+            self.ponderer = Ponderer(self.table, ponder_nodes)
+        self.shared = None
 
-    def select_attack(self, parameter: Any = None):
-        """ Selects Attacks"""
+    def select_attack(self, parameter: Any = None) -> str:
+        """
+        Return the attack for the next character in this Playstyle's
+        battle_queue to perform.
 
-        st = Stack()
-        states = []
+        The game tree is walked with a Stack instead of recursion. The Stack
+        only holds the States on the path being searched.
+        """
+        self._stop_pondering()
         char = self.battle_queue.peek()
-        first_state = State(self.battle_queue)
-        st.add(first_state)
 
         if char.get_available_actions() == ['A']:
             return 'A'
-        else:
 
-            while not st.is_empty():
-                s = st.remove()
-                states += [s]
-                if s.bq.is_over():
-                    if s.bq.get_winner() is None:
-                        s.score = 0
-                    elif s.bq.get_winner() != s.bq.peek():
-                        s.score = s.bq.get_winner().get_hp() * -1
-                    else:
-                        s.score = s.bq.get_winner().get_hp()
+        if not is_supported(self.battle_queue):
+            return select_queue_attack(self.battle_queue, self.table)
+
+        position = from_battle_queue(self.battle_queue)
+        self._reroot(position)
+
+        if self.time_limit is not None or self.node_limit is not None:
+            return self._select_deepening_attack(position)
+
+        if self.workers > 1 and self.max_depth is None and \
+                estimate_moves(position) >= MIN_PARALLEL_MOVES:
+            if self.shared is None:
+                self.shared = SharedTable()
+            scores = get_parallel_action_scores(
+                position, get_iterative_score, self.workers,
+                self.split_depth, self.table, self.shared)
+            if scores['A'] >= scores['S']:
+                return 'A'
+            return 'S'
 
-                elif s.children != []:
-                    c_score_l = []
-                    for c in s.children:
-                        if c.flip_score is True:
-                            c_score_l += [(c.score * -1)]
-                        else:
-                            c_score_l += [c.score]
+        return self._search(position, self.max_depth).get_best_action()
 
-                    s.score = max(c_score_l)
+    def copy(self, new_battle_queue: 'BattleQueue') -> 'Playstyle':
+        """
+        Return a copy of this Playstyle which uses the BattleQueue
+        new_battle_queue. The copy shares this playstyle's TranspositionTable,
+        Ponderer and SharedTable.
+        """
+        copy = IterativeMinimax(new_battle_queue, self.table.max_size,
+                                self.time_limit, self.node_limit,
+                                self.max_depth, self.evaluator,
+                                self.workers, self.split_depth, None)
+        copy.table = self.table
+        copy.ponderer = self.ponderer
+        copy.shared = self.shared
+        return copy
+
+    def ponder(self) -> None:
+        """
+        Start solving the positions the next character's attacks can leave
+        the game in, in the background. The search is stopped by the next
+        call to select_attack.
+        """
+        if self.ponderer is not None and not self.battle_queue.is_over() \
+                and is_supported(self.battle_queue):
+            self.ponderer.start(from_battle_queue(self.battle_queue))
 
-                elif s.children == []:
-                    bq_c = s.bq.copy()
-                    state_c = bq_c.peek()
-                    st.add(s)
+    def _stop_pondering(self) -> None:
+        """
+        Stop the search started by ponder, so its table can be used.
+        """
+        if self.ponderer is not None:
+            self.ponderer.stop()
 
-                    bq_p = s.bq.copy()
-                    state_p = bq_p.peek()
+    def _reroot(self, state: BattleState) -> None:
+        """
+        Make state the root of this playstyle's search tree, keeping the
+        scores found by earlier calls to select_attack that state can still
+        reach and discarding the rest.
+        """
+        if state != self.root:
+            self.tree = reroot_tree(self.tree, state)
+            self.root = state
 
-                    if state_c.is_valid_action("A"):
+    def _select_deepening_attack(self, position: BattleState) -> str:
+        """
+        Return the attack to perform in position, found by searching 1, 2, 3...
+        moves ahead until the time or node limit is reached.
 
-                        state_c.attack()
-                        if state_c.get_available_actions() != []:
-                            bq_c.remove()
+        The attack picked by the deepest search that finished is returned. If
+        a search reaches the end of every line of play, its attack is the one
+        the exhaustive search would pick and deepening stops. Deepening also
+        stops at max_depth.
+        """
+        budget = SearchBudget(self.time_limit, self.node_limit)
 
-                        new_c = State(bq_c)
-                        states += [new_c]
-                        s.children += [new_c]
-                        st.add(new_c)
+        # Searching one move ahead visits at most two positions, so it is
+        # always allowed to finish.
+        root = self._search(position, 1)
+        depth = 2
 
-                        if state_c != bq_c.peek():
-                            new_c.flip_score = True
-                        else:
-                            new_c.flip_score = False
+        while not root.exact and (self.max_depth is None or
+                                  depth <= self.max_depth):
+            deeper = self._search(position, depth, budget)
+            if deeper is None:
+                break
+            root = deeper
+            depth += 1
 
-                    if state_p.is_valid_action("S"):
-                        state_p.special_attack()
-                        if state_p.get_available_actions() != []:
-                            bq_p.remove()
+        return root.get_best_action()
 
-                        new_c2 = State(bq_p)
-                        states += [new_c2]
-                        s.children += [new_c2]
-                        st.add(new_c2)
+    def _search(self, position: BattleState, max_depth: int = None,
+                budget: 'SearchBudget' = None) -> Union['State', None]:
+        """
+        Return search_battle_state(position, self.table, self.evaluator,
+        max_depth, budget, self.tree).
+        """
+        return search_battle_state(position, self.table, self.evaluator,
+                                   max_depth, budget, self.tree)
 
-                        if state_c != bq_c.peek():
-                            new_c2.flip_score = True
-                        else:
-                            new_c2.flip_score = False
 
-            init_score = states[0].score
+class MCTSPlaystyle(Playstyle):
+    """
+    The Monte Carlo Tree Search playstyle. Inherits from Playstyle.
+
+    select_attack grows a tree of BattleStates from the current game. Every
+    iteration walks down the tree with UCT, adds one new position to it and
+    plays a batch of random games (rollouts) from that position. The attack
+    whose subtree was visited most is performed. The cost of a move only
+    depends on the number of iterations and the length of the game, not on
+    how big the full game tree is.
+
+    Games that can't be turned into a BattleState (those with a Sorcerer)
+    are played like RandomPlaystyle.
+
+    iterations - the number of iterations select_attack runs.
+    time_limit - the number of seconds select_attack may search for, or None.
+    batch_size - the number of rollouts played in each iteration.
+    exploration - the exploration constant of UCT.
+    """
+    iterations: int
+    time_limit: Union[float, None]
+    batch_size: int
+    exploration: float
+
+    def __init__(self, battle_queue: 'BattleQueue',
+                 iterations: int = DEFAULT_ITERATIONS,
+                 time_limit: float = None,
+                 batch_size: int = DEFAULT_BATCH_SIZE,
+                 exploration: float = DEFAULT_EXPLORATION) -> None:
+        """
+        Initialize this MCTSPlaystyle with BattleQueue as its battle queue.
 
-            for i in range(len(states[0].children)):
+        select_attack stops after iterations iterations, or after time_limit
+        seconds if that comes first. The clock is read after every iteration.
 
-                if states[0].children[i].flip_score is True:
-                    if init_score == (states[0].children[i].score * -1):
-                        if i == 0:
-                            return 'A'
+        Raise a ValueError if iterations is less than 1.
+        """
+        if iterations < 1:
+            raise ValueError("MCTSPlaystyle needs at least 1 iteration, not "
+                             "{}.".format(iterations))
 
-                        return 'S'
+        super().__init__(battle_queue)
+        self.is_manual = False
+        self.iterations = iterations
+        self.time_limit = time_limit
+        self.batch_size = batch_size
+        self.exploration = exploration
 
-                else:
-                    if init_score == states[0].children[i].score:
-                        if i == 0:
-                            return 'A'
+    def select_attack(self, parameter: Any = None) -> str:
+        """
+        Return the attack for the next character in this Playstyle's
+        battle_queue to perform.
+        """
+        actions = self.battle_queue.peek().get_available_actions()
+
+        if not actions:
+            return 'X'
+        elif actions == ['A']:
+            return 'A'
+        elif not is_supported(self.battle_queue):
+            return random.choice(actions)
 
-                        return 'S'
+        root = MCTSNode(from_battle_queue(self.battle_queue))
+        # Every iteration plays batch_size rollouts, so the clock is read
+        # after each one.
+        budget = SearchBudget(self.time_limit, self.iterations, 1)
 
+        while not budget.spend():
+            self._iterate(root)
+
+        # The time limit may run out before the first iteration.
+        if not root.children:
+            return actions[0]
+
+        best = max(root.children.values(),
+                   key=lambda child: (child.visits, child.action == 'A'))
+        return best.action
 
     def copy(self, new_battle_queue: 'BattleQueue') -> 'Playstyle':
         """
         Return a copy of this Playstyle which uses the BattleQueue
         new_battle_queue.
         """
-        return RecursiveMinimax(new_battle_queue)
+        return MCTSPlaystyle(new_battle_queue, self.iterations,
+                             self.time_limit, self.batch_size,
+                             self.exploration)
+
+    def _iterate(self, root: 'MCTSNode') -> None:
+        """
+        Run one iteration of the search on the tree below root: select a
+        position with UCT, expand it, play a batch of rollouts from it and
+        add their rewards to every node on the way back up.
+        """
+        node = root
+        while not node.untried and node.children:
+            node = node.select_child(self.exploration)
+
+        if node.untried:
+            node = node.expand(random.choice(node.untried))
 
-class State:
-    """ State class"""
-    def __init__(self, bq: 'BattleQueue', children=None, score=0)-> None:
-        """ Initializes a state"""
+        if is_over(node.position):
+            finished = [node.position] * self.batch_size
+        else:
+            finished = [rollout(node.position)
+                        for _ in range(self.batch_size)]
+
+        while node.parent is not None:
+            player = get_next_player(node.parent.position)
+            node.visits += len(finished)
+            node.reward += sum(get_rollout_reward(state, player)
+                               for state in finished)
+            node = node.parent
+
+        node.visits += len(finished)
+
+
+class RetrogradePlaystyle(Playstyle):
+    """
+    The retrograde playstyle. Inherits from Playstyle.
 
-        self.bq = bq
-        self.children = children[:] if children else []
-        self.score = score
-        self.flip_score = False
+    The first time select_attack is called, every position reachable from
+    the game is scored bottom-up with a2_retrograde.solve. Every later move
+    of the game is then a lookup in those scores, since positions reached by
+    playing the game were all reachable from the first one.
+
+    Games that can't be turned into a BattleState (those with a Sorcerer)
+    are searched exhaustively on a copy of the BattleQueue.
+
+    scores - the score of every solved position for its next player, shared
+             with this playstyle's copies.
+    table - the TranspositionTable used for games with a Sorcerer.
+    """
+    scores: dict
+    table: TranspositionTable
+
+    def __init__(self, battle_queue: 'BattleQueue',
+                 table_size: int = DEFAULT_TABLE_SIZE) -> None:
+        """
+        Initialize this RetrogradePlaystyle with BattleQueue as its battle
+        queue and no solved positions.
+        """
+        super().__init__(battle_queue)
+        self.is_manual = False
+        self.scores = {}
+        self.table = TranspositionTable(table_size)
+
+    def select_attack(self, parameter: Any = None) -> str:
+        """
+        Return the attack for the next character in this Playstyle's
+        battle_queue to perform.
+        """
+        if self.battle_queue.peek().get_available_actions() == ['A']:
+            return 'A'
+
+        if not is_supported(self.battle_queue):
+            return select_queue_attack(self.battle_queue, self.table)
+
+        state = from_battle_queue(self.battle_queue)
+        if get_canonical(state) not in self.scores:
+            self.scores.update(solve(state))
+
+        return get_best_action(self.scores, state)
+
+    def copy(self, new_battle_queue: 'BattleQueue') -> 'Playstyle':
+        """
+        Return a copy of this Playstyle which uses the BattleQueue
+        new_battle_queue. The copy shares this playstyle's solved positions.
+        """
+        copy = RetrogradePlaystyle(new_battle_queue, self.table.max_size)
+        copy.scores = self.scores
+        copy.table = self.table
+        return copy
+
+
+class TablebasePlaystyle(Playstyle):
+    """
+    The tablebase playstyle. Inherits from Playstyle.
+
+    select_attack looks the game up in a tablebase file written by
+    a2_tablebase, which takes a single record read. Positions missing from
+    the tablebase (another matchup, or a game the tablebase wasn't built
+    from) are searched exhaustively instead, like RecursiveMinimax.
+
+    tablebase - the open Tablebase, or None to always search.
+    table - the TranspositionTable holding the scores of every position
+            searched because it wasn't in the tablebase.
+    """
+    tablebase: Union[Tablebase, None]
+    table: TranspositionTable
+
+    def __init__(self, battle_queue: 'BattleQueue', path: str = None,
+                 table_size: int = DEFAULT_TABLE_SIZE) -> None:
+        """
+        Initialize this TablebasePlaystyle with BattleQueue as its battle
+        queue, the tablebase at path and a TranspositionTable holding at most
+        table_size positions.
+        """
+        super().__init__(battle_queue)
+        self.is_manual = False
+        self.tablebase = None if path is None else Tablebase(path)
+        self.table = TranspositionTable(table_size)
+
+    def select_attack(self, parameter: Any = None) -> str:
+        """
+        Return the attack for the next character in this Playstyle's
+        battle_queue to perform.
+        """
+        if self.battle_queue.peek().get_available_actions() == ['A']:
+            return 'A'
+
+        if not is_supported(self.battle_queue):
+            return select_queue_attack(self.battle_queue, self.table)
+
+        state = from_battle_queue(self.battle_queue)
+
+        if self.tablebase is not None:
+            entry = self.tablebase.lookup(state)
+            if entry is not None:
+                return entry[1]
+
+        player = get_next_player(state)
+        scores = {}
+
+        for action in ['A', 'S']:
+            child = step(state, action)
+            scores[action] = get_battle_state_score(child, self.table)
+            if player != get_next_player(child):
+                scores[action] *= -1
+
+        if scores['A'] >= scores['S']:
+            return 'A'
+
+        return 'S'
+
+    def copy(self, new_battle_queue: 'BattleQueue') -> 'Playstyle':
+        """
+        Return a copy of this Playstyle which uses the BattleQueue
+        new_battle_queue. The copy shares this playstyle's Tablebase and
+        TranspositionTable.
+        """
+        copy = TablebasePlaystyle(new_battle_queue, None,
+                                  self.table.max_size)
+        copy.tablebase = self.tablebase
+        copy.table = self.table
+        return copy
 
 
 if __name__ == '__main__':
@@ -0,0 +1,133 @@
+"""
+Unittests for pondering with the minimax playstyles in A2.
+"""
+import time
+import unittest
+
+from a2_game import PLAYSTYLE_CLASSES, PLAYSTYLE_OPTIONS
+from a2_search import Ponderer, SearchBudget, DEFAULT_PONDER_NODES, \
+    get_battle_state_score, get_pruned_battle_state_score
+from a2_battle_state import from_battle_queue, step
+from a2_transposition_table import TranspositionTable
+from a2_test_helpers import make_battle_queue
+RecursiveMinimax = PLAYSTYLE_CLASSES['mr']
+IterativeMinimax = PLAYSTYLE_CLASSES['mi']
+
+
+def wait_for(ponderer: Ponderer) -> None:
+    """
+    Wait until ponderer finishes the search it started.
+    """
+    while ponderer.is_pondering():
+        time.sleep(0.01)
+
+
+class PonderUnitTests(unittest.TestCase):
+    def test_ponder_solves_children(self):
+        """
+        Test to make sure pondering stores the exact score of every position
+        the next player's attacks lead to.
+        """
+        bq = make_battle_queue('r', 'v', (40, 30, 40, 30))
+        position = from_battle_queue(bq)
+        table = TranspositionTable()
+        ponderer = Ponderer(table)
+
+        ponderer.start(position)
+        wait_for(ponderer)
+
+        for action in ['A', 'S']:
+            child = step(position, action)
+            self.assertEqual(get_battle_state_score(child),
+                             table.lookup(child))
+
+    def test_stop_cancels(self):
+        """
+        Test to make sure stop ends a search that is far too big to finish.
+        """
+        bq = make_battle_queue('r', 'r', (1000, 1000, 1000, 1000))
+        ponderer = Ponderer(TranspositionTable(), 10 ** 9)
+
+        ponderer.start(from_battle_queue(bq))
+        ponderer.stop()
+
+        self.assertFalse(ponderer.is_pondering())
+
+    def test_cancelled_budget(self):
+        """
+        Test to make sure a cancelled SearchBudget is used up.
+        """
+        budget = SearchBudget(node_limit=100)
+        self.assertFalse(budget.spend())
+        budget.cancel()
+        self.assertTrue(budget.spend())
+
+    def test_pondered_turn_matches(self):
+        """
+        Test to make sure a playstyle that pondered during its opponent's turn
+        has the score of its turn ready and picks the same attack as one that
+        didn't.
+        """
+        for constructor in [RecursiveMinimax, IterativeMinimax]:
+            bq = make_battle_queue('m', 'v', (40, 30, 40, 30))
+            playstyle = constructor(bq, ponder_nodes=DEFAULT_PONDER_NODES)
+
+            # P1 is next, so P2's playstyle ponders.
+            playstyle.ponder()
+            wait_for(playstyle.ponderer)
+            bq.peek().attack()
+            bq.remove()
+
+            self.assertIsNotNone(
+                playstyle.table.lookup(from_battle_queue(bq)))
+            expected = constructor(bq).select_attack()
+            self.assertEqual(expected, playstyle.select_attack())
+
+    def test_no_pondering(self):
+        """
+        Test to make sure the minimax playstyles don't ponder by default, and
+        that ponder then does nothing.
+        """
+        bq = make_battle_queue('m', 'v', (40, 30, 40, 30))
+        for constructor in [RecursiveMinimax, IterativeMinimax]:
+            playstyle = constructor(bq)
+            playstyle.ponder()
+
+            self.assertIsNone(playstyle.ponderer)
+            self.assertEqual(0, len(playstyle.table))
+
+    def test_game_ponders(self):
+        """
+        Test to make sure the minimax playstyles a2_game makes ponder.
+        """
+        bq = make_battle_queue('m', 'v', (40, 30, 40, 30))
+        for playstyle_id in ['mr', 'mi']:
+            playstyle = PLAYSTYLE_CLASSES[playstyle_id](
+                bq, **PLAYSTYLE_OPTIONS[playstyle_id])
+            self.assertEqual(DEFAULT_PONDER_NODES,
+                             playstyle.ponderer.node_limit)
+
+    def test_ponder_over_bounds(self):
+        """
+        Test to make sure pondering solves positions a pruned search left
+        only bounds for in the table.
+        """
+        bq = make_battle_queue('r', 'v', (40, 30, 40, 30))
+        position = from_battle_queue(bq)
+        table = TranspositionTable()
+        get_pruned_battle_state_score(position, -5, -4, table)
+        self.assertTrue(any(isinstance(entry, tuple)
+                            for entry in table._entries.values()))
+
+        ponderer = Ponderer(table)
+        ponderer.start(position)
+        wait_for(ponderer)
+
+        for action in ['A', 'S']:
+            child = step(position, action)
+            self.assertEqual(get_battle_state_score(child),
+                             table.lookup(child))
+
+
+if __name__ == "__main__":
+    unittest.main(exit=False)
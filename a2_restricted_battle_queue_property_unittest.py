@@ -0,0 +1,168 @@
+"""
+Property-style unittests for the RestrictedBattleQueue of A2: random
+sequences of operations must leave it exactly like a straightforward
+implementation of its rules.
+"""
+import random
+import unittest
+
+from a2_battle_queue import BattleQueue, RestrictedBattleQueue
+from a2_test_helpers import make_battle_queue
+
+
+class ReferenceRestrictedBattleQueue(BattleQueue):
+    """
+    The rules of a RestrictedBattleQueue as written in its docstring, with
+    whether each character is able to add kept as 'P1 Y' / 'P2 N' strings and
+    recounted on every add.
+    """
+
+    def __init__(self) -> None:
+        """
+        Initialize this ReferenceRestrictedBattleQueue.
+        """
+        super().__init__()
+        self.adability = []
+
+    def _pop_front(self) -> 'Character':
+        """
+        Remove and return the character at the front of this queue together
+        with its add flag.
+        """
+        self.adability.pop(0)
+        return super()._pop_front()
+
+    def add(self, character: 'Character') -> None:
+        """
+        Add character following the rules of a RestrictedBattleQueue.
+        """
+        if self._p1 is None:
+            self._p1 = character
+            self._p2 = character.enemy
+
+        player = 'P1' if character is self._p1 else 'P2'
+
+        if character not in self._content:
+            self._append(character)
+            self.adability.append(player + ' Y')
+
+        elif self.adability[0][-1] == 'Y':
+            if self.peek() is character and \
+                    self.adability.count(player + ' Y') <= 1:
+                self._append(character)
+                self.adability.append(player + ' Y')
+            else:
+                self._append(character)
+                self.adability.append(player + ' N')
+
+
+def apply(bq: BattleQueue, operation: tuple) -> None:
+    """
+    Apply operation to bq. operation is one of ('add', player),
+    ('remove',), ('sp', player, sp) or ('attack', action), where player is 0
+    for the first character in bq and 1 for the second.
+    """
+    p1 = bq.peek() if bq.peek().get_name() == 'P1' else bq.peek().enemy
+    players = [p1, p1.enemy]
+
+    if operation[0] == 'add':
+        bq.add(players[operation[1]])
+    elif operation[0] == 'remove':
+        bq.remove()
+    elif operation[0] == 'sp':
+        players[operation[1]].set_sp(operation[2])
+    else:
+        character = bq.peek()
+        if operation[1] == 'A':
+            character.attack()
+        else:
+            character.special_attack()
+        if character.get_available_actions() != []:
+            bq.remove()
+
+
+def random_operation(rng: random.Random, bq: BattleQueue) -> tuple:
+    """
+    Return a random operation that can be applied to bq.
+    """
+    choices = ['add', 'add', 'sp']
+    if not bq.is_empty():
+        choices.append('remove')
+    if not bq.is_over():
+        choices.extend(['attack', 'attack'])
+
+    choice = rng.choice(choices)
+    if choice == 'add':
+        return 'add', rng.randint(0, 1)
+    elif choice == 'sp':
+        return 'sp', rng.randint(0, 1), rng.randint(0, 40)
+    elif choice == 'remove':
+        return ('remove',)
+
+    return 'attack', rng.choice(bq.peek().get_available_actions())
+
+
+class RestrictedBattleQueuePropertyUnitTests(unittest.TestCase):
+    def test_matches_reference_rules(self):
+        """
+        Test to make sure random sequences of adds, removes, SP changes and
+        attacks leave a RestrictedBattleQueue with the same order and add
+        flags as the reference implementation.
+        """
+        rng = random.Random(148)
+        for _ in range(200):
+            classes = (rng.choice('mrv'), rng.choice('mrv'))
+            bq = make_battle_queue(classes[0], classes[1],
+                                   bq_class=RestrictedBattleQueue)
+            reference = make_battle_queue(
+                classes[0], classes[1],
+                bq_class=ReferenceRestrictedBattleQueue)
+
+            for _ in range(rng.randint(1, 40)):
+                operation = random_operation(rng, reference)
+                apply(reference, operation)
+                apply(bq, operation)
+
+                self.assertEqual(
+                    (reference.is_empty(), repr(reference),
+                     reference.adability),
+                    (bq.is_empty(), repr(bq), bq.adability),
+                    "Mismatch after {}".format(operation))
+
+    def test_copy_and_unmake_keep_counters(self):
+        """
+        Test to make sure a RestrictedBattleQueue whose moves were unmade, and
+        a copy of it, keep adding exactly like a queue that only made the
+        moves that are left.
+        """
+        rng = random.Random(2)
+        for _ in range(100):
+            classes = (rng.choice('mrv'), rng.choice('mrv'))
+            bq = make_battle_queue(classes[0], classes[1],
+                                   bq_class=RestrictedBattleQueue)
+            actions = []
+            records = []
+            while not bq.is_over() and rng.random() < 0.9:
+                actions.append(rng.choice(bq.peek().get_available_actions()))
+                records.append(bq.make_move(actions[-1]))
+            while records and rng.random() < 0.5:
+                bq.unmake_move(records.pop())
+
+            expected = make_battle_queue(classes[0], classes[1],
+                                         bq_class=RestrictedBattleQueue)
+            for action in actions[:len(records)]:
+                expected.make_move(action)
+
+            copy = bq.copy()
+            for _ in range(10):
+                player = rng.randint(0, 1)
+                for queue in [expected, bq, copy]:
+                    apply(queue, ('add', player))
+
+            self.assertEqual((repr(expected), expected.adability),
+                             (repr(bq), bq.adability))
+            self.assertEqual((repr(expected), expected.adability),
+                             (repr(copy), copy.adability))
+
+if __name__ == "__main__":
+    unittest.main(exit=False)
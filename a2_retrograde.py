@@ -0,0 +1,123 @@
+"""
+Retrograde solving for A2.
+
+Every skill in a2_skills costs SP and nothing restores it, so the total SP
+of both players goes down with every move. A position can therefore only
+lead to positions with less total SP, and scoring every position reachable
+from a game in order of increasing total SP scores each one after all of
+its children, without any recursion and without solving any position twice.
+
+The result is a dict from the canonical position of every reachable
+BattleState to the score a2_playstyle.get_state_score would give it. In
+matchups of one class against itself, a position and its mirror share an
+entry, so about half as many positions are solved.
+"""
+from typing import Dict, List
+
+from a2_battle_state import BattleState, step, get_available_actions, \
+    get_next_player, is_over, get_terminal_score, get_canonical
+
+
+def get_reachable_states(state: BattleState) -> List[BattleState]:
+    """
+    Return the canonical position of every position that can be reached
+    from state, including state itself, walking the game with a list instead
+    of recursion.
+
+    >>> state = BattleState(('r', 'm'), (10, 10), (10, 10), (0, 1), None)
+    >>> len(get_reachable_states(state))
+    4
+    """
+    state = get_canonical(state)
+    seen = {state}
+    to_visit = [state]
+
+    while to_visit:
+        position = to_visit.pop()
+        if is_over(position):
+            continue
+
+        for action in get_available_actions(position):
+            child = get_canonical(step(position, action))
+            if child not in seen:
+                seen.add(child)
+                to_visit.append(child)
+
+    return list(seen)
+
+
+def get_total_sp(state: BattleState) -> int:
+    """
+    Return the total SP of both players in state.
+
+    >>> get_total_sp(BattleState(('r', 'm'), (10, 10), (7, 12), (0, 1),
+    ...                          None))
+    19
+    """
+    return state.sp[0] + state.sp[1]
+
+
+def solve(state: BattleState) -> Dict[BattleState, int]:
+    """
+    Return the score of every position reachable from state for its next
+    player, scored bottom-up in order of increasing total SP.
+
+    The keys are canonical positions, so a position of a mirror matchup may
+    only be found under its mirror: look positions up by
+    get_canonical(position), not by the position itself.
+
+    >>> state = BattleState(('r', 'm'), (40, 3), (100, 100), (1, 0), None)
+    >>> solve(state)[state]
+    -10
+    """
+    scores = {}
+
+    for position in sorted(get_reachable_states(state), key=get_total_sp):
+        if is_over(position):
+            scores[position] = get_terminal_score(position)
+            continue
+
+        player = get_next_player(position)
+        best = None
+
+        for action in get_available_actions(position):
+            child = step(position, action)
+            score = scores[get_canonical(child)]
+            if get_next_player(child) != player:
+                score *= -1
+            if best is None or score > best:
+                best = score
+
+        scores[position] = best
+
+    return scores
+
+
+def get_best_action(scores: Dict[BattleState, int],
+                    state: BattleState) -> str:
+    """
+    Return the action with the highest score for the next player in state,
+    preferring 'A' on ties like the minimax playstyles, where scores is the
+    result of solve for state or a position state can be reached from.
+
+    >>> state = BattleState(('r', 'm'), (40, 3), (100, 100), (0, 1), None)
+    >>> get_best_action(solve(state), state)
+    'A'
+    """
+    player = get_next_player(state)
+    best_action, best_score = None, None
+
+    for action in get_available_actions(state):
+        child = step(state, action)
+        score = scores[get_canonical(child)]
+        if get_next_player(child) != player:
+            score *= -1
+        if best_score is None or score > best_score:
+            best_action, best_score = action, score
+
+    return best_action
+
+
+if __name__ == '__main__':
+    import python_ta
+    python_ta.check_all(config='a2_pyta.txt')
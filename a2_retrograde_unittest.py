@@ -0,0 +1,108 @@
+"""
+Unittests for the retrograde solver and RetrogradePlaystyle in A2.
+"""
+import random
+import unittest
+
+from a2_game import BATTLE_QUEUE_CLASSES, PLAYSTYLE_CLASSES
+from a2_playstyle import RetrogradePlaystyle, get_state_score
+from a2_search import get_battle_state_score
+from a2_battle_state import BattleState, from_battle_queue, \
+    to_battle_queue, get_available_actions, get_canonical, is_over, step
+from a2_retrograde import solve, get_reachable_states, get_total_sp
+from a2_test_helpers import make_battle_queue
+RecursiveMinimax = PLAYSTYLE_CLASSES['mr']
+
+
+class RetrogradeUnitTests(unittest.TestCase):
+    def test_registered(self):
+        """
+        Test to make sure the RetrogradePlaystyle can be picked in a2_game.
+        """
+        self.assertIs(RetrogradePlaystyle, PLAYSTYLE_CLASSES['rs'])
+
+    def test_sp_drops(self):
+        """
+        Test to make sure every move lowers the total SP, so the game graph
+        has no cycles.
+        """
+        bq = make_battle_queue('v', 'm', (60, 60, 60, 60),
+                               BATTLE_QUEUE_CLASSES['r'])
+        for state in get_reachable_states(from_battle_queue(bq)):
+            if not is_over(state):
+                for action in get_available_actions(state):
+                    self.assertLess(get_total_sp(step(state, action)),
+                                    get_total_sp(state))
+
+    def test_matches_minimax(self):
+        """
+        Test to make sure every solved position has the score the recursive
+        search gives it.
+        """
+        rng = random.Random(148)
+        for _ in range(20):
+            bq_class = BATTLE_QUEUE_CLASSES[rng.choice('nr')]
+            bq = make_battle_queue(rng.choice('mrv'), rng.choice('mrv'),
+                                   (rng.randint(1, 60), rng.randint(0, 60),
+                                    rng.randint(1, 60), rng.randint(0, 60)),
+                                   bq_class)
+            scores = solve(from_battle_queue(bq))
+            for state, score in scores.items():
+                self.assertEqual(get_battle_state_score(state), score)
+
+    def test_mirror_matchup(self):
+        """
+        Test to make sure every position of a small Rogue vs Rogue matchup,
+        including games whose queue runs out, has the score of a search of
+        its own.
+        """
+        for hp in [(hp_0, hp_1) for hp_0 in range(1, 13)
+                   for hp_1 in range(1, 13)]:
+            for sp in [(3, 3), (6, 9), (12, 7)]:
+                state = BattleState(('r', 'r'), hp, sp, (0, 1), None)
+                scores = solve(state)
+                self.assertEqual(get_state_score(to_battle_queue(state)),
+                                 scores[get_canonical(state)])
+                for position, score in scores.items():
+                    self.assertEqual(get_battle_state_score(position), score,
+                                     "Mismatch for {}".format(position))
+
+    def test_same_attack_as_minimax(self):
+        """
+        Test to make sure the RetrogradePlaystyle picks the attack
+        RecursiveMinimax picks.
+        """
+        for classes in ['rm', 'vm', 'mv', 'rr']:
+            bq = make_battle_queue(classes[0], classes[1],
+                                   (100, 100, 100, 100))
+            self.assertEqual(RecursiveMinimax(bq).select_attack(),
+                             RetrogradePlaystyle(bq).select_attack())
+
+    def test_solves_once_per_game(self):
+        """
+        Test to make sure positions reached later in the game are looked up
+        instead of solved again, including by copies.
+        """
+        bq = make_battle_queue('r', 'm', (60, 60, 60, 60))
+        playstyle = RetrogradePlaystyle(bq)
+        playstyle.select_attack()
+        scores = playstyle.scores
+        solved = len(scores)
+
+        bq.make_move('A')
+        copy = playstyle.copy(bq)
+        copy.select_attack()
+        self.assertIs(scores, copy.scores)
+        self.assertEqual(solved, len(copy.scores))
+
+    def test_sorcerer(self):
+        """
+        Test to make sure a game with a Sorcerer is still played.
+        """
+        bq = make_battle_queue('s', 'm', (20, 40, 20, 40))
+        self.assertEqual(RecursiveMinimax(bq).select_attack(),
+                         RetrogradePlaystyle(bq).select_attack())
+
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
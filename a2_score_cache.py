@@ -0,0 +1,323 @@
+"""
+The persistent score cache for A2.
+
+A ScoreCache keeps solved scores in an SQLite database on disk, so they
+outlive the process that found them and every process on the machine can
+share them. It sits behind the in-memory TranspositionTable as a second
+tier: a TieredTable looks a position up on disk only when it isn't in
+memory, and sends every exact score it stores to disk.
+
+The database is opened in WAL mode, so processes read it while another one
+writes. Writes are batched: stored scores wait in memory until a batch is
+full, and the batch is then committed by a background thread with its own
+connection, so a search never waits for the disk to write. Batches waiting
+for or being written by that thread are still looked up in memory, and
+whatever hasn't been written when the program exits is written then.
+
+A ScoreCache also reads the scores of its rules version into memory when it
+is opened, up to max_memory of them, and keeps the scores it stores there
+too, so most lookups never touch the disk. A position missing from memory is
+looked up in the database, where other processes may have written it since.
+
+Positions are stored by their canonical BattleState together with a hash of
+the rules (the cost and damage of every skill and the defense of every
+class) and of KEY_FORMAT. Changing the rules or the way positions are keyed
+therefore never returns a stale score, and games with a Sorcerer, which have
+no BattleState, are not cached.
+"""
+from typing import Any, Dict, Hashable, List, Union
+import atexit
+import hashlib
+import queue
+import sqlite3
+import threading
+
+from a2_battle_state import BattleState, SKILL_RULES, DEFENSES
+from a2_transposition_table import TranspositionTable, DEFAULT_TABLE_SIZE
+
+# The number of scores stored before they are written to disk together.
+DEFAULT_BATCH_SIZE = 4096
+
+# The number of scores a ScoreCache keeps in memory.
+DEFAULT_MEMORY_SIZE = 1 << 20
+
+# The version of the way positions are turned into keys. Version 2 stopped
+# storing positions with an empty queue under their mirror's key.
+KEY_FORMAT = 2
+
+# How long, in seconds, a connection waits for another process to finish
+# writing before giving up.
+TIMEOUT = 30.0
+
+
+def get_rules_version() -> str:
+    """
+    Return a hash of the rules BattleStates are played by: the cost, damage,
+    queue changes and draining of every skill and the defense of every class,
+    together with KEY_FORMAT.
+
+    >>> len(get_rules_version())
+    16
+    >>> get_rules_version() == get_rules_version()
+    True
+    """
+    rules = (KEY_FORMAT,
+             sorted((class_id, sorted(rules.items()))
+                    for class_id, rules in SKILL_RULES.items()),
+             sorted(DEFENSES.items()))
+    return hashlib.sha256(repr(rules).encode()).hexdigest()[:16]
+
+
+RULES_VERSION = get_rules_version()
+
+
+def _get_key(state: BattleState) -> str:
+    """
+    Return the text state is stored under, which is the same in every
+    process.
+
+    >>> _get_key(BattleState(('r', 'm'), (4, 7), (9, 10), (0, 1), None))
+    "(('r', 'm'), (4, 7), (9, 10), (0, 1), None)"
+    """
+    return repr(tuple(state))
+
+
+def _connect(path: str) -> sqlite3.Connection:
+    """
+    Return a connection to the score database at path, creating it if
+    needed.
+    """
+    connection = sqlite3.connect(path, timeout=TIMEOUT,
+                                 check_same_thread=False)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    connection.execute("CREATE TABLE IF NOT EXISTS scores ("
+                       "rules TEXT NOT NULL, position TEXT NOT NULL, "
+                       "score INTEGER NOT NULL, "
+                       "PRIMARY KEY (rules, position)) WITHOUT ROWID")
+    connection.commit()
+    return connection
+
+
+def _write(path: str, rules: str, batches: 'queue.Queue',
+           in_flight: List[Dict[str, int]], lock: threading.Lock) -> None:
+    """
+    Commit every batch of position: score taken from batches to the database
+    at path under rules, until a None is taken. Each batch is removed from
+    in_flight once it is committed.
+    """
+    connection = _connect(path)
+    batch = batches.get()
+
+    while batch is not None:
+        with connection:
+            connection.executemany("INSERT OR REPLACE INTO scores "
+                                   "VALUES (?, ?, ?)",
+                                   [(rules, key, score)
+                                    for key, score in batch.items()])
+        with lock:
+            in_flight[:] = [other for other in in_flight
+                            if other is not batch]
+        batches.task_done()
+        batch = batches.get()
+
+    batches.task_done()
+    connection.close()
+
+
+class ScoreCache:
+    """
+    Scores of BattleStates stored in an SQLite database.
+
+    A ScoreCache can be used as a context manager, which closes it on exit.
+    Otherwise it is closed when the program exits, if it wasn't before.
+
+    path - the path of the database file.
+    batch_size - the number of stored scores written to disk together.
+    rules - the rules version scores are stored and looked up under.
+    max_memory - the number of scores kept in memory.
+    """
+    path: str
+    batch_size: int
+    rules: str
+    max_memory: int
+
+    def __init__(self, path: str, batch_size: int = DEFAULT_BATCH_SIZE,
+                 rules: str = RULES_VERSION,
+                 max_memory: int = DEFAULT_MEMORY_SIZE) -> None:
+        """
+        Open the score database at path, creating it if needed, and read up
+        to max_memory of its scores into memory.
+        """
+        self.path = path
+        self.batch_size = batch_size
+        self.rules = rules
+        self.max_memory = max_memory
+        self._connection = _connect(path)
+        self._pending = {}
+        self._in_flight = []
+        self._lock = threading.Lock()
+        self._closed = False
+
+        rows = self._connection.execute(
+            "SELECT position, score FROM scores WHERE rules = ? LIMIT ?",
+            (rules, max_memory)).fetchall()
+        self._scores = dict(rows)
+
+        self._batches = queue.Queue()
+        self._writer = threading.Thread(
+            target=_write,
+            args=(path, rules, self._batches, self._in_flight, self._lock),
+            daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    def lookup(self, state: BattleState) -> Union[int, None]:
+        """
+        Return the score stored for state, or None if there isn't one.
+
+        The database is only read if state isn't in memory.
+        """
+        key = _get_key(state)
+        score = self._scores.get(key)
+        if score is not None:
+            return score
+
+        score = self._pending.get(key)
+        if score is not None:
+            return score
+
+        with self._lock:
+            for batch in reversed(self._in_flight):
+                if key in batch:
+                    return batch[key]
+
+        row = self._connection.execute(
+            "SELECT score FROM scores WHERE rules = ? AND position = ?",
+            (self.rules, key)).fetchone()
+
+        return None if row is None else row[0]
+
+    def store(self, state: BattleState, score: int) -> None:
+        """
+        Store score for state. It is written to disk once batch_size scores
+        are waiting.
+        """
+        key = _get_key(state)
+        self._pending[key] = score
+
+        if key in self._scores or len(self._scores) < self.max_memory:
+            self._scores[key] = score
+
+        if len(self._pending) >= self.batch_size:
+            self._send()
+
+    def flush(self) -> None:
+        """
+        Write every stored score to disk, and wait until it is written.
+        """
+        self._send()
+        self._batches.join()
+
+    def close(self) -> None:
+        """
+        Write every stored score to disk and close the database, if that
+        hasn't been done yet. This ScoreCache can't be used afterwards.
+        """
+        if self._closed:
+            return
+
+        self._closed = True
+        atexit.unregister(self.close)
+        self._send()
+        self._batches.put(None)
+        self._writer.join()
+        self._connection.close()
+
+    def _send(self) -> None:
+        """
+        Hand the waiting scores to the writer thread.
+        """
+        if self._pending:
+            batch = self._pending
+            with self._lock:
+                self._in_flight.append(batch)
+            self._batches.put(batch)
+            self._pending = {}
+
+    def __enter__(self) -> 'ScoreCache':
+        """
+        Return this ScoreCache, to be closed at the end of a with statement.
+        """
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        """
+        Close this ScoreCache.
+        """
+        self.close()
+
+    def __len__(self) -> int:
+        """
+        Return the number of scores on disk under this cache's rules version,
+        not counting those waiting to be written.
+        """
+        return self._connection.execute(
+            "SELECT COUNT(*) FROM scores WHERE rules = ?",
+            (self.rules,)).fetchone()[0]
+
+
+class TieredTable(TranspositionTable):
+    """
+    A TranspositionTable backed by a ScoreCache.
+
+    Lookups that miss in memory are looked up in the cache, and what they
+    find is kept in memory. Exact scores of BattleStates are stored in both;
+    other keys and values (state_hash keys, pruning bounds) only in memory.
+
+    cache - the ScoreCache behind this table.
+    disk_hits - the number of lookups that were found in cache.
+    """
+    cache: ScoreCache
+    disk_hits: int
+
+    def __init__(self, cache: ScoreCache,
+                 max_size: int = DEFAULT_TABLE_SIZE) -> None:
+        """
+        Initialize this TieredTable so that it holds at most max_size
+        positions in memory, backed by cache.
+        """
+        super().__init__(max_size)
+        self.cache = cache
+        self.disk_hits = 0
+
+    def lookup(self, key: Hashable) -> Any:
+        """
+        Return the value stored for key in memory or in cache, or None if
+        there isn't one.
+        """
+        value = super().lookup(key)
+
+        if value is None and isinstance(key, BattleState):
+            value = self.cache.lookup(key)
+            if value is not None:
+                self.disk_hits += 1
+                super().store(key, value)
+
+        return value
+
+    def store(self, key: Hashable, value: Any) -> None:
+        """
+        Store value for key in memory, and in cache if it is a new exact
+        score of a BattleState.
+        """
+        if isinstance(key, BattleState) and isinstance(value, int) and \
+                self._entries.get(key) != value:
+            self.cache.store(key, value)
+
+        super().store(key, value)
+
+
+if __name__ == '__main__':
+    import python_ta
+    python_ta.check_all(config='a2_pyta.txt')
@@ -0,0 +1,206 @@
+"""
+Unittests for the persistent score cache in A2.
+"""
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+from a2_game import CHARACTER_CLASSES, PLAYSTYLE_CLASSES
+from a2_playstyle import ManualPlaystyle
+from a2_search import get_battle_state_score
+from a2_battle_queue import BattleQueue
+from a2_battle_state import BattleState
+from a2_score_cache import ScoreCache, TieredTable, get_rules_version
+RecursiveMinimax = PLAYSTYLE_CLASSES['mr']
+IterativeMinimax = PLAYSTYLE_CLASSES['mi']
+
+STATE = BattleState(('r', 'm'), (40, 40), (40, 40), (0, 1), None)
+
+
+class ScoreCacheUnitTests(unittest.TestCase):
+    def setUp(self):
+        """
+        Make a directory for the database of a test.
+        """
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'scores.db')
+
+    def tearDown(self):
+        """
+        Delete the database of a test.
+        """
+        self.directory.cleanup()
+
+    def test_scores_outlive_cache(self):
+        """
+        Test to make sure scores stored in a closed cache are found by a new
+        one on the same file.
+        """
+        cache = ScoreCache(self.path)
+        cache.store(STATE, 12)
+        self.assertEqual(12, cache.lookup(STATE))
+        cache.close()
+
+        cache = ScoreCache(self.path)
+        self.assertEqual(12, cache.lookup(STATE))
+        self.assertEqual(1, len(cache))
+        cache.close()
+
+    def test_writes_are_batched(self):
+        """
+        Test to make sure scores wait in memory until a batch is full.
+        """
+        cache = ScoreCache(self.path, batch_size=3)
+        other = ScoreCache(self.path)
+        states = [STATE._replace(hp=(hp, 40)) for hp in range(1, 4)]
+
+        for state in states[:2]:
+            cache.store(state, 1)
+        cache.flush()
+        self.assertEqual(2, len(other))
+
+        cache.store(states[2], 1)
+        self.assertEqual(2, len(other))
+        cache.close()
+        self.assertEqual(3, len(other))
+        other.close()
+
+    def test_batches_being_written_are_found(self):
+        """
+        Test to make sure scores handed to the writer thread are found while
+        it waits to commit them.
+        """
+        cache = ScoreCache(self.path, batch_size=1, max_memory=0)
+        blocker = sqlite3.connect(self.path)
+        blocker.execute("BEGIN EXCLUSIVE")
+
+        cache.store(STATE, 12)
+        self.assertEqual({}, cache._pending)
+        self.assertEqual(12, cache.lookup(STATE))
+
+        blocker.rollback()
+        blocker.close()
+        cache.flush()
+        self.assertEqual([], cache._in_flight)
+        self.assertEqual(12, cache.lookup(STATE))
+        cache.close()
+
+    def test_lookup_stays_in_memory(self):
+        """
+        Test to make sure the scores a cache read when it was opened are
+        found in memory, without reading the database.
+        """
+        with ScoreCache(self.path) as cache:
+            cache.store(STATE, 12)
+
+        cache = ScoreCache(self.path)
+        connection = sqlite3.connect(self.path)
+        with connection:
+            connection.execute("DELETE FROM scores")
+        connection.close()
+
+        self.assertEqual(12, cache.lookup(STATE))
+        self.assertIsNone(cache.lookup(STATE._replace(hp=(1, 1))))
+        cache.close()
+
+    def test_scores_written_since_open(self):
+        """
+        Test to make sure a cache finds scores another cache wrote after it
+        was opened.
+        """
+        cache = ScoreCache(self.path)
+        with ScoreCache(self.path) as other:
+            other.store(STATE, 12)
+
+        self.assertEqual(12, cache.lookup(STATE))
+        cache.close()
+
+    def test_written_at_exit(self):
+        """
+        Test to make sure scores stored by a program that never closes its
+        cache are written when it exits.
+        """
+        code = ("from a2_score_cache import ScoreCache\n"
+                "from a2_score_cache_unittest import STATE\n"
+                "ScoreCache({!r}).store(STATE, 12)\n").format(self.path)
+        subprocess.run([sys.executable, '-c', code], check=True,
+                       cwd=os.path.dirname(os.path.abspath(__file__)))
+
+        with ScoreCache(self.path) as cache:
+            self.assertEqual(12, cache.lookup(STATE))
+
+    def test_rules_version(self):
+        """
+        Test to make sure scores stored under other rules aren't found.
+        """
+        cache = ScoreCache(self.path, rules='old')
+        cache.store(STATE, 12)
+        cache.close()
+
+        cache = ScoreCache(self.path)
+        self.assertIsNone(cache.lookup(STATE))
+        cache.close()
+
+    def test_rules_version_covers_key_format(self):
+        """
+        Test to make sure changing the way positions are keyed changes the
+        rules version, so scores stored under old keys aren't found.
+        """
+        version = get_rules_version()
+        with mock.patch('a2_score_cache.KEY_FORMAT', -1):
+            self.assertNotEqual(version, get_rules_version())
+
+    def test_tiered_table(self):
+        """
+        Test to make sure a new TieredTable starts warm from the scores an
+        earlier one solved, and only writes exact scores of BattleStates.
+        """
+        cache = ScoreCache(self.path)
+        score = get_battle_state_score(STATE, TieredTable(cache))
+        table = TieredTable(cache)
+        table.store(5, 7)
+        table.store(STATE._replace(hp=(1, 1)), (0, 3))
+        cache.close()
+
+        cache = ScoreCache(self.path)
+        table = TieredTable(cache)
+        self.assertEqual(score, get_battle_state_score(STATE, table))
+        self.assertEqual(1, table.disk_hits)
+        self.assertIsNone(table.lookup(5))
+        self.assertIsNone(table.lookup(STATE._replace(hp=(1, 1))))
+        cache.close()
+
+    def test_playstyles_share_cache(self):
+        """
+        Test to make sure a minimax playstyle with a cache picks the same
+        attack as one without, from scores another playstyle solved.
+        """
+        bq = BattleQueue()
+        p1 = CHARACTER_CLASSES['v']("V", bq, ManualPlaystyle(bq))
+        p2 = CHARACTER_CLASSES['r']("R", bq, ManualPlaystyle(bq))
+        p1.enemy = p2
+        p2.enemy = p1
+        bq.add(p1)
+        bq.add(p2)
+        p1.set_sp(40)
+        p2.set_sp(40)
+
+        for constructor in [RecursiveMinimax, IterativeMinimax]:
+            expected = constructor(bq).select_attack()
+            cache = ScoreCache(self.path)
+            self.assertEqual(expected,
+                             constructor(bq, cache=cache).select_attack())
+            cache.flush()
+
+            playstyle = constructor(bq, cache=cache)
+            self.assertEqual(expected, playstyle.select_attack())
+            self.assertGreater(playstyle.table.disk_hits, 0)
+            cache.close()
+
+
+if __name__ == "__main__":
+    unittest.main(exit=False)
@@ -0,0 +1,767 @@
+"""
+Searching BattleStates for A2.
+
+Every search here runs on BattleStates with step(), so no game objects are
+created, and stores positions in its TranspositionTable by their canonical
+position. The minimax playstyles of a2_playstyle pick their attacks with
+them: get_battle_state_score and get_pruned_battle_state_score recurse,
+get_depth_limited_score stops a fixed number of moves ahead, and
+search_battle_state walks the game tree with a Stack of States, under a
+SearchBudget if given. get_tree_score keeps the scores near the root
+between moves, and a Ponderer searches ahead in a background thread while
+the opponent decides on their attack. MCTSPlaystyle grows a tree of
+MCTSNodes, scored by rollouts.
+
+Games that can't be turned into a BattleState (those with a Sorcerer) are
+searched by get_queue_score instead, which makes and unmakes moves on a
+PackedBattleQueue and stores positions by their state_hash.
+"""
+from typing import Dict, List, Tuple, Union
+import math
+import random
+import threading
+import time
+from stack_for_a2 import Stack
+from a2_battle_queue import pack
+from a2_transposition_table import TranspositionTable, DEFAULT_TABLE_SIZE
+from a2_battle_state import BattleState, step, get_available_actions, \
+    get_next_player, is_over, get_terminal_score, get_winner, can_reach, \
+    mirror, get_canonical, is_forced, fast_forward, get_forced_score
+from a2_evaluation import Evaluator, evaluate
+
+
+def _get_terminal_score(battle_queue: 'BattleQueue') -> int:
+    """
+    Return the score of the finished game in battle_queue for the next player
+    who was supposed to act.
+    """
+    if battle_queue.get_winner() == battle_queue.peek():
+        return battle_queue.peek().get_hp()
+    elif battle_queue.get_winner() == battle_queue.peek().enemy:
+        return battle_queue.peek().enemy.get_hp() * -1
+
+    return 0
+
+
+def get_queue_score(bq: 'BattleQueue', table: TranspositionTable) -> int:
+    """
+    Return get_state_score(bq, table), searching by making and unmaking moves
+    in bq itself. bq is left as it was.
+
+    This is only used for games that can't be turned into a BattleState.
+    Positions are stored in table by their state_hash.
+    """
+    if table is not None:
+        key = bq.state_hash()
+        score = table.lookup(key)
+        if isinstance(score, int):
+            return score
+
+    if bq.is_over():
+        score = _get_terminal_score(bq)
+
+    else:
+        current = bq.peek()
+        scores = []
+
+        for action in ['A', 'S']:
+            if current.is_valid_action(action):
+                record = bq.make_move(action)
+                if current != bq.peek():
+                    scores.append(get_queue_score(bq, table) * -1)
+                else:
+                    scores.append(get_queue_score(bq, table))
+                bq.unmake_move(record)
+
+        score = max(scores)
+
+    if table is not None:
+        table.store(key, score)
+
+    return score
+
+
+def select_queue_attack(battle_queue: 'BattleQueue',
+                        table: TranspositionTable) -> str:
+    """
+    Return the attack with the highest score for the next character in
+    battle_queue, preferring 'A' on ties, for games that can't be turned into
+    a BattleState.
+    """
+    bq = pack(battle_queue)
+    player = bq.peek()
+    scores = {}
+
+    for action in player.get_available_actions():
+        record = bq.make_move(action)
+        if player == bq.peek():
+            scores[action] = get_queue_score(bq, table)
+        else:
+            scores[action] = get_queue_score(bq, table) * -1
+        bq.unmake_move(record)
+
+    if 'S' not in scores or scores['A'] >= scores['S']:
+        return 'A'
+
+    return 'S'
+
+
+def get_battle_state_score(state: BattleState,
+                           table: TranspositionTable = None) -> int:
+    """
+    Return get_state_score of the game in state, searching with step() so no
+    game objects are created. Positions are stored in table by their
+    canonical position.
+
+    Moves where only 'A' is available are played by fast_forward without
+    being searched, and positions where neither player has a choice left are
+    scored by get_forced_score.
+    """
+    key = get_canonical(state)
+
+    if table is not None:
+        score = table.lookup(key)
+        if isinstance(score, int):
+            return score
+
+    if is_over(state):
+        score = get_terminal_score(state)
+
+    elif is_forced(state):
+        score = get_forced_score(state)
+
+    else:
+        player = get_next_player(state)
+        scores = []
+
+        for action in get_available_actions(state):
+            child = fast_forward(step(state, action))
+            if get_next_player(child) != player:
+                scores.append(get_battle_state_score(child, table) * -1)
+            else:
+                scores.append(get_battle_state_score(child, table))
+
+        score = max(scores)
+
+    if table is not None:
+        table.store(key, score)
+
+    return score
+
+
+def get_depth_limited_score(state: BattleState, max_depth: int,
+                            evaluator: Evaluator = evaluate,
+                            table: TranspositionTable = None) -> \
+        Tuple[int, bool]:
+    """
+    Return the score of the game in state for the next player, searching at
+    most max_depth moves ahead, and whether that score is exact.
+
+    Positions max_depth moves ahead whose game isn't over are scored by
+    evaluator, which makes every score that depends on them an estimate.
+    Only exact scores are stored in table, so it can be shared with searches
+    of any depth.
+
+    Forced moves are played by fast_forward and don't count towards
+    max_depth, and positions where neither player has a choice left are
+    scored exactly by get_forced_score.
+    """
+    key = get_canonical(state)
+
+    if table is not None:
+        score = table.lookup(key)
+        if isinstance(score, int):
+            return score, True
+
+    if is_over(state):
+        score = get_terminal_score(state)
+        exact = True
+
+    elif is_forced(state):
+        score = get_forced_score(state)
+        exact = True
+
+    elif max_depth <= 0:
+        return evaluator(state), False
+
+    else:
+        player = get_next_player(state)
+        scores = []
+        exact = True
+
+        for action in get_available_actions(state):
+            child = fast_forward(step(state, action))
+            child_score, child_exact = get_depth_limited_score(
+                child, max_depth - 1, evaluator, table)
+            exact = exact and child_exact
+            if get_next_player(child) != player:
+                scores.append(child_score * -1)
+            else:
+                scores.append(child_score)
+
+        score = max(scores)
+
+    if table is not None and exact:
+        table.store(key, score)
+
+    return score, exact
+
+
+def _get_ordered_actions(state: BattleState) -> List[str]:
+    """
+    Return the actions available to the next player in state, most promising
+    first.
+
+    Every special attack in a2_skills deals more damage than its class's
+    normal attack, so it is tried first: it is the move most likely to end the
+    game early and make the remaining branch prunable.
+    """
+    return get_available_actions(state)[::-1]
+
+
+def get_child_score(state: BattleState, action: str,
+                    alpha: float, beta: float,
+                    table: TranspositionTable) -> int:
+    """
+    Return the pruned score of performing action in state for the player
+    performing it, searched within the window (alpha, beta).
+    """
+    child = fast_forward(step(state, action))
+
+    if get_next_player(child) != get_next_player(state):
+        return get_pruned_battle_state_score(child, -beta, -alpha,
+                                             table) * -1
+
+    return get_pruned_battle_state_score(child, alpha, beta, table)
+
+
+def get_pruned_battle_state_score(state: BattleState,
+                                  alpha: float = -math.inf,
+                                  beta: float = math.inf,
+                                  table: TranspositionTable = None) -> int:
+    """
+    Return get_pruned_state_score of the game in state, searching with step()
+    so no game objects are created. Forced moves are skipped as in
+    get_battle_state_score.
+    """
+    lower, upper = -math.inf, math.inf
+    key = get_canonical(state)
+
+    if table is not None:
+        entry = table.lookup(key)
+        if isinstance(entry, int):
+            return entry
+        elif entry is not None:
+            lower, upper = entry
+            if lower >= beta:
+                return lower
+            if upper <= alpha:
+                return upper
+
+    if is_over(state) or is_forced(state):
+        score = get_forced_score(state)
+        if table is not None:
+            table.store(key, score)
+
+        return score
+
+    window_alpha = max(alpha, lower)
+    window_beta = min(beta, upper)
+    score = -math.inf
+
+    for action in _get_ordered_actions(state):
+        score = max(score, get_child_score(state, action,
+                                           max(window_alpha, score),
+                                           window_beta, table))
+        if score >= window_beta:
+            break
+
+    if table is not None:
+        if score <= window_alpha:
+            upper = min(upper, score)
+        if score >= window_beta:
+            lower = max(lower, score)
+        if window_alpha < score < window_beta or lower == upper:
+            table.store(key, score)
+        else:
+            table.store(key, (lower, upper))
+
+    return score
+
+
+# The number of moves below the root of a search whose exact scores the
+# minimax playstyles keep in their search tree between calls to
+# select_attack.
+TREE_DEPTH = 8
+
+# The number of positions a minimax playstyle may visit while pondering one
+# turn of its opponent.
+DEFAULT_PONDER_NODES = 100000
+
+
+def get_tree_score(state: BattleState, tree: Dict[BattleState, int],
+                   depth: int, table: TranspositionTable = None) -> int:
+    """
+    Return get_battle_state_score(state, table).
+
+    Positions fewer than depth moves below state are expanded here and their
+    scores kept in tree as well as table. tree is looked up first. The
+    positions depth moves below state are scored by get_battle_state_score.
+    Scores found in table are copied into tree. Both store positions by
+    their canonical position.
+    """
+    key = get_canonical(state)
+    score = tree.get(key)
+    if score is not None:
+        return score
+
+    if table is not None:
+        score = table.lookup(key)
+        if isinstance(score, int):
+            tree[key] = score
+            return score
+
+    if depth <= 0:
+        return get_battle_state_score(state, table)
+
+    if is_over(state):
+        score = get_terminal_score(state)
+
+    else:
+        player = get_next_player(state)
+        scores = []
+
+        for action in get_available_actions(state):
+            child = step(state, action)
+            child_score = get_tree_score(child, tree, depth - 1, table)
+            if get_next_player(child) != player:
+                scores.append(child_score * -1)
+            else:
+                scores.append(child_score)
+
+        score = max(scores)
+
+    if table is not None:
+        table.store(key, score)
+    tree[key] = score
+    return score
+
+
+def reroot_tree(tree: Dict[BattleState, int], root: BattleState) -> \
+        Dict[BattleState, int]:
+    """
+    Return the part of tree that the game in root can still lead to. A
+    canonical position is kept if root can lead to it or to its mirror.
+    """
+    return {position: score for position, score in tree.items()
+            if can_reach(root, position) or can_reach(root, mirror(position))}
+
+
+def search_battle_state(position: BattleState, table: TranspositionTable,
+                        evaluator: Evaluator = evaluate,
+                        max_depth: int = None,
+                        budget: 'SearchBudget' = None,
+                        tree: Dict[BattleState, int] = None) -> \
+        Union['State', None]:
+    """
+    Return the solved root State of a search of position that looks at
+    most max_depth moves ahead, or None if budget ran out first.
+
+    The game tree is walked with a Stack instead of recursion, as
+    IterativeMinimax does. Positions max_depth moves ahead whose game isn't
+    over are scored by evaluator. Only exact scores are stored in table, so
+    the table is shared safely between searches of any depth. Bounds stored
+    in it by get_pruned_battle_state_score are ignored.
+
+    If tree is given, it is looked up before table, and the exact score of
+    every position fewer than TREE_DEPTH moves below position is kept in it.
+    Both store positions by their canonical position.
+
+    Forced moves are played by fast_forward without pushing a State, and
+    positions where neither player has a choice left are scored by
+    get_forced_score.
+    """
+    first_state = State(position)
+    first_state.actions = get_available_actions(position)
+    st = Stack()
+    st.add(first_state)
+
+    while not st.is_empty():
+        s = st.remove()
+
+        if s.actions:
+            if budget is not None and budget.spend():
+                return None
+
+            st.add(s)
+            action = s.actions.pop(0)
+            child = State(fast_forward(step(s.position, action)), s,
+                          action)
+
+            if is_over(child.position) or is_forced(child.position):
+                child.score = get_forced_score(child.position)
+                table.store(child.key, child.score)
+            elif tree is not None and child.key in tree:
+                child.score = tree[child.key]
+            else:
+                child.score = table.lookup(child.key)
+                if not isinstance(child.score, int):
+                    child.score = None
+
+            if child.score is None and max_depth is not None and \
+                    child.depth >= max_depth:
+                child.score = evaluator(child.position)
+                child.exact = False
+
+            if child.score is None:
+                child.actions = get_available_actions(child.position)
+                st.add(child)
+            else:
+                if tree is not None and child.exact and \
+                        child.depth < TREE_DEPTH:
+                    tree[child.key] = child.score
+                child.fold()
+
+        else:
+            s.score = max(score for _, score in s.scores)
+            if s.exact:
+                table.store(s.key, s.score)
+                if tree is not None and s.depth < TREE_DEPTH:
+                    tree[s.key] = s.score
+            if s.parent is not None:
+                s.fold()
+
+    return first_state
+
+
+def get_iterative_score(state: BattleState,
+                        table: TranspositionTable = None) -> int:
+    """
+    Return get_battle_state_score of the game in state, found with the
+    Stack walk of search_battle_state instead of recursion.
+    """
+    if is_over(state):
+        return get_terminal_score(state)
+
+    if table is None:
+        table = TranspositionTable(DEFAULT_TABLE_SIZE)
+
+    return search_battle_state(state, table).score
+
+
+# The number of positions a SearchBudget lets a search visit between two
+# readings of the clock by default.
+CLOCK_INTERVAL = 64
+
+
+class SearchBudget:
+    """
+    A limit on how long a search may run.
+
+    time_limit - the number of seconds the search may take, or None.
+    node_limit - the number of positions the search may visit, or None.
+    clock_interval - the number of positions visited between two readings
+                     of the clock.
+    nodes - the number of positions visited so far.
+    cancelled - whether the search was told to stop early.
+    """
+    time_limit: Union[float, None]
+    node_limit: Union[int, None]
+    clock_interval: int
+    nodes: int
+    cancelled: bool
+
+    def __init__(self, time_limit: float = None,
+                 node_limit: int = None,
+                 clock_interval: int = CLOCK_INTERVAL) -> None:
+        """
+        Initialize this SearchBudget, starting its clock now.
+
+        Searches whose positions are cheap to visit should keep the default
+        clock_interval. Searches that do a lot of work per position should
+        read the clock more often, or they may run well past time_limit.
+
+        >>> budget = SearchBudget(node_limit=2)
+        >>> [budget.spend() for _ in range(3)]
+        [False, False, True]
+        """
+        self.time_limit = time_limit
+        self.node_limit = node_limit
+        self.clock_interval = clock_interval
+        self.nodes = 0
+        self.cancelled = False
+
+        if time_limit is None:
+            self._deadline = None
+        else:
+            self._deadline = time.perf_counter() + time_limit
+
+    def spend(self) -> bool:
+        """
+        Count one more visited position and return whether this budget is
+        used up.
+
+        The clock is only read every clock_interval positions, which keeps
+        the check cheap.
+        """
+        self.nodes += 1
+
+        if self.cancelled:
+            return True
+
+        if self.node_limit is not None and self.nodes > self.node_limit:
+            return True
+
+        return self._deadline is not None and \
+            self.nodes % self.clock_interval == 0 and \
+            time.perf_counter() > self._deadline
+
+    def cancel(self) -> None:
+        """
+        Use up this budget, so the search spending it stops at the next
+        position it visits. Safe to call from another thread.
+
+        >>> budget = SearchBudget()
+        >>> budget.cancel()
+        >>> budget.spend()
+        True
+        """
+        self.cancelled = True
+
+
+def ponder_battle_state(position: BattleState, table: TranspositionTable,
+                        budget: SearchBudget) -> None:
+    """
+    Solve every position the next player's actions in position lead to,
+    storing the exact scores found in table, until budget runs out.
+    """
+    for action in get_available_actions(position):
+        child = step(position, action)
+        if is_over(child) or \
+                isinstance(table.lookup(get_canonical(child)), int):
+            continue
+        if search_battle_state(child, table, budget=budget) is None:
+            return
+
+
+class Ponderer:
+    """
+    Searches the positions the opponent of a minimax playstyle can leave it
+    in, in a background thread, while the opponent decides on their attack.
+
+    Only one thread searches at a time, and it stops after visiting
+    node_limit positions, so pondering uses at most one core for a bounded
+    time. Its results go into the playstyle's TranspositionTable, which
+    holds a bounded number of positions. The table must not be used by
+    anything else until stop is called.
+
+    A pruned search may have left (lower, upper) bounds in the table as well
+    as exact scores. Pondering treats a position with only bounds as
+    unsolved, and replaces its bounds with the exact score it finds.
+
+    table - the TranspositionTable the exact scores found are stored in.
+    node_limit - the number of positions pondering one position may visit.
+    position - the position last pondered, or None.
+    """
+    table: TranspositionTable
+    node_limit: int
+    position: Union[BattleState, None]
+
+    def __init__(self, table: TranspositionTable,
+                 node_limit: int = DEFAULT_PONDER_NODES) -> None:
+        """
+        Initialize this Ponderer, storing the scores it finds in table.
+        """
+        self.table = table
+        self.node_limit = node_limit
+        self.position = None
+        self._budget = None
+        self._thread = None
+
+    def start(self, position: BattleState) -> None:
+        """
+        Start pondering position in the background, unless it is already
+        being or has already been pondered.
+        """
+        if position == self.position:
+            return
+
+        self.stop()
+        self.position = position
+        self._budget = SearchBudget(node_limit=self.node_limit)
+        self._thread = threading.Thread(
+            target=ponder_battle_state,
+            args=(position, self.table, self._budget), daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """
+        Cancel the search started by start, and wait for it to stop.
+        """
+        if self._thread is not None:
+            self._budget.cancel()
+            self._thread.join()
+            self._thread = None
+
+    def is_pondering(self) -> bool:
+        """
+        Return whether a search started by start is still running.
+        """
+        return self._thread is not None and self._thread.is_alive()
+
+
+class State:
+    """
+    A position on the path IterativeMinimax is searching.
+
+    position - the BattleState of this position.
+    parent - the State this position was reached from, or None.
+    action - the action that led from parent to this position.
+    depth - the number of moves from the root of the search to this position.
+    actions - the actions of this position that are still to be searched.
+    scores - (action, score) for every searched action, scored for the next
+             player in position.
+    score - the score of this position, or None if it isn't solved yet.
+    exact - whether score is exact rather than an estimate from a search
+            that stopped before the end of the game.
+    key - the canonical position this position is stored under.
+    """
+    def __init__(self, position: BattleState, parent: 'State' = None,
+                 action: str = None) -> None:
+        """ Initializes a state"""
+
+        self.position = position
+        self.parent = parent
+        self.action = action
+        self.depth = 0 if parent is None else parent.depth + 1
+        self.actions = []
+        self.scores = []
+        self.score = None
+        self.exact = True
+        self.key = get_canonical(position)
+
+    def fold(self) -> None:
+        """
+        Give the score of this solved State to its parent, from the point of
+        view of the next player in the parent's position.
+        """
+        if get_next_player(self.position) != \
+                get_next_player(self.parent.position):
+            self.parent.scores.append((self.action, self.score * -1))
+        else:
+            self.parent.scores.append((self.action, self.score))
+
+        if not self.exact:
+            self.parent.exact = False
+
+    def get_best_action(self) -> str:
+        """
+        Return the searched action with the highest score in this solved
+        State, preferring the action searched first on ties.
+        """
+        for action, score in self.scores:
+            if score == self.score:
+                return action
+
+        return 'X'
+
+
+def rollout(state: BattleState) -> BattleState:
+    """
+    Return the finished game reached from state when both players pick
+    their actions at random, like RandomPlaystyle.
+    """
+    while not is_over(state):
+        state = step(state, random.choice(get_available_actions(state)))
+
+    return state
+
+
+def get_rollout_reward(state: BattleState, player: int) -> float:
+    """
+    Return the reward of the finished game in state for player: 1 for a
+    win, 0.5 for a tie and 0 for a loss.
+
+    >>> get_rollout_reward(BattleState(('r', 'm'), (40, 0), (9, 100),
+    ...                                (1,), None), 0)
+    1
+    """
+    winner = get_winner(state)
+
+    if winner is None:
+        return 0.5
+    elif winner == player:
+        return 1
+
+    return 0
+
+
+class MCTSNode:
+    """
+    A position in the tree MCTSPlaystyle searches.
+
+    position - the BattleState of this position.
+    parent - the MCTSNode this position was reached from, or None.
+    action - the action that led from parent to this position.
+    untried - the actions of this position that have no child node yet.
+    children - the child node of every tried action, by action.
+    visits - the number of rollouts played through this position.
+    reward - the total reward of those rollouts for the player who performed
+             action.
+    """
+    position: BattleState
+    parent: Union['MCTSNode', None]
+    action: Union[str, None]
+    untried: List[str]
+    children: dict
+    visits: int
+    reward: float
+
+    def __init__(self, position: BattleState, parent: 'MCTSNode' = None,
+                 action: str = None) -> None:
+        """
+        Initialize this MCTSNode with no rollouts played through it.
+
+        >>> node = MCTSNode(BattleState(('r', 'm'), (40, 70), (9, 100),
+        ...                             (0, 1), None))
+        >>> node.untried
+        ['A']
+        """
+        self.position = position
+        self.parent = parent
+        self.action = action
+        self.children = {}
+        self.visits = 0
+        self.reward = 0
+
+        if is_over(position):
+            self.untried = []
+        else:
+            self.untried = get_available_actions(position)
+
+    def expand(self, action: str) -> 'MCTSNode':
+        """
+        Add and return the child node reached by performing action, which
+        must be one of this node's untried actions.
+        """
+        self.untried.remove(action)
+        child = MCTSNode(step(self.position, action), self, action)
+        self.children[action] = child
+        return child
+
+    def select_child(self, exploration: float) -> 'MCTSNode':
+        """
+        Return the child of this node with the highest UCT value, which
+        favours children with a high average reward and children that have
+        been visited rarely.
+        """
+        log_visits = math.log(self.visits)
+
+        return max(self.children.values(),
+                   key=lambda child: child.reward / child.visits +
+                   exploration * math.sqrt(log_visits / child.visits))
+
+
+if __name__ == '__main__':
+    import python_ta
+    python_ta.check_all(config='a2_pyta.txt')
@@ -0,0 +1,23 @@
+"""
+Unittests for the memory IterativeMinimax's search uses in A2.
+"""
+import unittest
+
+from a2_benchmark import measure_search_memory
+
+
+class SearchMemoryUnitTests(unittest.TestCase):
+    def test_peak_memory_follows_depth(self):
+        """
+        Test to make sure the peak memory of a search grows with the length of
+        the game, not with the number of positions visited.
+        """
+        small_nodes, small_peak = measure_search_memory(30)
+        big_nodes, big_peak = measure_search_memory(50)
+
+        self.assertGreater(big_nodes, small_nodes * 10)
+        self.assertLess(big_peak, small_peak * 3)
+
+
+if __name__ == "__main__":
+    unittest.main(exit=False)
@@ -0,0 +1,234 @@
+"""
+The shared-memory transposition table for A2.
+
+A SharedTable is a fixed number of slots in a block of
+multiprocessing.shared_memory, so every worker process of a parallel search
+reads and writes the same scores instead of each solving them again.
+
+Each slot holds two 64-bit words: a check word and a data word. The data
+word packs a score, the total SP left in the position (its depth, since
+every move spends SP) and the generation of the search that stored it. The
+check word is the position's 64-bit hash XORed with the data word. A reader
+only trusts a slot whose check word XORed with its data word gives the hash
+it is looking for, so a slot torn by two processes writing at once is just a
+miss and no lock is needed.
+
+A position's hash picks a bucket of BUCKET_SIZE neighbouring slots (open
+addressing). A store uses the position's own slot or an empty one in the
+bucket if there is one. Otherwise it replaces an entry left by an older
+search, or the entry with the smallest depth, since a deeper position is
+more work to solve again.
+"""
+from hashlib import blake2b
+import weakref
+from multiprocessing import shared_memory
+from typing import Any, Hashable, Union
+
+from a2_battle_state import BattleState
+from a2_retrograde import get_total_sp
+
+# The default number of slots in a SharedTable, 16 bytes each.
+DEFAULT_SHARED_SIZE = 1 << 20
+
+# The number of slots a position may be stored in.
+BUCKET_SIZE = 4
+
+# The widths of the fields of a data word, after the 32-bit score.
+DEPTH_BITS = 16
+GENERATION_BITS = 16
+
+
+def hash_state(state: BattleState) -> int:
+    """
+    Return the 64-bit hash of state used as its key in a SharedTable. It is
+    the same in every process and never 0, which marks an empty slot.
+
+    >>> state = BattleState(('r', 'm'), (4, 7), (9, 10), (0, 1), None)
+    >>> hash_state(state) == hash_state(state)
+    True
+    >>> 0 < hash_state(state) < 1 << 64
+    True
+    """
+    digest = blake2b(repr(tuple(state)).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, 'big') or 1
+
+
+def _pack(score: int, depth: int, generation: int) -> int:
+    """
+    Return the data word holding score, depth and generation.
+
+    >>> _unpack(_pack(-12, 30, 2))
+    (-12, 30, 2)
+    """
+    depth = min(depth, (1 << DEPTH_BITS) - 1)
+    generation %= 1 << GENERATION_BITS
+    return (score & 0xFFFFFFFF) | (depth << 32) | \
+        (generation << (32 + DEPTH_BITS))
+
+
+def _unpack(data: int) -> tuple:
+    """
+    Return the (score, depth, generation) held by the data word data.
+    """
+    score = data & 0xFFFFFFFF
+    if score >= 1 << 31:
+        score -= 1 << 32
+
+    return (score, (data >> 32) & ((1 << DEPTH_BITS) - 1),
+            data >> (32 + DEPTH_BITS))
+
+
+def _free(words: memoryview, memory: 'shared_memory.SharedMemory',
+          owner: bool) -> None:
+    """
+    Release words, detach from memory and unlink memory if owner is True.
+    """
+    words.release()
+    memory.close()
+    if owner:
+        memory.unlink()
+
+
+class SharedTable:
+    """
+    A fixed-size table of exact scores of BattleStates in shared memory.
+
+    Only the process that created a SharedTable may unlink it, which it does
+    on close, when the SharedTable is garbage collected or at exit. hits and
+    misses are counted separately by every process.
+
+    capacity - the number of slots, a power of two.
+    name - the name of the shared memory block, used to attach to it.
+    generation - the generation of the search storing scores, used to
+                 replace entries of older searches first.
+    hits - the number of lookups that found a stored position.
+    misses - the number of lookups that did not find a stored position.
+    """
+    capacity: int
+    name: str
+    generation: int
+    hits: int
+    misses: int
+
+    def __init__(self, capacity: int = DEFAULT_SHARED_SIZE,
+                 name: str = None, generation: int = 0) -> None:
+        """
+        Create a SharedTable with at least capacity slots, or attach to the
+        one with capacity slots whose shared memory block is called name.
+        """
+        size = BUCKET_SIZE
+        while size < capacity:
+            size *= 2
+
+        if name is None:
+            self._memory = shared_memory.SharedMemory(create=True,
+                                                      size=size * 16)
+            self._owner = True
+        else:
+            self._memory = shared_memory.SharedMemory(name=name)
+            self._owner = False
+
+        # The block may be rounded up to a whole number of pages.
+        self._words = self._memory.buf[:size * 16].cast('Q')
+        self._finalizer = weakref.finalize(self, _free, self._words,
+                                           self._memory, self._owner)
+        self.capacity = size
+        self.name = self._memory.name
+        self.generation = generation
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, key: Hashable) -> Union[int, None]:
+        """
+        Return the score stored for the BattleState key, or None if it isn't
+        in this table.
+        """
+        if isinstance(key, BattleState):
+            h = hash_state(key)
+            words = self._words
+            for slot in self._get_bucket(h):
+                data = words[2 * slot + 1]
+                if words[2 * slot] ^ data == h:
+                    self.hits += 1
+                    return _unpack(data)[0]
+
+        self.misses += 1
+        return None
+
+    def store(self, key: Hashable, value: Any) -> None:
+        """
+        Store value for key if it is the exact score of a BattleState,
+        replacing the least valuable entry of its bucket if it is full.
+        """
+        if not isinstance(key, BattleState) or not isinstance(value, int):
+            return
+
+        h = hash_state(key)
+        words = self._words
+        victim, victim_priority = None, None
+
+        for slot in self._get_bucket(h):
+            check, data = words[2 * slot], words[2 * slot + 1]
+            if check ^ data == h or check == data == 0:
+                victim = slot
+                break
+
+            depth, generation = _unpack(data)[1:]
+            if generation != self.generation % (1 << GENERATION_BITS):
+                priority = -1
+            else:
+                priority = depth
+            if victim is None or priority < victim_priority:
+                victim, victim_priority = slot, priority
+
+        data = _pack(value, get_total_sp(key), self.generation)
+        words[2 * victim + 1] = data
+        words[2 * victim] = h ^ data
+
+    def new_search(self) -> None:
+        """
+        Start a new generation, so that the entries stored so far are the
+        first to be replaced.
+        """
+        self.generation += 1
+
+    def close(self) -> None:
+        """
+        Detach this process from the table, and free the shared memory if
+        this process created it. The table can't be used afterwards.
+        """
+        self._finalizer()
+
+    def _get_bucket(self, h: int) -> range:
+        """
+        Return the slots of the bucket of the hash h.
+        """
+        start = (h & (self.capacity - 1)) & ~(BUCKET_SIZE - 1)
+        return range(start, start + BUCKET_SIZE)
+
+    def __len__(self) -> int:
+        """
+        Return the number of slots in use.
+        """
+        words = self._words
+        return sum(1 for slot in range(self.capacity)
+                   if words[2 * slot] != 0 or words[2 * slot + 1] != 0)
+
+    def __reduce__(self) -> tuple:
+        """
+        Pickle this SharedTable as its name, so a process it is sent to
+        attaches to the same shared memory.
+        """
+        return SharedTable, (self.capacity, self.name, self.generation)
+
+    def __repr__(self) -> str:
+        """
+        Return a representation of this SharedTable.
+        """
+        return "SharedTable({}, name={}, hits={}, misses={})".format(
+            self.capacity, self.name, self.hits, self.misses)
+
+
+if __name__ == '__main__':
+    import python_ta
+    python_ta.check_all(config='a2_pyta.txt')
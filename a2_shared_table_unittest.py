@@ -0,0 +1,200 @@
+"""
+Unittests for the shared-memory transposition table in A2.
+"""
+import pickle
+import unittest
+
+from a2_battle_state import BattleState, step, get_available_actions, \
+    get_next_player, mirror
+from a2_game import PLAYSTYLE_CLASSES
+from a2_parallel import get_frontier, get_parallel_action_scores, \
+    solve_positions
+from a2_search import get_battle_state_score
+from a2_shared_table import SharedTable, BUCKET_SIZE, hash_state
+from a2_test_helpers import make_battle_queue
+
+STATE = BattleState(('r', 'm'), (60, 60), (60, 60), (0, 1), None)
+
+
+def same_bucket(table: SharedTable, count: int) -> list:
+    """
+    Return count positions whose hashes fall in the same bucket of table,
+    each with less SP than the one before.
+    """
+    positions = {}
+    sp = 60
+    while True:
+        position = STATE._replace(sp=(sp, 60))
+        bucket = (hash_state(position) & (table.capacity - 1)) // BUCKET_SIZE
+        positions.setdefault(bucket, []).append(position)
+        if len(positions[bucket]) == count:
+            return positions[bucket]
+        sp -= 1
+
+
+def get_serial_action_scores(state: BattleState) -> dict:
+    """
+    Return the score of every action available in state for its next player,
+    each found by a serial search of its own.
+    """
+    scores = {}
+    for action in get_available_actions(state):
+        child = step(state, action)
+        scores[action] = get_battle_state_score(child)
+        if get_next_player(child) != get_next_player(state):
+            scores[action] *= -1
+
+    return scores
+
+
+class SharedTableUnitTests(unittest.TestCase):
+    def setUp(self):
+        """
+        Create a small SharedTable for a test.
+        """
+        self.table = SharedTable(64)
+
+    def tearDown(self):
+        """
+        Free the SharedTable of a test.
+        """
+        self.table.close()
+
+    def test_store_and_lookup(self):
+        """
+        Test to make sure exact scores are stored, and bounds and other keys
+        are not.
+        """
+        other = STATE._replace(hp=(1, 1))
+        self.table.store(STATE, -7)
+        self.table.store(other, (0, 3))
+        self.table.store(5, 2)
+
+        self.assertEqual(-7, self.table.lookup(STATE))
+        self.assertIsNone(self.table.lookup(other))
+        self.assertIsNone(self.table.lookup(5))
+        self.assertEqual(1, len(self.table))
+
+    def test_attach(self):
+        """
+        Test to make sure a SharedTable sent to another process sees the same
+        slots.
+        """
+        copy = pickle.loads(pickle.dumps(self.table))
+        copy.store(STATE, 12)
+
+        self.assertEqual(12, self.table.lookup(STATE))
+        copy.close()
+        self.assertEqual(12, self.table.lookup(STATE))
+
+    def test_torn_slot_is_a_miss(self):
+        """
+        Test to make sure a slot whose words don't match is never trusted.
+        """
+        self.table.store(STATE, 12)
+        words = self.table._words
+        for slot in range(self.table.capacity):
+            if words[2 * slot] != 0:
+                words[2 * slot + 1] ^= 1
+
+        self.assertIsNone(self.table.lookup(STATE))
+
+    def test_replacement_by_age(self):
+        """
+        Test to make sure a full bucket replaces entries of older searches
+        before entries of the current one.
+        """
+        positions = same_bucket(self.table, BUCKET_SIZE + 2)
+        for position in positions[:BUCKET_SIZE]:
+            self.table.store(position, 1)
+
+        self.table.new_search()
+        self.table.store(positions[BUCKET_SIZE], 2)
+        self.table.store(positions[BUCKET_SIZE + 1], 3)
+
+        self.assertEqual(2, self.table.lookup(positions[BUCKET_SIZE]))
+        self.assertEqual(3, self.table.lookup(positions[BUCKET_SIZE + 1]))
+        stored = [self.table.lookup(position) for position in positions]
+        self.assertEqual(BUCKET_SIZE, len(stored) - stored.count(None))
+
+    def test_replacement_by_depth(self):
+        """
+        Test to make sure a full bucket of one search replaces the entry with
+        the least SP left.
+        """
+        positions = same_bucket(self.table, BUCKET_SIZE + 1)
+        for position in positions:
+            self.table.store(position, 1)
+
+        self.assertIsNone(self.table.lookup(positions[BUCKET_SIZE - 1]))
+        self.assertEqual(1, self.table.lookup(positions[BUCKET_SIZE]))
+        for position in positions[:BUCKET_SIZE - 1]:
+            self.assertEqual(1, self.table.lookup(position))
+
+    def test_workers_share_scores(self):
+        """
+        Test to make sure the workers of a parallel search store what they
+        solve in the SharedTable, and the search gives the serial scores.
+        """
+        table = SharedTable()
+        frontier = get_frontier(STATE, 3)
+        scores = solve_positions(frontier, get_battle_state_score, 2, table)
+
+        self.assertGreater(len(table), len(frontier))
+        for position, score in scores.items():
+            self.assertEqual(get_battle_state_score(position), score)
+            self.assertEqual(score, table.lookup(position))
+
+        self.assertEqual(
+            get_battle_state_score(STATE),
+            max(get_parallel_action_scores(STATE, get_battle_state_score, 2,
+                                           shared=table).values()))
+        table.close()
+
+    def test_mirror_matchups_match_serial(self):
+        """
+        Test to make sure parallel searches of same-class games and their
+        mirrors, sharing one SharedTable, give the serial scores, including
+        games whose queue runs out.
+        """
+        table = SharedTable()
+        for state in [BattleState(('r', 'r'), (13, 28), (23, 10), (0, 1),
+                                  None),
+                      BattleState(('v', 'v'), (30, 56), (40, 25), (0, 1),
+                                  None),
+                      BattleState(('m', 'm'), (20, 25), (18, 30), (1, 0),
+                                  None)]:
+            for position in [mirror(state), state]:
+                expected = get_serial_action_scores(position)
+                for depth in range(1, 4):
+                    self.assertEqual(expected, get_parallel_action_scores(
+                        position, get_battle_state_score, 2, depth,
+                        shared=table), "Mismatch for {}".format(position))
+        table.close()
+
+    def test_playstyles_keep_table(self):
+        """
+        Test to make sure a parallel minimax playstyle makes one SharedTable,
+        shares it with its copies and starts a new generation in it for
+        every search.
+        """
+        for constructor in [PLAYSTYLE_CLASSES['mr'], PLAYSTYLE_CLASSES['mi']]:
+            bq = make_battle_queue('v', 'r', (50, 60, 45, 50))
+            playstyle = constructor(bq, workers=2, split_depth=2)
+            self.assertIsNone(playstyle.shared)
+
+            playstyle.select_attack()
+            shared = playstyle.shared
+            self.assertIsNotNone(shared)
+            self.assertEqual(1, shared.generation)
+
+            bq.peek().enemy.set_hp(40)
+            copy = playstyle.copy(bq)
+            copy.select_attack()
+            self.assertIs(shared, copy.shared)
+            self.assertEqual(2, shared.generation)
+            shared.close()
+
+
+if __name__ == "__main__":
+    unittest.main(exit=False)
@@ -25,6 +25,12 @@ class Skill:
         """
         return self._cost
 
+    def get_damage(self) -> int:
+        """
+        Return the damage this Skill deals before the target's defense.
+        """
+        return self._damage
+
     def use(self, caster: 'Character', target: 'Character') -> None:
         """
         Makes caster use this Skill on target.
@@ -0,0 +1,81 @@
+"""
+Unittests for reusing the search tree of the minimax playstyles in A2 between
+calls to select_attack.
+"""
+import unittest
+
+from a2_game import PLAYSTYLE_CLASSES
+from a2_search import reroot_tree
+from a2_battle_queue import BattleQueue
+from a2_battle_state import from_battle_queue, can_reach
+from a2_test_helpers import make_battle_queue
+RecursiveMinimax = PLAYSTYLE_CLASSES['mr']
+IterativeMinimax = PLAYSTYLE_CLASSES['mi']
+
+
+def play(bq: BattleQueue, action: str) -> None:
+    """
+    Perform action with the next character in bq, the way
+    a2_game.perform_attack does.
+    """
+    character = bq.peek()
+    if action == 'A':
+        character.attack()
+    else:
+        character.special_attack()
+    if character.get_available_actions() != []:
+        bq.remove()
+
+
+class SubtreeReuseUnitTests(unittest.TestCase):
+    def test_game_matches_fresh_searches(self):
+        """
+        Test to make sure a playstyle that keeps its tree for a whole game
+        picks the same attack as a new playstyle every turn, and only keeps
+        positions the game can still reach.
+        """
+        for constructor in [RecursiveMinimax, IterativeMinimax]:
+            bq = make_battle_queue('v', 'r', (30, 40, 40, 40))
+            playstyle = constructor(bq)
+
+            while not bq.is_over():
+                action = playstyle.select_attack()
+                self.assertEqual(constructor(bq).select_attack(), action)
+
+                root = from_battle_queue(bq)
+                self.assertTrue(all(can_reach(root, position)
+                                    for position in playstyle.tree))
+                play(bq, action)
+
+    def test_tree_is_reused(self):
+        """
+        Test to make sure the next turn is answered from the kept tree,
+        without searching any new positions.
+        """
+        for constructor in [RecursiveMinimax, IterativeMinimax]:
+            bq = make_battle_queue('m', 'r', (40, 30, 40, 30))
+            playstyle = constructor(bq)
+            play(bq, playstyle.select_attack())
+            size = len(playstyle.tree)
+
+            playstyle.table.clear()
+            playstyle.select_attack()
+            self.assertEqual(0, playstyle.table.misses)
+            self.assertLessEqual(len(playstyle.tree), size)
+
+    def test_reroot_tree_drops_unreachable(self):
+        """
+        Test to make sure reroot_tree only keeps positions the new root can
+        lead to.
+        """
+        bq = make_battle_queue('r', 'm', (40, 30, 40, 30))
+        root = from_battle_queue(bq)
+        spent = root._replace(sp=(root.sp[0] - 3, root.sp[1]))
+        tree = {root: 1, spent: 2}
+
+        self.assertEqual({spent: 2}, reroot_tree(tree, spent))
+        self.assertEqual(tree, reroot_tree(tree, root))
+
+
+if __name__ == "__main__":
+    unittest.main(exit=False)
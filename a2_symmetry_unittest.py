@@ -0,0 +1,152 @@
+"""
+Unittests for storing mirrored positions under one canonical position in A2.
+"""
+import random
+import unittest
+from typing import Union
+
+from a2_battle_state import BattleState, MIN_COSTS, mirror, get_canonical, \
+    step, get_available_actions, is_over, get_terminal_score
+from a2_search import get_battle_state_score, search_battle_state, \
+    get_pruned_battle_state_score, get_iterative_score
+from a2_retrograde import solve, get_reachable_states
+from a2_transposition_table import TranspositionTable
+
+
+def random_position(rng: random.Random, class_id: str) -> BattleState:
+    """
+    Return a position reached by playing a few random moves from the start of
+    a game between two characters of class_id.
+    """
+    state = BattleState((class_id, class_id), (40, 40),
+                        (rng.randint(30, 60), rng.randint(30, 60)), (0, 1),
+                        None)
+    for _ in range(rng.randint(0, 4)):
+        if is_over(state):
+            break
+        state = step(state, rng.choice(get_available_actions(state)))
+
+    return state
+
+
+def random_low_sp_position(rng: random.Random, class_id: str) -> \
+        Union[BattleState, None]:
+    """
+    Return a position between two characters of class_id with so little SP
+    that its queue often runs out before the game is over, or None if
+    neither of them can act.
+    """
+    sp = (rng.randint(0, 40), rng.randint(0, 40))
+    queue = [0, 1]
+    while queue and sp[queue[0]] < MIN_COSTS[class_id]:
+        queue.pop(0)
+    if not queue:
+        return None
+
+    return BattleState((class_id, class_id),
+                       (rng.randint(1, 30), rng.randint(1, 30)), sp,
+                       tuple(queue), None)
+
+
+class SymmetryUnitTests(unittest.TestCase):
+    def test_mirror_has_same_score(self):
+        """
+        Test to make sure a position and its mirror have the same score for
+        their next player when both players have the same class.
+        """
+        rng = random.Random(148)
+        for _ in range(30):
+            state = random_position(rng, rng.choice('mrv'))
+
+            self.assertEqual(get_battle_state_score(state),
+                             get_battle_state_score(mirror(state)))
+            self.assertEqual(get_canonical(state),
+                             get_canonical(mirror(state)))
+
+    def test_different_classes_not_mirrored(self):
+        """
+        Test to make sure positions of different classes are their own
+        canonical position.
+        """
+        state = BattleState(('m', 'r'), (40, 30), (20, 10), (1, 0), None)
+
+        self.assertIs(state, get_canonical(state))
+
+    def test_table_shares_mirrors(self):
+        """
+        Test to make sure a search stores a position and its mirror once, and
+        finds the score of a mirror it never searched.
+        """
+        state = BattleState(('r', 'r'), (40, 40), (40, 40), (0, 1), None)
+        table = TranspositionTable()
+        search_battle_state(state, table)
+        positions = get_reachable_states(state)
+
+        self.assertLessEqual(len(table), len(positions))
+        self.assertEqual(get_battle_state_score(state),
+                         get_battle_state_score(mirror(state), table))
+
+    def test_empty_queue_not_mirrored(self):
+        """
+        Test to make sure a finished game with an empty queue isn't stored
+        under the key of its mirror, whose score has the opposite sign.
+        """
+        state = BattleState(('r', 'r'), (0, 3), (0, 1), (), None)
+
+        self.assertEqual(-3, get_terminal_score(state))
+        self.assertEqual(3, get_terminal_score(mirror(state)))
+        self.assertNotEqual(get_canonical(state),
+                            get_canonical(mirror(state)))
+
+    def test_mirror_through_one_table(self):
+        """
+        Test to make sure every search scores a position correctly after its
+        mirror was searched on the same table, including games whose queue
+        runs out.
+        """
+        searches = [get_battle_state_score, get_pruned_battle_state_score,
+                    get_iterative_score]
+        state = BattleState(('r', 'r'), (13, 28), (23, 10), (0, 1), None)
+        table = TranspositionTable()
+        get_battle_state_score(mirror(state), table)
+        self.assertEqual(3, get_battle_state_score(state, table))
+
+        rng = random.Random(21)
+        for _ in range(60):
+            state = random_low_sp_position(rng, rng.choice('mrv'))
+            if state is None:
+                continue
+            expected = get_battle_state_score(state)
+            for search in searches:
+                table = TranspositionTable()
+                search(mirror(state), table=table)
+                self.assertEqual(expected, search(state, table=table),
+                                 "Mismatch for {}".format(state))
+
+    def test_solve_stores_fewer_positions(self):
+        """
+        Test to make sure the retrograde solver stores fewer positions of a
+        mirror matchup than there are distinct reachable positions, and that
+        every one of them is canonical.
+        """
+        state = BattleState(('r', 'r'), (60, 60), (60, 60), (0, 1), None)
+        seen = {state}
+        to_visit = [state]
+        while to_visit:
+            position = to_visit.pop()
+            if is_over(position):
+                continue
+            for action in get_available_actions(position):
+                child = step(position, action)
+                if child not in seen:
+                    seen.add(child)
+                    to_visit.append(child)
+
+        scores = solve(state)
+        self.assertLess(len(scores), len(seen) * 0.75)
+        self.assertTrue(all(get_canonical(position) == position
+                            for position in scores))
+
+
+if __name__ == "__main__":
+    unittest.main(exit=False)
@@ -0,0 +1,216 @@
+"""
+Endgame tablebases for A2.
+
+A tablebase is a file holding the solved score and best action of every
+position of one matchup (two classes on one kind of BattleQueue), usually
+every position reachable from one game as found by a2_retrograde.solve.
+
+The file is a header followed by a fixed number of fixed-width records,
+one slot per record. A position's slot is found from its HP, SP and queue
+(packed into bits like a PackedBattleQueue), with linear probing on
+collisions. The table is never more than half full, so a lookup reads one
+or two records. Tablebases are opened with mmap, so a lookup doesn't read
+the whole file and every process that opens the same file shares its pages.
+"""
+import mmap
+import struct
+from typing import Dict, Tuple, Union
+
+from a2_battle_state import BattleState, is_over, get_canonical
+from a2_retrograde import solve, get_best_action
+from a2_zobrist import MASK
+
+MAGIC = b'A2TB'
+# Version 2 stored every position by its canonical position. Version 3
+# stores positions with an empty queue by themselves, since their scores
+# have the opposite sign of their mirrors'.
+VERSION = 3
+
+# magic, version, class ids, whether the queue is restricted, capacity.
+HEADER = struct.Struct('<4sB2s?I')
+
+# HP and SP of both players, the queue and flags packed into bits, the
+# length of the queue plus one (0 for an empty slot), the score and the
+# best action (0 if the game is over).
+RECORD = struct.Struct('<IIIIQQBbxxi')
+
+# The longest queue whose order fits in the bits of a record.
+MAX_QUEUE_LENGTH = 64
+
+_ACTIONS = {'A': 1, 'S': 2}
+
+
+def _pack_bits(values: Tuple[Union[int, bool], ...]) -> int:
+    """
+    Return values packed into an int, the first value in the lowest bit.
+
+    >>> _pack_bits((0, 1, 1))
+    6
+    """
+    bits = 0
+    for i, value in enumerate(values):
+        if value:
+            bits |= 1 << i
+
+    return bits
+
+
+def _get_key(state: BattleState) -> tuple:
+    """
+    Return the fields of the record of state that identify it.
+    """
+    flags = 0 if state.flags is None else _pack_bits(state.flags)
+    return (state.hp[0], state.hp[1], state.sp[0], state.sp[1],
+            _pack_bits(state.queue), flags, len(state.queue) + 1)
+
+
+def _get_slot(key: tuple, capacity: int) -> int:
+    """
+    Return the first slot to probe for key in a table with capacity slots,
+    which must be a power of two. The slot only depends on key, so it is the
+    same in every process and every run of the program.
+    """
+    h = 0
+    for field in key:
+        h = ((h ^ field) * 0x100000001B3) & MASK
+        h ^= h >> 29
+
+    return h & (capacity - 1)
+
+
+def fits(state: BattleState) -> bool:
+    """
+    Return whether state can be stored in a tablebase.
+
+    >>> fits(BattleState(('r', 'm'), (40, 70), (9, 100), (0, 1), None))
+    True
+    """
+    return len(state.queue) <= MAX_QUEUE_LENGTH and \
+        max(state.hp + state.sp) < 1 << 32
+
+
+def write_tablebase(path: str, scores: Dict[BattleState, int]) -> int:
+    """
+    Write a tablebase holding every position in scores to path, and return
+    the number of positions written.
+
+    scores must be the result of a2_retrograde.solve, or hold the children
+    of every position it holds that isn't over. Positions that don't fit in
+    a record are left out.
+
+    Raise a ValueError if scores holds positions of different matchups.
+    """
+    positions = [state for state in scores if fits(state)]
+    matchups = {(state.classes, state.flags is not None) for state in scores}
+    if len(matchups) > 1:
+        raise ValueError("A tablebase can only hold one matchup.")
+    if not matchups:
+        raise ValueError("A tablebase must hold at least one position.")
+    classes, restricted = matchups.pop()
+
+    capacity = 1
+    while capacity < 2 * len(positions) + 1:
+        capacity *= 2
+
+    data = bytearray(HEADER.size + capacity * RECORD.size)
+    HEADER.pack_into(data, 0, MAGIC, VERSION, ''.join(classes).encode(),
+                     restricted, capacity)
+
+    for state in positions:
+        key = _get_key(state)
+        slot = _get_slot(key, capacity)
+        while data[HEADER.size + slot * RECORD.size + 32] != 0:
+            slot = (slot + 1) & (capacity - 1)
+
+        if is_over(state):
+            action = 0
+        else:
+            action = _ACTIONS[get_best_action(scores, state)]
+        RECORD.pack_into(data, HEADER.size + slot * RECORD.size, *key,
+                         action, scores[state])
+
+    with open(path, 'wb') as file:
+        file.write(data)
+
+    return len(positions)
+
+
+def build_tablebase(path: str, state: BattleState) -> int:
+    """
+    Solve every position reachable from state and write them to a tablebase
+    at path, returning the number of positions written.
+    """
+    return write_tablebase(path, solve(state))
+
+
+class Tablebase:
+    """
+    A tablebase file opened for lookups.
+
+    classes - the class ids of the players in every position of this
+              tablebase.
+    restricted - whether the positions are on a RestrictedBattleQueue.
+    capacity - the number of record slots in the file.
+    """
+    classes: Tuple[str, str]
+    restricted: bool
+    capacity: int
+
+    def __init__(self, path: str) -> None:
+        """
+        Open the tablebase at path.
+
+        Raise a ValueError if the file at path isn't a tablebase.
+        """
+        with open(path, 'rb') as file:
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if len(self._map) < HEADER.size:
+            self._map.close()
+            raise ValueError("{} is not a tablebase.".format(path))
+
+        magic, version, classes, restricted, capacity = \
+            HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION or \
+                len(self._map) != HEADER.size + capacity * RECORD.size:
+            self._map.close()
+            raise ValueError("{} is not a tablebase.".format(path))
+
+        self.classes = tuple(classes.decode())
+        self.restricted = restricted
+        self.capacity = capacity
+
+    def lookup(self, state: BattleState) -> Union[Tuple[int, str], None]:
+        """
+        Return the score of state for its next player and the best action
+        in state ('X' if the game is over), or None if state is not in this
+        tablebase. state is looked up by its canonical position.
+        """
+        state = get_canonical(state)
+        if state.classes != self.classes or \
+                (state.flags is not None) != self.restricted or \
+                not fits(state):
+            return None
+
+        key = _get_key(state)
+        slot = _get_slot(key, self.capacity)
+
+        while True:
+            record = RECORD.unpack_from(self._map,
+                                        HEADER.size + slot * RECORD.size)
+            if record[6] == 0:
+                return None
+            if record[:7] == key:
+                return record[8], 'XAS'[record[7]]
+            slot = (slot + 1) & (self.capacity - 1)
+
+    def close(self) -> None:
+        """
+        Close the file of this Tablebase. It can't be used afterwards.
+        """
+        self._map.close()
+
+
+if __name__ == '__main__':
+    import python_ta
+    python_ta.check_all(config='a2_pyta.txt')
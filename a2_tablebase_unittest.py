@@ -0,0 +1,124 @@
+"""
+Unittests for the tablebases and TablebasePlaystyle in A2.
+"""
+import os
+import random
+import tempfile
+import unittest
+
+from a2_game import BATTLE_QUEUE_CLASSES, PLAYSTYLE_CLASSES
+from a2_playstyle import TablebasePlaystyle
+from a2_search import get_battle_state_score
+from a2_battle_state import BattleState, from_battle_queue, is_over, mirror
+from a2_retrograde import solve, get_best_action, get_reachable_states
+from a2_tablebase import Tablebase, build_tablebase, write_tablebase, \
+    VERSION
+from a2_test_helpers import make_battle_queue
+RecursiveMinimax = PLAYSTYLE_CLASSES['mr']
+
+
+class TablebaseUnitTests(unittest.TestCase):
+    def setUp(self):
+        """
+        Make a directory for the tablebase files of a test.
+        """
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'rm.a2tb')
+
+    def tearDown(self):
+        """
+        Delete the tablebase files of a test.
+        """
+        self.directory.cleanup()
+
+    def test_round_trip(self):
+        """
+        Test to make sure every position written to a tablebase is read back
+        with its score and best action, for both kinds of BattleQueue.
+        """
+        rng = random.Random(148)
+        for bq_class in 'nr':
+            bq = make_battle_queue(rng.choice('mrv'), rng.choice('mrv'),
+                                   (50, 50, 50, 50),
+                                   BATTLE_QUEUE_CLASSES[bq_class])
+            scores = solve(from_battle_queue(bq))
+            self.assertEqual(len(scores), write_tablebase(self.path, scores))
+
+            tablebase = Tablebase(self.path)
+            for state, score in scores.items():
+                if is_over(state):
+                    self.assertEqual((score, 'X'), tablebase.lookup(state))
+                else:
+                    self.assertEqual((score, get_best_action(scores, state)),
+                                     tablebase.lookup(state))
+            tablebase.close()
+
+    def test_miss(self):
+        """
+        Test to make sure positions that aren't in a tablebase are not found.
+        """
+        state = BattleState(('r', 'm'), (40, 40), (40, 40), (0, 1), None)
+        build_tablebase(self.path, state)
+        tablebase = Tablebase(self.path)
+        self.assertIsNone(tablebase.lookup(state._replace(hp=(41, 40))))
+        self.assertIsNone(tablebase.lookup(state._replace(
+            classes=('m', 'r'))))
+        self.assertIsNone(tablebase.lookup(state._replace(flags=(True,
+                                                                 True))))
+        tablebase.close()
+
+    def test_not_a_tablebase(self):
+        """
+        Test to make sure opening a file that isn't a tablebase fails.
+        """
+        with open(self.path, 'wb') as file:
+            file.write(b'not a tablebase')
+        self.assertRaises(ValueError, Tablebase, self.path)
+
+    def test_old_version(self):
+        """
+        Test to make sure a tablebase written by an older version, whose keys
+        may be stored differently, fails to open.
+        """
+        state = BattleState(('r', 'r'), (30, 40), (20, 30), (0, 1), None)
+        for version in range(1, VERSION):
+            write_tablebase(self.path, solve(state))
+            with open(self.path, 'r+b') as file:
+                file.seek(4)
+                file.write(bytes([version]))
+            self.assertRaises(ValueError, Tablebase, self.path)
+
+    def test_mirror_matchup(self):
+        """
+        Test to make sure every position of a Rogue vs Rogue tablebase and its
+        mirror are found with the score of a search of their own, including
+        games whose queue runs out.
+        """
+        state = BattleState(('r', 'r'), (13, 28), (23, 10), (0, 1), None)
+        build_tablebase(self.path, state)
+        tablebase = Tablebase(self.path)
+        for position in get_reachable_states(state):
+            for searched in [position, mirror(position)]:
+                self.assertEqual(get_battle_state_score(searched),
+                                 tablebase.lookup(searched)[0])
+        tablebase.close()
+
+    def test_playstyle_matches_minimax(self):
+        """
+        Test to make sure the TablebasePlaystyle picks the attack
+        RecursiveMinimax picks, whether or not the game is in its tablebase.
+        """
+        bq = make_battle_queue('r', 'm', (60, 60, 60, 60))
+        build_tablebase(self.path, from_battle_queue(bq))
+        playstyle = TablebasePlaystyle(bq, self.path)
+        self.assertEqual(RecursiveMinimax(bq).select_attack(),
+                         playstyle.select_attack())
+
+        other = make_battle_queue('v', 'm', (60, 60, 60, 60))
+        self.assertEqual(RecursiveMinimax(other).select_attack(),
+                         playstyle.copy(other).select_attack())
+        playstyle.tablebase.close()
+
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
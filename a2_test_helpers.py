@@ -0,0 +1,41 @@
+"""
+Helpers shared by the unittests of A2.
+"""
+from a2_battle_queue import BattleQueue
+from a2_game import CHARACTER_CLASSES
+from a2_playstyle import ManualPlaystyle
+from a2_skill_decision_tree import create_default_tree
+
+
+def make_battle_queue(p1_class: str, p2_class: str, stats: tuple = None,
+                      bq_class: type = BattleQueue) -> BattleQueue:
+    """
+    Return a bq_class holding a p1_class and a p2_class character named P1
+    and P2, who use ManualPlaystyles. Sorcerers get the default
+    SkillDecisionTree.
+
+    If stats is given, the HP and SP of the characters are set from it
+    (P1 HP, P1 SP, P2 HP, P2 SP).
+
+    >>> make_battle_queue('r', 'm', (40, 30, 20, 10))
+    P1 (Rogue): 40/30 -> P2 (Mage): 20/10
+    """
+    bq = bq_class()
+    p1 = CHARACTER_CLASSES[p1_class]("P1", bq, ManualPlaystyle(bq))
+    p2 = CHARACTER_CLASSES[p2_class]("P2", bq, ManualPlaystyle(bq))
+    p1.enemy = p2
+    p2.enemy = p1
+    bq.add(p1)
+    bq.add(p2)
+
+    for character, class_id in [(p1, p1_class), (p2, p2_class)]:
+        if class_id == 's':
+            character.set_skill_decision_tree(create_default_tree())
+
+    if stats is not None:
+        p1.set_hp(stats[0])
+        p1.set_sp(stats[1])
+        p2.set_hp(stats[2])
+        p2.set_sp(stats[3])
+
+    return bq
@@ -0,0 +1,124 @@
+"""
+The TranspositionTable class for A2.
+
+Many different orders of moves lead to the same position in a battle, so the
+minimax playstyles cache the score of every position they solve in a
+TranspositionTable and look it up before searching that position again.
+"""
+from collections import OrderedDict
+from typing import Any, Hashable
+
+DEFAULT_TABLE_SIZE = 200000
+
+
+class TranspositionTable:
+    """
+    A size-capped cache from position keys to scores. When the cache is full,
+    the least recently used position is evicted.
+
+    max_size - the maximum number of positions kept in this table.
+    hits - the number of lookups that found a stored position.
+    misses - the number of lookups that did not find a stored position.
+    """
+    max_size: int
+    hits: int
+    misses: int
+
+    def __init__(self, max_size: int = DEFAULT_TABLE_SIZE) -> None:
+        """
+        Initialize this TranspositionTable so that it holds at most max_size
+        positions.
+
+        >>> t = TranspositionTable(10)
+        >>> len(t)
+        0
+        """
+        if max_size < 1:
+            raise ValueError("A TranspositionTable must hold at least one " +
+                             "position.")
+
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def lookup(self, key: Hashable) -> Any:
+        """
+        Return the value stored for key, or None if key is not in this table.
+        A successful lookup marks key as the most recently used position.
+
+        >>> t = TranspositionTable(10)
+        >>> t.lookup('a') is None
+        True
+        >>> t.store('a', 5)
+        >>> t.lookup('a')
+        5
+        >>> (t.hits, t.misses)
+        (1, 1)
+        """
+        value = self._entries.get(key)
+
+        if value is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return value
+
+    def store(self, key: Hashable, value: Any) -> None:
+        """
+        Store value for key, evicting the least recently used position if this
+        table is full.
+
+        >>> t = TranspositionTable(2)
+        >>> t.store('a', 1)
+        >>> t.store('b', 2)
+        >>> t.lookup('a')
+        1
+        >>> t.store('c', 3)
+        >>> t.lookup('b') is None
+        True
+        >>> len(t)
+        2
+        """
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+
+        if len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """
+        Remove every position from this table and reset its counters.
+
+        >>> t = TranspositionTable(10)
+        >>> t.store('a', 1)
+        >>> t.clear()
+        >>> len(t)
+        0
+        """
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        """
+        Return the number of positions stored in this table.
+        """
+        return len(self._entries)
+
+    def __repr__(self) -> str:
+        """
+        Return a representation of this TranspositionTable.
+
+        >>> TranspositionTable(10)
+        TranspositionTable(0/10, hits=0, misses=0)
+        """
+        return "TranspositionTable({}/{}, hits={}, misses={})".format(
+            len(self._entries), self.max_size, self.hits, self.misses)
+
+
+if __name__ == '__main__':
+    import python_ta
+    python_ta.check_all(config='a2_pyta.txt')
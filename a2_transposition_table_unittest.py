@@ -0,0 +1,130 @@
+"""
+Unittests for the TranspositionTable used by the minimax playstyles in A2.
+"""
+import unittest
+
+from a2_game import CHARACTER_CLASSES, PLAYSTYLE_CLASSES
+from a2_playstyle import get_state_score, ManualPlaystyle
+from a2_battle_queue import BattleQueue
+from a2_transposition_table import TranspositionTable
+MageConstructor = CHARACTER_CLASSES['m']
+RogueConstructor = CHARACTER_CLASSES['r']
+RecursiveMinimax = PLAYSTYLE_CLASSES['mr']
+IterativeMinimax = PLAYSTYLE_CLASSES['mi']
+
+
+class TranspositionTableUnitTests(unittest.TestCase):
+    def setUp(self):
+        """
+        Sets up a Battle Queue containing a Rogue and a Mage for all of the
+        unittests.
+        """
+        self.battle_queue = BattleQueue()
+        playstyle = ManualPlaystyle(self.battle_queue)
+
+        self.p1 = RogueConstructor("R", self.battle_queue, playstyle)
+        self.p2 = MageConstructor("M", self.battle_queue, playstyle)
+
+        self.p1.enemy = self.p2
+        self.p2.enemy = self.p1
+
+        self.battle_queue.add(self.p1)
+        self.battle_queue.add(self.p2)
+
+    def tearDown(self):
+        """
+        Delete the attributes that were created in setUp.
+        """
+        del self.battle_queue
+        del self.p1
+        del self.p2
+
+    def test_evicts_least_recently_used(self):
+        """
+        Test to make sure a full table evicts the position that was used the
+        longest time ago.
+        """
+        table = TranspositionTable(2)
+        table.store('a', 1)
+        table.store('b', 2)
+        table.lookup('a')
+        table.store('c', 3)
+
+        self.assertEqual(2, len(table))
+        self.assertEqual(1, table.lookup('a'))
+        self.assertIsNone(table.lookup('b'),
+                          "The least recently used position should have " +
+                          "been evicted.")
+        self.assertEqual(3, table.lookup('c'))
+
+    def test_counts_hits_and_misses(self):
+        """
+        Test to make sure lookups are counted as hits or misses.
+        """
+        table = TranspositionTable(10)
+        table.lookup('a')
+        table.store('a', 0)
+        table.lookup('a')
+        table.lookup('a')
+
+        self.assertEqual((2, 1), (table.hits, table.misses))
+
+    def test_get_state_score_with_table(self):
+        """
+        Test to make sure get_state_score gives the same score with a table,
+        and that solving the same position again is a single lookup.
+        """
+        self.p1.set_sp(40)
+        self.p2.set_sp(40)
+        table = TranspositionTable()
+        expected = get_state_score(self.battle_queue)
+        actual = get_state_score(self.battle_queue, table)
+
+        self.assertEqual(expected, actual)
+        self.assertGreater(len(table), 1)
+
+        hits = table.hits
+        self.assertEqual(expected, get_state_score(self.battle_queue, table))
+        self.assertEqual(hits + 1, table.hits)
+
+    def test_table_size_is_capped(self):
+        """
+        Test to make sure a search never stores more positions than the
+        table's size.
+        """
+        self.p1.set_sp(40)
+        self.p2.set_sp(40)
+        table = TranspositionTable(5)
+        expected = get_state_score(self.battle_queue)
+
+        self.assertEqual(expected, get_state_score(self.battle_queue, table))
+        self.assertEqual(5, len(table))
+
+    def test_minimax_playstyles_agree(self):
+        """
+        Test to make sure both minimax playstyles fill their tables and pick
+        the same attack.
+        """
+        self.p1.set_hp(20)
+        self.p2.set_hp(27)
+        recursive = RecursiveMinimax(self.battle_queue)
+        iterative = IterativeMinimax(self.battle_queue)
+
+        self.assertEqual('S', recursive.select_attack())
+        self.assertEqual('S', iterative.select_attack())
+        self.assertGreater(len(recursive.table), 0)
+        self.assertGreater(len(iterative.table), 0)
+
+    def test_copy_shares_table(self):
+        """
+        Test to make sure copies of a minimax playstyle share its table.
+        """
+        playstyle = RecursiveMinimax(self.battle_queue, 50)
+        copy = playstyle.copy(self.battle_queue.copy())
+
+        self.assertIs(playstyle.table, copy.table)
+        self.assertEqual(50, copy.table.max_size)
+
+
+if __name__ == "__main__":
+    unittest.main(exit=False)
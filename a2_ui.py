@@ -138,6 +138,7 @@ if __name__ == '__main__':
     
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
+                a2_game.cancel_attack()
                 pygame.quit()
                 sys.exit(0)
             if event.type == pygame.KEYDOWN and not a2_game.GAME_IS_OVER:
@@ -155,14 +156,19 @@ if __name__ == '__main__':
                     a2_game.perform_attack()
                 
         # If the current player isn't using a manual playstyle, pick a move
+        # in the background, checking back every tick until it's ready
         if (not a2_game.GAME_IS_OVER and
             not a2_game.BATTLE_QUEUE.is_over() and 
             not a2_game.BATTLE_QUEUE.peek().playstyle.is_manual and
-            RANDOM_TIMER == 10):
-            a2_game.perform_attack()
+            (RANDOM_TIMER == 10 or a2_game.PENDING_ATTACK is not None)):
+            a2_game.poll_attack()
     
         # Redraw the game
         update_game()
+
+        # Let the AI players search while their opponent decides
+        if not a2_game.GAME_IS_OVER:
+            a2_game.ponder()
         
         # Only let the random strategy make a decision every 10 ticks of time
         RANDOM_TIMER -= 1
@@ -83,6 +83,9 @@ if __name__ == '__main__':
                 a2_game.perform_attack()
                 update_game()
             else:
+                # Let the AI players search while the player decides
+                a2_game.ponder()
+
                 # Prompt for an action (until a valid one is provided)
                 prompt = ("Select an action (A: Attack, S: Special Attack, " +
                           "U: Update Display, Q: Quit Game): ")
@@ -0,0 +1,359 @@
+"""
+Dense value iteration for A2.
+
+The rules of a move only look at HP to deal damage and to decide whether the
+game is over; which skills are available, who is added to the BattleQueue
+and who acts next only depend on the SP of both players and the queue. So
+every position of a matchup is grouped into a layer by its SP and queue,
+and the scores of a layer are a NumPy array indexed by the HP of both
+players. A skill moves every position of a layer to the same child layer at
+once, shifting the HP indices by its damage, so a layer is scored with a few
+array operations instead of one Python call per position.
+
+Every skill costs SP, so layers are scored in order of increasing total SP,
+each after all of its children, as in a2_retrograde. A table covers every
+game that starts with the same SP, for every starting HP up to a maximum.
+
+Sorcerers can't be part of a BattleState, so only the matchups of the other
+classes are solved.
+"""
+from typing import Dict, Tuple, Union
+
+import numpy
+
+from a2_battle_state import BattleState, CHARACTER_CONSTRUCTORS, \
+    SKILL_RULES, DEFENSES, MIN_COSTS, can_act, step, mirror
+
+# The SP, queue and flags shared by every position of a layer.
+Layer = Tuple[Tuple[int, int], Tuple[int, ...],
+              Union[Tuple[bool, ...], None]]
+
+
+def get_max_drain(class_id: str, sp: int) -> int:
+    """
+    Return the most HP a character of class class_id with sp SP can still
+    heal by draining its enemy.
+
+    >>> get_max_drain('v', 45)
+    81
+    >>> get_max_drain('m', 45)
+    0
+    """
+    drains = [rule.damage - min(DEFENSES.values())
+              for rule in SKILL_RULES[class_id].values() if rule.drains]
+
+    if not drains:
+        return 0
+
+    return max(drains) * (sp // MIN_COSTS[class_id])
+
+
+def get_moves_left(state: BattleState, player: int) -> int:
+    """
+    Return the most moves player can still make in state, counting every
+    move as their cheapest skill.
+
+    >>> get_moves_left(BattleState(('r', 'm'), (10, 10), (25, 12), (0, 1),
+    ...                            None), 0)
+    8
+    """
+    return state.sp[player] // MIN_COSTS[state.classes[player]]
+
+
+def _get_layer(state: BattleState) -> Layer:
+    """
+    Return the layer of state.
+
+    Every move costs at least the cheapest skill of its caster, so once a
+    player has made get_moves_left moves they can't act, and every later
+    place they have in a BattleQueue is skipped. Only the first
+    get_moves_left places of each player are kept, which bounds the queue
+    of a layer. A RestrictedBattleQueue counts every place in it, so its
+    queue is kept whole; its rules keep it short anyway.
+
+    >>> _get_layer(BattleState(('r', 'm'), (10, 10), (7, 2), (0, 1, 0, 0, 0),
+    ...                        None))
+    ((7, 2), (0, 0), None)
+    """
+    if state.flags is not None:
+        return state.sp, state.queue, state.flags
+
+    places = [get_moves_left(state, 0), get_moves_left(state, 1)]
+    queue = []
+    for player in state.queue:
+        if places[player] > 0:
+            places[player] -= 1
+            queue.append(player)
+
+    return state.sp, tuple(queue), None
+
+
+def _get_root(classes: Tuple[str, str], sp: Tuple[int, int],
+              restricted: bool) -> BattleState:
+    """
+    Return the position at the start of a game of classes in which the
+    players have sp SP. Its HP is a placeholder.
+
+    >>> _get_root(('r', 'm'), (2, 100), False).queue
+    (1,)
+    """
+    state = BattleState(classes, (1, 1), sp, (0, 1),
+                        (True, True) if restricted else None)
+    while state.queue and not can_act(state, state.queue[0]):
+        state = state._replace(
+            queue=state.queue[1:],
+            flags=None if state.flags is None else state.flags[1:])
+
+    layer = _get_layer(state)
+    return state._replace(queue=layer[1], flags=layer[2])
+
+
+class MatchupTable:
+    """
+    The score of every position of one matchup, for its next player.
+
+    A position is in this table if it can be reached from the start of a
+    game in which both players have at most max_hp HP and the SP in sp.
+
+    classes - the class ids of players 0 and 1.
+    restricted - whether the positions are on a RestrictedBattleQueue.
+    max_hp - the most HP either player had at the start of a game.
+    sp - the SP of players 0 and 1 at the start of a game.
+    root - the layer of the start of a game.
+    layers - the scores of every layer, indexed by the HP of players 0
+             and 1.
+    children - the child layer of every action available in every layer.
+    """
+    classes: Tuple[str, str]
+    restricted: bool
+    max_hp: int
+    sp: Tuple[int, int]
+    root: Layer
+    layers: Dict[Layer, 'numpy.ndarray']
+    children: Dict[Layer, Dict[str, Layer]]
+
+    def __init__(self, classes: Tuple[str, str], max_hp: int,
+                 sp: Tuple[int, int], restricted: bool = False) -> None:
+        """
+        Initialize this MatchupTable with every layer found but none scored.
+
+        >>> table = MatchupTable(('r', 'm'), 10, (6, 6))
+        >>> len(table.children)
+        4
+        """
+        self.classes = classes
+        self.restricted = restricted
+        self.max_hp = max_hp
+        self.sp = sp
+        self.layers = {}
+        self.children = {}
+
+        # Drained HP is added to the caster's HP, so the HP axes are long
+        # enough for a player to heal as much as their SP allows.
+        self._sizes = tuple(max_hp + 1 + get_max_drain(classes[player],
+                                                       sp[player])
+                            for player in [0, 1])
+        # How many of the edges into every layer come from layers that
+        # aren't scored yet.
+        self._parents = {}
+
+        # A layer's children don't depend on HP, so they are found by
+        # stepping a position of the layer with placeholder HP.
+        state = _get_root(classes, sp, restricted)
+        self.root = _get_layer(state)
+        self.children[self.root] = {}
+        self._parents[self.root] = 0
+        to_visit = [state]
+
+        while to_visit:
+            state = to_visit.pop()
+            if not state.queue:
+                continue
+
+            for action, rule in SKILL_RULES[classes[state.queue[0]]].items():
+                if rule.cost <= state.sp[state.queue[0]]:
+                    layer = _get_layer(step(state, action))
+                    self.children[_get_layer(state)][action] = layer
+                    if layer not in self.children:
+                        self.children[layer] = {}
+                        self._parents[layer] = 0
+                        to_visit.append(state._replace(
+                            sp=layer[0], queue=layer[1], flags=layer[2]))
+                    self._parents[layer] += 1
+
+    def solve(self, keep_all: bool = True) -> None:
+        """
+        Score every layer of this MatchupTable. Unless keep_all, the scores
+        of a layer are dropped as soon as every layer leading to it is
+        scored, and only the scores of root are kept.
+
+        >>> table = MatchupTable(('r', 'm'), 40, (40, 40))
+        >>> table.solve()
+        >>> table.lookup(BattleState(('r', 'm'), (40, 40), (40, 40),
+        ...                          (0, 1), None))
+        -4
+        >>> table.lookup(BattleState(('r', 'm'), (30, 12), (40, 40),
+        ...                          (0, 1), None))
+        30
+        """
+        # Scores are never more than a player's HP, so 16 bits hold them.
+        hp0 = numpy.arange(self._sizes[0], dtype=numpy.int16).reshape(-1, 1)
+        hp1 = numpy.arange(self._sizes[1], dtype=numpy.int16).reshape(1, -1)
+        hp = (numpy.broadcast_to(hp0, self._sizes),
+              numpy.broadcast_to(hp1, self._sizes))
+        parents = dict(self._parents)
+
+        for layer in sorted(self.children, key=lambda key: sum(key[0])):
+            self.layers[layer] = self._solve_layer(layer, hp)
+
+            if not keep_all:
+                for child in self.children[layer].values():
+                    parents[child] -= 1
+                    if parents[child] == 0 and child != self.root:
+                        del self.layers[child]
+
+    def _solve_layer(self, layer: Layer,
+                     hp: Tuple['numpy.ndarray', 'numpy.ndarray']) -> \
+            'numpy.ndarray':
+        """
+        Return the scores of layer, whose children must all be scored
+        already. hp holds the HP of players 0 and 1 at every index.
+        """
+        queue = layer[1]
+        player = queue[0] if queue else 0
+
+        # The score of every position as if the game were over, as
+        # a2_battle_state.get_terminal_score defines it.
+        sign = (1, -1) if player == 1 else (-1, 1)
+        scores = numpy.where(hp[0] == 0, hp[1] * sign[0],
+                             numpy.where(hp[1] == 0, hp[0] * sign[1], 0))
+
+        if not queue:
+            return scores
+
+        target = 1 - player
+        best = None
+
+        for action, child in self.children[layer].items():
+            rule = SKILL_RULES[self.classes[player]][action]
+            damage = rule.damage - DEFENSES[self.classes[target]]
+
+            index = [None, None]
+            index[target] = numpy.maximum(hp[target] - damage, 0)
+            if rule.drains:
+                # Only positions that can't be reached reach past the end
+                # of the axis, so clipping them doesn't change any score
+                # lookup returns.
+                index[player] = numpy.minimum(
+                    hp[player] + hp[target] - index[target],
+                    self._sizes[player] - 1)
+            else:
+                index[player] = hp[player]
+
+            child_scores = self.layers[child][index[0], index[1]]
+            if (child[1][0] if child[1] else 0) != player:
+                child_scores = child_scores * -1
+
+            if best is None:
+                best = child_scores
+            else:
+                best = numpy.maximum(best, child_scores)
+
+        return numpy.where((hp[0] == 0) | (hp[1] == 0), scores, best)
+
+    def lookup(self, state: BattleState) -> Union[int, None]:
+        """
+        Return the score of state for its next player, or None if state is
+        not in this MatchupTable.
+
+        When both players have the same class, state is also found by its
+        mirror, which has the same score unless the queue is empty. This lets
+        canonical positions from a2_retrograde be looked up in tables
+        covering uneven starting SP.
+        """
+        score = self._lookup(state)
+        if score is None and state.classes[0] == state.classes[1] and \
+                state.queue:
+            score = self._lookup(mirror(state))
+
+        return score
+
+    def _lookup(self, state: BattleState) -> Union[int, None]:
+        """
+        Return the score of state for its next player, or None if state is
+        not in the layers of this MatchupTable.
+        """
+        if state.classes != self.classes or \
+                (state.flags is not None) != self.restricted:
+            return None
+
+        scores = self.layers.get(_get_layer(state))
+        if scores is None:
+            return None
+
+        # Positions whose player could heal past the end of the HP axis are
+        # left out, since their scores may have been clipped.
+        for player in [0, 1]:
+            if state.hp[player] + get_max_drain(
+                    self.classes[player], state.sp[player]) >= \
+                    self._sizes[player]:
+                return None
+
+        return int(scores[state.hp[0], state.hp[1]])
+
+    def get_start_scores(self) -> 'numpy.ndarray':
+        """
+        Return the score of the start of every game of this MatchupTable for
+        its first player, indexed by the starting HP of players 0 and 1.
+
+        >>> table = MatchupTable(('r', 'm'), 40, (40, 40))
+        >>> table.solve(False)
+        >>> int(table.get_start_scores()[40, 40])
+        -4
+        """
+        return self.layers[self.root][:self.max_hp + 1, :self.max_hp + 1]
+
+
+def solve_matchup(classes: Tuple[str, str], max_hp: int,
+                  sp: Tuple[int, int], restricted: bool = False) -> \
+        MatchupTable:
+    """
+    Return the solved MatchupTable of classes for every game in which both
+    players start with at most max_hp HP and the SP in sp.
+    """
+    table = MatchupTable(classes, max_hp, sp, restricted)
+    table.solve()
+    return table
+
+
+def solve_all_matchups(max_hp: int, sp: Tuple[int, int],
+                       restricted: bool = False) -> \
+        Dict[Tuple[str, str], 'numpy.ndarray']:
+    """
+    Return the start scores of every pair of classes a BattleState can hold,
+    as MatchupTable.get_start_scores gives them, for every game in which both
+    players start with at most max_hp HP and the SP in sp.
+
+    Only the start scores of one matchup are kept at a time, so the memory
+    used is that of the widest set of layers being scored.
+
+    >>> scores = solve_all_matchups(20, (20, 20))
+    >>> len(scores)
+    9
+    >>> scores[('r', 'm')].shape
+    (21, 21)
+    """
+    result = {}
+
+    for class0 in CHARACTER_CONSTRUCTORS:
+        for class1 in CHARACTER_CONSTRUCTORS:
+            table = MatchupTable((class0, class1), max_hp, sp, restricted)
+            table.solve(False)
+            result[(class0, class1)] = table.get_start_scores()
+
+    return result
+
+
+if __name__ == '__main__':
+    import python_ta
+    python_ta.check_all(config='a2_pyta.txt')
@@ -0,0 +1,107 @@
+"""
+Unittests for the dense value iteration solver in A2.
+"""
+import random
+import unittest
+
+from a2_battle_state import BattleState, _clean, get_canonical
+from a2_retrograde import solve
+from a2_value_iteration import MatchupTable, get_moves_left, \
+    solve_matchup, solve_all_matchups
+
+
+def make_state(rng: random.Random, classes: tuple, max_hp: int, sp: tuple,
+               restricted: bool) -> BattleState:
+    """
+    Return the start of a game of classes with random HP of at most max_hp
+    and sp SP.
+    """
+    queue, flags = [0, 1], [True, True] if restricted else None
+    _clean(queue, flags, list(sp), classes)
+    return BattleState(classes, (rng.randint(1, max_hp),
+                                 rng.randint(1, max_hp)), sp, tuple(queue),
+                       None if flags is None else tuple(flags))
+
+
+class ValueIterationUnitTests(unittest.TestCase):
+    def test_matches_retrograde(self):
+        """
+        Test to make sure every position reachable from the start of a game
+        has the score the retrograde solver gives it.
+        """
+        rng = random.Random(148)
+        for _ in range(10):
+            classes = (rng.choice('mrv'), rng.choice('mrv'))
+            sp = (rng.randint(0, 40), rng.randint(0, 40))
+            restricted = rng.choice([False, True])
+            table = solve_matchup(classes, 30, sp, restricted)
+            for _ in range(3):
+                state = make_state(rng, classes, 30, sp, restricted)
+                for position, score in solve(state).items():
+                    self.assertEqual(score, table.lookup(position))
+
+    def test_long_queue(self):
+        """
+        Test to make sure positions in which a player has more places in the
+        queue than moves left are scored like the rest.
+        """
+        table = solve_matchup(('r', 'r'), 40, (40, 40))
+        start = BattleState(('r', 'r'), (40, 40), (40, 40), (0, 1), None)
+        scores = solve(start)
+        states = [state for state in scores
+                  if any(state.queue.count(player) >
+                         get_moves_left(state, player) for player in [0, 1])]
+        self.assertNotEqual([], states)
+        for state in states:
+            self.assertEqual(scores[state], table.lookup(state))
+
+    def test_drain(self):
+        """
+        Test to make sure a Vampire healing above its starting HP is scored.
+        """
+        table = solve_matchup(('v', 'm'), 30, (60, 60))
+        state = BattleState(('v', 'm'), (30, 30), (60, 60), (0, 1), None)
+        self.assertEqual(solve(state)[state], table.lookup(state))
+
+    def test_lookup_outside(self):
+        """
+        Test to make sure positions outside the table aren't looked up.
+        """
+        table = solve_matchup(('r', 'm'), 20, (20, 20))
+        self.assertIsNone(table.lookup(
+            BattleState(('m', 'r'), (20, 20), (20, 20), (0, 1), None)))
+        self.assertIsNone(table.lookup(
+            BattleState(('r', 'm'), (20, 20), (20, 20), (0, 1),
+                        (True, True))))
+        self.assertIsNone(table.lookup(
+            BattleState(('r', 'm'), (20, 20), (30, 20), (0, 1), None)))
+
+    def test_keep_all(self):
+        """
+        Test to make sure solving without keep_all only keeps the start
+        scores, and they match solving with it.
+        """
+        full = solve_matchup(('m', 'r'), 20, (30, 30))
+        table = MatchupTable(('m', 'r'), 20, (30, 30))
+        table.solve(False)
+        self.assertEqual([table.root], list(table.layers))
+        self.assertEqual(full.get_start_scores().tolist(),
+                         table.get_start_scores().tolist())
+
+    def test_all_matchups(self):
+        """
+        Test to make sure every matchup a BattleState can hold is solved
+        for every starting HP.
+        """
+        scores = solve_all_matchups(15, (15, 15), True)
+        self.assertEqual(9, len(scores))
+        for classes, start_scores in scores.items():
+            self.assertEqual((16, 16), start_scores.shape)
+            state = BattleState(classes, (15, 9), (15, 15), (0, 1),
+                                (True, True))
+            self.assertEqual(solve(state)[get_canonical(state)],
+                             start_scores[15, 9])
+
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
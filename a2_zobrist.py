@@ -0,0 +1,62 @@
+"""
+Zobrist hashing for A2.
+
+Every feature of a position (a character's HP or SP, an entry in a
+BattleQueue) is given a fixed random 64-bit key. The hash of a position
+combines the keys of its features, so when a feature changes the hash is
+updated by taking the old key out and putting the new one in, instead of
+being recomputed from the whole position.
+
+Keys are derived from the features themselves, so the same position has the
+same hash in every run of the program.
+"""
+from hashlib import blake2b
+from typing import Dict, Hashable
+
+MASK = (1 << 64) - 1
+
+# The base of the rolling hash of a BattleQueue's order, and its inverse
+# modulo 2 ** 64, which exists because the base is odd.
+ORDER_BASE = 0x9E3779B97F4A7C15
+ORDER_BASE_INVERSE = pow(ORDER_BASE, -1, 1 << 64)
+
+_keys: Dict[Hashable, int] = {}
+
+
+def zobrist_key(*feature: Hashable) -> int:
+    """
+    Return the random 64-bit key of feature.
+
+    >>> zobrist_key('hp', 100) == zobrist_key('hp', 100)
+    True
+    >>> zobrist_key('hp', 100) == zobrist_key('sp', 100)
+    False
+    >>> 0 <= zobrist_key('hp', 100) <= MASK
+    True
+    """
+    key = _keys.get(feature)
+
+    if key is None:
+        digest = blake2b(repr(feature).encode(), digest_size=8).digest()
+        key = int.from_bytes(digest, 'big')
+        _keys[feature] = key
+
+    return key
+
+
+def rotate(value: int, bits: int) -> int:
+    """
+    Return the 64-bit value rotated left by bits. Used to tell apart the
+    hashes of the two players, which are built from the same keys.
+
+    >>> rotate(1, 4)
+    16
+    >>> rotate(1 << 63, 1)
+    1
+    """
+    return ((value << bits) | (value >> (64 - bits))) & MASK
+
+
+if __name__ == '__main__':
+    import python_ta
+    python_ta.check_all(config='a2_pyta.txt')
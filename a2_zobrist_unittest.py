@@ -0,0 +1,87 @@
+"""
+Unittests for the Zobrist hashes of BattleQueues and Characters in A2.
+"""
+import random
+import unittest
+
+from a2_game import BATTLE_QUEUE_CLASSES
+from a2_battle_queue import pack
+from a2_battle_state import from_battle_queue, to_battle_queue
+from a2_test_helpers import make_battle_queue
+
+
+class ZobristUnitTests(unittest.TestCase):
+    def test_hash_matches_state_key(self):
+        """
+        Test to make sure positions reached in random games have the same
+        hash exactly when they have the same state key, and that copies,
+        packed copies and rebuilt queues keep the hash.
+        """
+        rng = random.Random(148)
+        hashes = {}
+        for _ in range(100):
+            bq_class = BATTLE_QUEUE_CLASSES[rng.choice('nr')]
+            bq = make_battle_queue(rng.choice('mrv'), rng.choice('mrv'),
+                                   bq_class=bq_class)
+
+            while not bq.is_over():
+                key = bq.get_state_key()
+                self.assertEqual(hashes.setdefault(key, bq.state_hash()),
+                                 bq.state_hash())
+                self.assertEqual(bq.state_hash(), bq.copy().state_hash())
+                self.assertEqual(bq.state_hash(), pack(bq).state_hash())
+                self.assertEqual(
+                    bq.state_hash(),
+                    to_battle_queue(from_battle_queue(bq)).state_hash())
+
+                bq.make_move(rng.choice(bq.peek().get_available_actions()))
+
+        self.assertEqual(len(hashes), len(set(hashes.values())))
+
+    def test_unmake_move_restores_hash(self):
+        """
+        Test to make sure unmaking moves restores the hash of every position,
+        for both the order and the characters.
+        """
+        rng = random.Random(2)
+        for _ in range(50):
+            bq_class = BATTLE_QUEUE_CLASSES[rng.choice('nr')]
+            bq = make_battle_queue(rng.choice('mrvs'), rng.choice('mrv'),
+                                   bq_class=bq_class)
+            packed = pack(bq)
+            hashes = []
+            records = []
+
+            while not bq.is_over():
+                hashes.append(bq.state_hash())
+                self.assertEqual(hashes[-1], packed.state_hash())
+                action = rng.choice(bq.peek().get_available_actions())
+                records.append((bq.make_move(action),
+                                packed.make_move(action)))
+
+            while records:
+                record, packed_record = records.pop()
+                bq.unmake_move(record)
+                packed.unmake_move(packed_record)
+                self.assertEqual(hashes[-1], bq.state_hash())
+                self.assertEqual(hashes.pop(), packed.state_hash())
+
+    def test_character_hash(self):
+        """
+        Test to make sure a Character's hash follows its HP and SP, whichever
+        method changes them.
+        """
+        bq = make_battle_queue('v', 'm')
+        vampire = bq.peek()
+        fresh = make_battle_queue('v', 'm').peek()
+        fresh.set_hp(83)
+        fresh.set_sp(85)
+
+        vampire.apply_damage(20)
+        vampire.reduce_sp(15)
+        self.assertEqual(fresh.state_hash(), vampire.state_hash())
+        self.assertNotEqual(vampire.state_hash(), vampire.enemy.state_hash())
+
+
+if __name__ == "__main__":
+    unittest.main(exit=False)